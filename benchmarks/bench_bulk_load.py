@@ -0,0 +1,88 @@
+"""Benchmark: first load of a corpus, row-by-row upsert vs bulk_load.
+
+Synthetic articles are written into a fresh database both ways; both
+databases must end up with the same articles and derived tables. Usage:
+
+    python benchmarks/bench_bulk_load.py [n_articles ...]
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from rewriter.corpus.models import Article
+from rewriter.corpus.store import CorpusStore
+
+CATEGORIES = ["News", "Games", "Hardware", "Reviews", "Misc", "Guides"]
+TAGS = [f"tag{i}" for i in range(40)]
+
+
+def make_articles(n: int, seed: int = 0) -> list[Article]:
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(5000)]
+    start = datetime(2010, 1, 1)
+    articles = []
+    for i in range(n):
+        content = "\n\n".join(
+            " ".join(rng.choices(words, k=rng.randint(40, 120))) for _ in range(rng.randint(2, 8))
+        )
+        article = Article(
+            wp_id=i + 1,
+            title=f"Post {i}",
+            slug=f"post-{i}",
+            content=content,
+            raw_html=f"<p>{content}</p>",
+            published_at=start + timedelta(hours=rng.randrange(24 * 365 * 15)),
+            categories=rng.sample(CATEGORIES, rng.randint(0, 2)),
+            tags=rng.sample(TAGS, rng.randint(0, 4)),
+        )
+        article.compute_word_count()
+        article.compute_content_hash()
+        articles.append(article)
+    return articles
+
+
+def snapshot(store: CorpusStore) -> tuple[list[tuple], ...]:
+    queries = (
+        "SELECT wp_id, content_hash FROM articles ORDER BY wp_id",
+        "SELECT COUNT(*) FROM article_categories",
+        "SELECT COUNT(*) FROM article_tags",
+        # Not generation: it only counts writes, which the two loads batch differently
+        "SELECT articles, words FROM corpus_totals",
+        "SELECT * FROM category_counts ORDER BY category",
+        "SELECT COUNT(*) FROM article_html",
+        "SELECT COUNT(*) FROM articles_fts WHERE articles_fts MATCH 'w1'",
+    )
+    return tuple([tuple(r) for r in store.conn.execute(q)] for q in queries)
+
+
+def main() -> None:
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+
+    print(f"{'articles':>9} {'upsert, s':>10} {'bulk, s':>8} {'speedup':>8}  equal")
+    for n in sizes:
+        articles = make_articles(n)
+        timings = []
+        snapshots = []
+        for load in ("upsert", "bulk"):
+            with tempfile.TemporaryDirectory() as tmp, CorpusStore(Path(tmp) / "c.db") as store:
+                start = time.perf_counter()
+                if load == "upsert":
+                    store.upsert_articles_batch(iter(articles), batch_size=500)
+                else:
+                    store.bulk_load(iter(articles), batch_size=500)
+                timings.append(time.perf_counter() - start)
+                snapshots.append(snapshot(store))
+        print(
+            f"{n:>9} {timings[0]:>10.2f} {timings[1]:>8.2f} {timings[0] / timings[1]:>7.1f}x  "
+            f"{snapshots[0] == snapshots[1]}"
+        )
+
+
+if __name__ == "__main__":
+    main()
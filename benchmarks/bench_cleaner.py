@@ -0,0 +1,61 @@
+"""Stress benchmark: clean_html on pathologically nested markup.
+
+Each fixture is generated at increasing depths; with a linear-time
+converter the time per level stays flat as the depth grows. Both backends
+must also agree on every fixture. Usage:
+
+    python benchmarks/bench_cleaner.py [max_depth]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from typing import Callable
+
+from rewriter.importer.cleaner import clean_html
+
+# name -> builder(depth) producing the fixture HTML
+FIXTURES: dict[str, Callable[[int], str]] = {
+    "nested divs": lambda d: "<div>" * d + "deep text" + "</div>" * d,
+    "nested spans": lambda d: "<p>" + "<span>w " * d + "x" + "</span>" * d + "</p>",
+    "nested emphasis": lambda d: "<p>" + "<b> <i>w " * d + "x" + "</i></b>" * d + "</p>",
+    "nested lists": lambda d: "<ul><li>" * d + "item" + "</li></ul>" * d,
+    "nested tables": lambda d: "<table><tr><td>" * (d // 3) + "cell" + "</td></tr></table>" * (d // 3),
+    "nested quotes": lambda d: "<blockquote><p>q</p>" * (d // 20) + "</blockquote>" * (d // 20),
+    "page builder": lambda d: (
+        '<div class="row"><div class="col"><section><span>' * (d // 4)
+        + "<p>text <strong>bold</strong></p>"
+        + "</span></section></div></div>" * (d // 4)
+    ),
+    "wide siblings": lambda d: "<p>word <em>em</em></p>\n" * d,
+}
+
+
+def main() -> None:
+    max_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 16_000
+    depths = []
+    d = 1000
+    while d <= max_depth:
+        depths.append(d)
+        d *= 4
+
+    print(f"{'fixture':<16} {'depth':>7} {'bs4, ms':>9} {'lxml, ms':>9} {'us/level':>9}  equal")
+    for name, build in FIXTURES.items():
+        for depth in depths:
+            html = build(depth)
+            timings = []
+            outputs = []
+            for backend in ("bs4", "lxml"):
+                start = time.perf_counter()
+                outputs.append(clean_html(html, backend=backend))
+                timings.append(time.perf_counter() - start)
+            per_level = timings[0] / depth * 1e6
+            print(
+                f"{name:<16} {depth:>7} {timings[0] * 1e3:>9.1f} {timings[1] * 1e3:>9.1f} "
+                f"{per_level:>9.1f}  {outputs[0] == outputs[1]}"
+            )
+
+
+if __name__ == "__main__":
+    main()
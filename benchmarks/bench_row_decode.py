@@ -0,0 +1,93 @@
+"""Benchmark: decoding article rows, by column name vs the store's decoders.
+
+Rows are read once, then decoded both ways into Article and ArticleSummary;
+the resulting models must be equal. The store unpacks rows by position and
+decodes repeated JSON lists once; both paths validate. Usage:
+
+    python benchmarks/bench_row_decode.py [n_articles ...]
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from bench_bulk_load import make_articles
+
+from rewriter.corpus.models import Article, ArticleSummary
+from rewriter.corpus.store import _ARTICLE_COLUMNS, _SUMMARY_COLUMNS, CorpusStore, _parse_date
+
+
+def validated_article(row: sqlite3.Row) -> Article:
+    return Article(
+        id=row["id"],
+        wp_id=row["wp_id"],
+        title=row["title"],
+        slug=row["slug"],
+        content=row["content"],
+        excerpt=row["excerpt"],
+        published_at=_parse_date(row["published_at"]),
+        categories=json.loads(row["categories"]),
+        tags=json.loads(row["tags"]),
+        word_count=row["word_count"],
+        status=row["status"],
+        content_hash=row["content_hash"],
+        duplicate_of=row["duplicate_of"],
+    )
+
+
+def validated_summary(row: sqlite3.Row) -> ArticleSummary:
+    return ArticleSummary(
+        id=row["id"],
+        wp_id=row["wp_id"],
+        title=row["title"],
+        published_at=_parse_date(row["published_at"]),
+        categories=json.loads(row["categories"]),
+        word_count=row["word_count"],
+        duplicate_of=row["duplicate_of"],
+    )
+
+
+def timed(decode: Callable[[sqlite3.Row], Any], rows: list[sqlite3.Row]) -> tuple[float, list]:
+    """Best of three runs, with the garbage collector paused as in timeit."""
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(3):
+            start = time.perf_counter()
+            models = [decode(r) for r in rows]
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best, models
+
+
+def main() -> None:
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+
+    print(f"{'rows':>8} {'model':<8} {'by name, ms':>14} {'store, ms':>12} {'speedup':>8}  equal")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp, CorpusStore(Path(tmp) / "c.db") as store:
+            store.bulk_load(iter(make_articles(n)))
+            cases = (
+                ("Article", _ARTICLE_COLUMNS, validated_article, store._row_to_article),
+                ("Summary", _SUMMARY_COLUMNS, validated_summary, store._row_to_summary),
+            )
+            for name, columns, slow, fast in cases:
+                rows = store.conn.execute(f"SELECT {columns} FROM articles").fetchall()
+                t_slow, expected = timed(slow, rows)
+                t_fast, got = timed(fast, rows)
+                print(
+                    f"{n:>8} {name:<8} {t_slow * 1e3:>14.0f} {t_fast * 1e3:>12.0f} "
+                    f"{t_slow / t_fast:>7.1f}x  {got == expected}"
+                )
+
+
+if __name__ == "__main__":
+    main()
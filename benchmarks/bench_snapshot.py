@@ -0,0 +1,61 @@
+"""Benchmark: analysis startup reads from the store vs a corpus snapshot.
+
+Times the two reads `rewriter analyze` starts with — article summaries for
+sampling and canonical texts for TF-IDF — against a fresh database and a
+snapshot of it, and checks both give the same results. Usage:
+
+    python benchmarks/bench_snapshot.py [n_articles ...]
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from bench_bulk_load import make_articles
+
+from rewriter.corpus.snapshot import CorpusSnapshot
+from rewriter.corpus.store import CorpusStore
+
+
+def best_of(fn: Callable[[], object], repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 50_000]
+    gc.disable()
+
+    print(f"{'articles':>9} {'read':>10} {'store, ms':>10} {'snapshot, ms':>13} {'speedup':>8}  equal")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp, CorpusStore(Path(tmp) / "c.db") as store:
+            store.bulk_load(iter(make_articles(n)))
+            path = Path(tmp) / "snapshot"
+            CorpusSnapshot.write(store, path)
+
+            reads = {
+                "summaries": lambda source: source.get_article_summaries(),
+                "texts": lambda source: list(source.iter_article_texts(canonical_only=True)),
+            }
+            for name, read in reads.items():
+                # Opening is part of the snapshot's cost, as in a fresh process
+                from_store = best_of(lambda: read(store))
+                from_snapshot = best_of(lambda: read(CorpusSnapshot.open(path)))
+                equal = read(store) == read(CorpusSnapshot.open(path))
+                print(
+                    f"{n:>9} {name:>10} {from_store * 1000:>10.0f} {from_snapshot * 1000:>13.0f} "
+                    f"{from_store / from_snapshot:>7.1f}x  {equal}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark: streaming WXR parser vs. whole-document BeautifulSoup parse.
+
+Each parser runs in a fresh subprocess so that peak RSS is measured
+independently. Usage:
+
+    python benchmarks/bench_wxr_parse.py path/to/export.xml
+"""
+
+from __future__ import annotations
+
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+def _run_legacy(xml_path: Path) -> int:
+    """The pre-streaming approach: one soup for the whole export."""
+    from bs4 import BeautifulSoup
+
+    from rewriter.importer.cleaner import clean_html
+
+    with open(xml_path, "r", encoding="utf-8") as f:
+        soup = BeautifulSoup(f, "lxml-xml")
+
+    n = 0
+    for item in soup.find_all("item"):
+        post_type = item.find("post_type", recursive=False)
+        status = item.find("status", recursive=False)
+        if not post_type or post_type.get_text(strip=True) != "post":
+            continue
+        if not status or status.get_text(strip=True) != "publish":
+            continue
+        encoded = item.find("encoded", recursive=False)
+        if encoded and clean_html(encoded.get_text(strip=True)):
+            n += 1
+    return n
+
+
+def _run_streaming(xml_path: Path) -> int:
+    from rewriter.importer.wordpress import parse_wxr
+
+    return sum(1 for _ in parse_wxr(xml_path, min_words=0))
+
+
+def _child(mode: str, xml_path: Path) -> None:
+    runner = {"legacy": _run_legacy, "streaming": _run_streaming}[mode]
+    start = time.perf_counter()
+    n = runner(xml_path)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"articles": n, "seconds": elapsed, "peak_rss_mb": peak_mb}))
+
+
+def main() -> None:
+    if len(sys.argv) >= 4 and sys.argv[1] == "--child":
+        _child(sys.argv[2], Path(sys.argv[3]))
+        return
+
+    if len(sys.argv) != 2:
+        raise SystemExit(__doc__)
+
+    xml_path = Path(sys.argv[1])
+    size_mb = xml_path.stat().st_size / 1024 / 1024
+    print(f"{xml_path.name}: {size_mb:.1f} MB")
+    print(f"{'parser':<10} {'articles':>9} {'time, s':>9} {'peak RSS, MB':>13}")
+
+    for mode in ("legacy", "streaming"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", mode, str(xml_path)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{mode:<10} {r['articles']:>9} {r['seconds']:>9.2f} {r['peak_rss_mb']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
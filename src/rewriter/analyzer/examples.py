@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Iterator
 
 import joblib
 import numpy as np
@@ -12,8 +13,10 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
 from rewriter.config import Settings
+from rewriter.corpus.boilerplate import Boilerplate
 from rewriter.corpus.models import Article, FewShotExample
-from rewriter.corpus.store import CorpusStore
+from rewriter.corpus.snapshot import load_snapshot
+from rewriter.corpus.store import CorpusStore, fts_query
 
 console = Console()
 
@@ -34,25 +37,32 @@ class ExampleSelector:
         Returns:
             List of selected few-shot examples (one per cluster).
         """
-        articles = self.store.get_all_articles()
-        if not articles:
+        # Near-duplicates would only crowd clusters with copies of one article
+        n_articles = len(self.store.get_canonical_article_ids())
+        if not n_articles:
             raise RuntimeError("No articles in corpus")
 
-        console.print(f"[dim]Building TF-IDF model over {len(articles)} articles...[/dim]")
+        console.print(f"[dim]Building TF-IDF model over {n_articles} articles...[/dim]")
 
-        # Build TF-IDF
-        texts = [f"{a.title} {a.content}" for a in articles]
-        self._article_ids = [a.id for a in articles]
+        # Build TF-IDF, streaming the texts so the corpus is never all in memory
+        boilerplate = Boilerplate.load(self.store)
+        corpus = load_snapshot(self.settings.snapshot_dir, self.store)
+        self._article_ids = []
+
+        def texts() -> Iterator[str]:
+            for article_id, title, content in corpus.iter_article_texts(canonical_only=True):
+                self._article_ids.append(article_id)
+                yield f"{title} {boilerplate.strip(content)}"
 
         self._vectorizer = TfidfVectorizer(
             max_features=10_000,
             ngram_range=(1, 2),
             sublinear_tf=True,
         )
-        self._tfidf_matrix = self._vectorizer.fit_transform(texts)
+        self._tfidf_matrix = self._vectorizer.fit_transform(texts())
 
         # K-Means clustering
-        n_clusters = min(self.settings.n_clusters, len(articles))
+        n_clusters = min(self.settings.n_clusters, len(self._article_ids))
         console.print(f"[dim]Clustering into {n_clusters} groups...[/dim]")
 
         kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
@@ -93,6 +103,8 @@ class ExampleSelector:
     def find_similar(self, text: str, n: int = 3) -> list[Article]:
         """Find the most similar example articles to the given text.
 
+        With ``example_retrieval = "bm25"``, see :meth:`find_similar_bm25`.
+
         Args:
             text: Input text to match against.
             n: Number of examples to return.
@@ -100,6 +112,9 @@ class ExampleSelector:
         Returns:
             Most similar articles from the example set.
         """
+        if self.settings.example_retrieval == "bm25":
+            return self.find_similar_bm25(text, n)
+
         self._ensure_model()
 
         example_ids = set(self.store.get_example_article_ids())
@@ -127,6 +142,20 @@ class ExampleSelector:
         article_ids = [self._article_ids[example_indices[i]] for i in top_idx]
         return self.store.get_articles_by_ids(article_ids)
 
+    def find_similar_bm25(self, text: str, n: int = 3) -> list[Article]:
+        """Find the articles most similar to the text across the whole corpus.
+
+        Ranks every canonical article with BM25 through the corpus full-text
+        index, so no model is loaded. Falls back to the selected examples
+        when no article shares a word with the text.
+        """
+        hits = self.store.search_articles(
+            fts_query(text, match_all=False), limit=n, canonical_only=True
+        )
+        article_ids = [h.article.id for h in hits] or self.store.get_example_article_ids()[:n]
+        by_id = {a.id: a for a in self.store.get_articles_by_ids(article_ids)}
+        return [by_id[i] for i in article_ids if i in by_id]
+
     def _save_model(self) -> None:
         """Persist TF-IDF model to disk."""
         self.settings.ensure_data_dir()
@@ -2,52 +2,85 @@
 
 from __future__ import annotations
 
+import math
 import random
-from collections import defaultdict
+from collections import Counter, defaultdict
 from datetime import datetime
-from typing import Callable
+from typing import Iterable, TypeVar
 
 from rewriter.config import Settings
-from rewriter.corpus.models import Article
+from rewriter.corpus.models import Article, ArticleSummary
+from rewriter.llm.tokens import TokenEstimator
+
+# Sampling reads only metadata, so it works on full articles and summaries
+_A = TypeVar("_A", Article, ArticleSummary)
+
+# (id, primary category, published_at), see CorpusStore.get_sampling_frame
+SamplingFrame = list[tuple[int, str | None, datetime | None]]
+
+# Chunks each chunk is compared with per pass when mixing strata
+_MIX_PARTNERS = 32
 
 
 def stratified_sample(
-    articles: list[Article],
+    articles: list[_A],
     settings: Settings,
     *,
     seed: int = 42,
-) -> list[Article]:
+) -> list[_A]:
     """Select a stratified sample of articles.
 
     Balances by category and publication date. Aims for ~18% of corpus
     (configurable via settings.sample_fraction), typically 250-320 articles.
+    Near-duplicates (articles with ``duplicate_of`` set) are left out; only
+    the canonical article of each group can be sampled.
 
     Args:
-        articles: All articles in corpus.
+        articles: All articles in corpus, or their summaries.
         settings: App settings.
         seed: Random seed for reproducibility.
 
     Returns:
         Sampled articles list.
     """
+    articles = [a for a in articles if a.duplicate_of is None]
+    keys = [(a.categories[0] if a.categories else None, a.published_at) for a in articles]
+    return [articles[i] for i in _stratified_positions(keys, settings, seed)]
+
+
+def sample_frame(frame: SamplingFrame, settings: Settings, *, seed: int = 42) -> list[int]:
+    """Ids of the articles :func:`stratified_sample` selects, from a sampling frame.
+
+    The frame lists the canonical articles in publication order, so only
+    the sampled articles need to be loaded afterwards.
+    """
+    keys = [(category, published_at) for _, category, published_at in frame]
+    return [frame[i][0] for i in _stratified_positions(keys, settings, seed)]
+
+
+def _stratified_positions(
+    keys: list[tuple[str | None, datetime | None]],
+    settings: Settings,
+    seed: int,
+) -> list[int]:
+    """Positions sampled from (primary category, published_at) keys."""
     rng = random.Random(seed)
-    target_n = max(10, int(len(articles) * settings.sample_fraction))
+    target_n = max(10, int(len(keys) * settings.sample_fraction))
 
     # Group by primary category
-    by_category: dict[str, list[Article]] = defaultdict(list)
-    for a in articles:
-        cat = a.categories[0] if a.categories else "_uncategorized"
-        by_category[cat].append(a)
+    by_category: dict[str, list[int]] = defaultdict(list)
+    for i, (category, _) in enumerate(keys):
+        by_category[category if category is not None else "_uncategorized"].append(i)
 
     # Sort each group by date
     _epoch = datetime(1970, 1, 1)
     for cat in by_category:
-        by_category[cat].sort(key=lambda a: a.published_at or _epoch)
+        by_category[cat].sort(key=lambda i: keys[i][1] or _epoch)
 
     # Proportional allocation per category
-    selected: list[Article] = []
+    selected: list[int] = []
     for cat, cat_articles in by_category.items():
-        cat_n = max(1, round(target_n * len(cat_articles) / len(articles)))
+        cat_n = max(1, round(target_n * len(cat_articles) / len(keys)))
         cat_n = min(cat_n, len(cat_articles))
 
         if cat_n >= len(cat_articles):
@@ -76,45 +109,173 @@ def stratified_sample(
     return selected
 
 
+class ChunkPacking:
+    """Articles split into analysis chunks, with their token loads."""
+
+    def __init__(self, chunks: list[list[Article]], loads: list[int], settings: Settings) -> None:
+        self.chunks = chunks
+        self.loads = loads  # tokens of each chunk
+        self.max_tokens = settings.chunk_max_tokens
+        n_articles = sum(len(c) for c in chunks)
+        # No packing can do with fewer chunks than this
+        self.min_chunks = max(
+            math.ceil(sum(loads) / self.max_tokens),
+            math.ceil(n_articles / settings.chunk_articles),
+        )
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    @property
+    def fill(self) -> float:
+        """Share of the chunks' token capacity that is used."""
+        return sum(self.loads) / max(len(self.chunks) * self.max_tokens, 1)
+
+
 def chunk_articles(
     articles: list[Article],
     settings: Settings,
-    token_counter: Callable[[str], int],
+    tokens: TokenEstimator,
 ) -> list[list[Article]]:
-    """Split articles into chunks for batch analysis.
+    """Split articles into chunks for batch analysis, see :func:`pack_articles`."""
+    return pack_articles(articles, settings, tokens).chunks
 
-    Greedy bin-packing: add articles to current chunk until token limit.
+
+def pack_articles(
+    articles: list[Article],
+    settings: Settings,
+    tokens: TokenEstimator,
+) -> ChunkPacking:
+    """Split articles into chunks of at most ``chunk_max_tokens`` tokens and
+    ``chunk_articles`` articles.
+
+    With ``settings.chunk_packing == "greedy"``, articles are added in order
+    to the current chunk until it is full. ``"ffd"`` packs first-fit
+    decreasing, which needs fewer, fuller chunks, then spreads the
+    articles over that many chunks so each chunk mixes categories like the
+    sample does. Articles keep their sample order within a chunk. An
+    article larger than the limit gets a chunk of its own.
+
+    With exact counting, only titles are tokenized when articles carry
+    their token count.
 
     Args:
         articles: Articles to chunk.
         settings: App settings.
-        token_counter: Function that counts tokens in a string.
+        tokens: Token estimator.
+    """
+    sizes = [
+        tokens.count(f"## {a.title}\n\n") + tokens.count_content(a) for a in articles
+    ]
+    if settings.chunk_packing == "ffd":
+        strata = [a.categories[0] if a.categories else "_uncategorized" for a in articles]
+        bins = _pack_ffd(sizes, strata, settings.chunk_max_tokens, settings.chunk_articles)
+    else:
+        bins = _pack_greedy(sizes, settings.chunk_max_tokens, settings.chunk_articles)
+    return ChunkPacking(
+        [[articles[i] for i in b] for b in bins],
+        [sum(sizes[i] for i in b) for b in bins],
+        settings,
+    )
 
-    Returns:
-        List of article chunks.
+
+def _pack_greedy(sizes: list[int], max_tokens: int, max_per_chunk: int) -> list[list[int]]:
+    bins: list[list[int]] = []
+    current: list[int] = []
+    load = 0
+    for i, size in enumerate(sizes):
+        if current and (load + size > max_tokens or len(current) >= max_per_chunk):
+            bins.append(current)
+            current = []
+            load = 0
+        current.append(i)
+        load += size
+    if current:
+        bins.append(current)
+    return bins
+
+
+def _pack_ffd(
+    sizes: list[int], strata: list[str], max_tokens: int, max_per_chunk: int
+) -> list[list[int]]:
+    bins: list[list[int]] = []
+    loads: list[int] = []
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i]):
+        for b in range(len(bins)):
+            if len(bins[b]) < max_per_chunk and loads[b] + sizes[i] <= max_tokens:
+                break
+        else:
+            bins.append([])
+            loads.append(0)
+            b = len(bins) - 1
+        bins[b].append(i)
+        loads[b] += sizes[i]
+    _mix_strata(bins, loads, sizes, strata, max_tokens)
+    return [sorted(b) for b in bins]
+
+
+def _mix_strata(
+    bins: list[list[int]],
+    loads: list[int],
+    sizes: list[int],
+    strata: list[str],
+    max_tokens: int,
+    max_passes: int = 8,
+) -> None:
+    """Swap articles between chunks so that each mixes strata like the whole.
+
+    First fit decreasing groups articles by size, and sizes differ by
+    category. A swap of two articles of different strata is made when both
+    chunks stay within ``max_tokens`` and it lowers the sum over chunks of
+    squared per-stratum counts, which is lowest when strata are spread
+    evenly. Chunk sizes in articles do not change.
+
+    Each chunk is compared with at most :data:`_MIX_PARTNERS` others per
+    pass, so a pass takes time linear in the number of chunks.
     """
-    max_tokens = settings.chunk_max_tokens
-    max_per_chunk = settings.chunk_articles
-    chunks: list[list[Article]] = []
-    current_chunk: list[Article] = []
-    current_tokens = 0
-
-    for article in articles:
-        article_text = f"## {article.title}\n\n{article.content}"
-        article_tokens = token_counter(article_text)
-
-        if (
-            current_chunk
-            and (current_tokens + article_tokens > max_tokens or len(current_chunk) >= max_per_chunk)
-        ):
-            chunks.append(current_chunk)
-            current_chunk = []
-            current_tokens = 0
-
-        current_chunk.append(article)
-        current_tokens += article_tokens
-
-    if current_chunk:
-        chunks.append(current_chunk)
-
-    return chunks
+    counts = [Counter(strata[i] for i in b) for b in bins]
+    for pass_ in range(max_passes):
+        swapped = False
+        for a in range(len(bins)):
+            for b in _mix_partners(a, len(bins), pass_):
+                # Upper bound of the gain of any swap between the two chunks;
+                # most pairs have none worth making, so skip their articles
+                give = max(c - counts[b][s] for s, c in counts[a].items() if c)
+                take = max(c - counts[a][s] for s, c in counts[b].items() if c)
+                if give + take <= 2:
+                    continue
+                for pa in range(len(bins[a])):
+                    for pb in range(len(bins[b])):
+                        x, y = bins[a][pa], bins[b][pb]
+                        sx, sy = strata[x], strata[y]
+                        if sx == sy:
+                            continue
+                        # Change in the sum of squares: 2(ca[sy] - ca[sx] + cb[sx] - cb[sy]) + 4
+                        gain = counts[a][sx] - counts[a][sy] + counts[b][sy] - counts[b][sx]
+                        if gain <= 2:
+                            continue
+                        delta = sizes[y] - sizes[x]
+                        if loads[a] + delta > max_tokens or loads[b] - delta > max_tokens:
+                            continue
+                        bins[a][pa], bins[b][pb] = y, x
+                        loads[a] += delta
+                        loads[b] -= delta
+                        counts[a][sx] -= 1
+                        counts[a][sy] += 1
+                        counts[b][sy] -= 1
+                        counts[b][sx] += 1
+                        swapped = True
+        if not swapped:
+            break
+
+
+def _mix_partners(a: int, n: int, pass_: int) -> Iterable[int]:
+    """Chunks that chunk ``a`` of ``n`` is compared with in a pass of _mix_strata."""
+    if n <= _MIX_PARTNERS + 1:
+        return range(a + 1, n)
+    # Spread over all the other chunks, not the nearest ones: first fit
+    # decreasing leaves articles of similar size, so often of the same
+    # stratum, in neighbouring chunks. Each pass shifts the spread.
+    step = (n - 1) / _MIX_PARTNERS
+    shift = pass_ % int(step)
+    return [(a + 1 + int(j * step) + shift) % n for j in range(_MIX_PARTNERS)]
@@ -15,9 +15,11 @@ from rewriter.analyzer.prompts import (
     SYNTHESIS_USER,
     SYNTHESIS_JSON_USER,
 )
-from rewriter.analyzer.sampler import chunk_articles, stratified_sample
+from rewriter.analyzer.sampler import pack_articles, sample_frame
 from rewriter.config import Settings
+from rewriter.corpus.boilerplate import Boilerplate
 from rewriter.corpus.models import Article, ChunkAnalysis, StyleGuide
+from rewriter.corpus.snapshot import CorpusSnapshot, load_snapshot
 from rewriter.corpus.store import CorpusStore
 from rewriter.llm.batch import BatchProcessor
 from rewriter.llm.client import LLMClient
@@ -33,6 +35,7 @@ class StyleExtractor:
         self.store = store
         self.llm = LLMClient(settings)
         self.batch = BatchProcessor(settings)
+        self.boilerplate = Boilerplate.load(store)
 
     def run(
         self,
@@ -47,15 +50,16 @@ class StyleExtractor:
         3. Synthesis into style guide
         """
         # Step 1: Sample
-        articles = self.store.get_all_articles()
-        if not articles:
+        n_articles = self.store.count_articles()
+        if not n_articles:
             raise RuntimeError("No articles in corpus. Run `rewriter import` first.")
 
-        sample = stratified_sample(articles, self.settings)
+        sample = self._sample()
         console.print(
             f"[bold]Sampled {len(sample)} articles[/bold] "
-            f"out of {len(articles)} ({len(sample)/len(articles)*100:.1f}%)"
+            f"out of {n_articles} ({len(sample)/n_articles*100:.1f}%)"
         )
+        sample = [self.boilerplate.strip_article(a, self.llm.tokens.count) for a in sample]
 
         # Step 2: Chunk analysis
         if resume:
@@ -84,18 +88,28 @@ class StyleExtractor:
 
     def estimate_cost(self) -> dict[str, Any]:
         """Estimate the cost of running analysis."""
-        articles = self.store.get_all_articles()
-        sample = stratified_sample(articles, self.settings)
+        sample = self._sample()
+
+        # Tokens of the sampled articles that boilerplate stripping removes
+        tokens = self.llm.tokens
+        boilerplate_tokens = 0
+        if self.boilerplate:
+            stripped = [self.boilerplate.strip_article(a, tokens.count) for a in sample]
+            boilerplate_tokens = sum(
+                tokens.count_content(a) - tokens.count_content(b)
+                for a, b in zip(sample, stripped)
+                if a is not b
+            )
+            sample = stripped
 
-        chunks = chunk_articles(sample, self.settings, self.llm.count_tokens)
+        packing = pack_articles(sample, self.settings, tokens)
+        chunks = packing.chunks
 
-        total_input_tokens = 0
-        for chunk in chunks:
-            articles_text = self._format_chunk(chunk)
-            prompt_text = CHUNK_ANALYSIS_SYSTEM + CHUNK_ANALYSIS_USER.format(
-                articles_text=articles_text
-            )
-            total_input_tokens += self.llm.count_tokens(prompt_text)
+        # The prompt around the articles is the same for every chunk
+        prompt_tokens = round(tokens.overhead) + tokens.count(
+            CHUNK_ANALYSIS_SYSTEM + CHUNK_ANALYSIS_USER.format(articles_text="")
+        )
+        total_input_tokens = sum(prompt_tokens + self._chunk_tokens(chunk) for chunk in chunks)
 
         # Estimate output: ~2K tokens per chunk analysis
         est_output_per_chunk = 2000
@@ -114,12 +128,31 @@ class StyleExtractor:
         return {
             "sample_size": len(sample),
             "n_chunks": len(chunks),
+            "min_chunks": packing.min_chunks,
+            "chunk_fill": packing.fill,
             "total_input_tokens": total_input,
             "total_output_tokens": total_output,
+            "boilerplate_tokens_saved": boilerplate_tokens,
             "estimated_cost_batch": cost_batch,
             "estimated_cost_direct": cost_direct,
+            "token_estimator": tokens.name,
+            "token_error_bound": tokens.error_bound,
         }
 
+    def _corpus(self) -> CorpusSnapshot | CorpusStore:
+        """Where to read the corpus from: a fresh snapshot if there is one."""
+        return load_snapshot(self.settings.snapshot_dir, self.store)
+
+    def _sample(self) -> list[Article]:
+        """Stratified sample of the corpus, in sample order.
+
+        Sampling runs over (id, category, date) keys; only the sampled
+        articles are loaded in full.
+        """
+        ids = sample_frame(self._corpus().get_sampling_frame(), self.settings)
+        by_id = {a.id: a for a in self.store.get_articles_by_ids(ids)}
+        return [by_id[i] for i in ids]
+
     def _analyze_chunks(
         self,
         sample: list[Article],
@@ -127,8 +160,12 @@ class StyleExtractor:
         use_batch: bool,
     ) -> list[ChunkAnalysis]:
         """Run chunk-level analysis."""
-        chunks = chunk_articles(sample, self.settings, self.llm.count_tokens)
-        console.print(f"Split into {len(chunks)} chunks for analysis")
+        packing = pack_articles(sample, self.settings, self.llm.tokens)
+        chunks = packing.chunks
+        console.print(
+            f"Split into {len(chunks)} chunks for analysis "
+            f"({packing.fill:.0%} full, at least {packing.min_chunks} needed)"
+        )
 
         # Build requests
         requests = []
@@ -238,17 +275,24 @@ class StyleExtractor:
         )
 
     @staticmethod
-    def _format_chunk(articles: list[Article]) -> str:
+    def _article_header(a: Article) -> str:
+        header = f"### «{a.title}»"
+        if a.categories:
+            header += f" [{', '.join(a.categories)}]"
+        if a.published_at:
+            header += f" ({a.published_at.strftime('%Y-%m-%d')})"
+        return header
+
+    @classmethod
+    def _format_chunk(cls, articles: list[Article]) -> str:
         """Format a chunk of articles for the analysis prompt."""
-        parts = []
-        for a in articles:
-            header = f"### «{a.title}»"
-            if a.categories:
-                header += f" [{', '.join(a.categories)}]"
-            if a.published_at:
-                header += f" ({a.published_at.strftime('%Y-%m-%d')})"
-            parts.append(f"{header}\n\n{a.content}")
-        return "\n\n---\n\n".join(parts)
+        return "\n\n---\n\n".join(f"{cls._article_header(a)}\n\n{a.content}" for a in articles)
+
+    def _chunk_tokens(self, articles: list[Article]) -> int:
+        """Tokens of :meth:`_format_chunk`, using the articles' token counts."""
+        frame = "\n\n---\n\n".join(f"{self._article_header(a)}\n\n" for a in articles)
+        tokens = self.llm.tokens
+        return tokens.count(frame) + sum(tokens.count_content(a) for a in articles)
 
     @staticmethod
     def _parse_json(text: str) -> dict[str, Any]:
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import itertools
 import sys
 from pathlib import Path
 
@@ -27,74 +28,250 @@ def cli(ctx: click.Context, verbose: bool) -> None:
 
 
 @cli.command("import")
-@click.argument("xml_file", type=click.Path(exists=True, path_type=Path))
+@click.argument("xml_files", nargs=-1, required=True)
 @click.option("--force", is_flag=True, help="Clear existing articles before import")
+@click.option("--prune", is_flag=True, help="Delete articles no longer present in the export")
 @click.option("--dry-run", is_flag=True, help="Parse and show stats without saving")
 @click.option("--min-words", type=int, default=None, help="Minimum word count (default: 50)")
+@click.option("--no-cache", is_flag=True, help="Convert all HTML again, ignoring cached conversions")
+@click.option("--no-raw-html", is_flag=True, help="Do not keep the original HTML of posts")
+@click.option(
+    "--workers", "-j",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Processes for HTML cleaning (default: 1)",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Articles written per commit (default: 500)",
+)
 @click.pass_context
 def import_cmd(
     ctx: click.Context,
-    xml_file: Path,
+    xml_files: tuple[str, ...],
     force: bool,
+    prune: bool,
     dry_run: bool,
     min_words: int | None,
+    no_cache: bool,
+    no_raw_html: bool,
+    workers: int | None,
+    batch_size: int | None,
 ) -> None:
-    """Import articles from a WordPress XML export file."""
+    """Import articles from WordPress XML export files.
+
+    XML_FILES are paths or glob patterns; all parts of a split export are
+    imported into one corpus in a single run. Files compressed with gzip,
+    xz or bzip2 are decompressed on the fly. Posts are keyed by their post
+    ID: when several files have a post with the same ID, the file listed
+    first keeps it.
+
+    Parsing, cleaning and writing run concurrently, so articles are committed
+    in batches while the export is still being read. The token count of each
+    article is stored, so analysis chunking and --cost-estimate need not
+    tokenize the corpus again.
+
+    The first import into an empty corpus (or with --force) uses a bulk
+    load that builds the indexes once at the end.
+
+    Re-importing is incremental: new posts are added, edited posts are
+    updated in place, and unchanged posts are left alone. Converted HTML is
+    cached in the corpus, so posts whose HTML has not changed are not
+    converted again (also when only --min-words differs, or on --dry-run,
+    which reads the cache but does not add to it). Conversions of HTML that
+    no import has seen for six months are dropped from the cache.
+    """
+    from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+
+    from rewriter.corpus.boilerplate import BoilerplateDetector
+    from rewriter.corpus.dedup import DuplicateDetector
     from rewriter.corpus.store import CorpusStore
-    from rewriter.importer.wordpress import parse_wxr
+    from rewriter.importer.pipeline import ImportPipeline, PipelineStats
+    from rewriter.importer.sources import SourceError, expand_sources
+    from rewriter.llm.client import count_tokens_batch, tokenizer_available
+
+    try:
+        sources = expand_sources(xml_files)
+    except FileNotFoundError as e:
+        raise click.BadParameter(str(e), param_hint="XML_FILES")
 
     overrides = {}
     if min_words is not None:
         overrides["min_words"] = min_words
+    if workers is not None:
+        overrides["import_workers"] = workers
+    if batch_size is not None:
+        overrides["import_batch_size"] = batch_size
+    if no_raw_html:
+        overrides["store_raw_html"] = False
     settings = get_settings(**overrides)
     settings.ensure_data_dir()
 
-    console.print(f"Parsing [bold]{xml_file.name}[/bold]...")
+    token_counter = None
+    if not dry_run:
+        if tokenizer_available():
+            token_counter = count_tokens_batch
+        else:
+            console.print(
+                "[yellow]Tokenizer unavailable (offline?): token counts of new "
+                "articles are left empty.[/yellow]"
+            )
 
-    articles = list(parse_wxr(xml_file, min_words=settings.min_words))
+    store = CorpusStore(settings.db_path)
+    pipeline = ImportPipeline(
+        sources,
+        min_words=settings.min_words,
+        workers=settings.import_workers,
+        cleaner=settings.cleaner_backend,
+        source_threads=settings.import_source_threads,
+        cache=None if no_cache else store,
+        cache_read_only=dry_run,
+        token_counter=token_counter,
+    )
+    samples = []
+    result = None
 
-    if not articles:
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            TimeElapsedColumn(),
+            console=console,
+            transient=True,
+        ) as bar:
+            task = bar.add_task("Importing...")
+
+            def show(stats: PipelineStats) -> None:
+                bar.update(
+                    task,
+                    description=(
+                        f"Importing... {stats.items:,} posts, {stats.articles:,} kept "
+                        f"({stats.items_per_sec:,.0f} posts/s, {stats.mb_per_sec:.1f} MB/s)"
+                    ),
+                )
+
+            articles = pipeline.articles(show)
+            # Nothing is written (or cleared/pruned) unless the export has articles
+            first = next(articles, None)
+            if first is not None and dry_run:
+                for a in itertools.chain([first], articles):
+                    if len(samples) < 5:
+                        samples.append(a)
+            elif first is not None:
+                if force:
+                    store.clear_articles()
+                    console.print("[yellow]Cleared existing articles.[/yellow]")
+                if store.count_articles():
+                    result = store.upsert_articles_batch(
+                        itertools.chain([first], articles),
+                        prune=prune,
+                        batch_size=settings.import_batch_size,
+                        store_html=settings.store_raw_html,
+                    )
+                else:
+                    # First load: bulk mode, indexes built once at the end
+                    result = store.bulk_load(
+                        itertools.chain([first], articles),
+                        batch_size=settings.import_batch_size,
+                        store_html=settings.store_raw_html,
+                    )
+        if result is not None:
+            with console.status("Detecting near-duplicates..."):
+                dedup = DuplicateDetector(settings, store).update()
+            with console.status("Detecting boilerplate..."):
+                boilerplate = BoilerplateDetector(settings, store).update()
+    except SourceError as e:
+        raise click.ClickException(str(e)) from e
+    finally:
+        store.close()
+
+    stats = pipeline.stats
+    if not stats.articles:
         console.print("[red]No articles found matching criteria.[/red]")
         return
 
-    # Stats
-    word_counts = [a.word_count for a in articles]
-    categories: dict[str, int] = {}
-    for a in articles:
-        for cat in a.categories:
-            categories[cat] = categories.get(cat, 0) + 1
-
     table = Table(title="Import Summary", show_header=False)
     table.add_column("Metric", style="bold")
     table.add_column("Value")
-    table.add_row("Articles found", str(len(articles)))
-    table.add_row("Total words", f"{sum(word_counts):,}")
-    table.add_row("Avg words/article", f"{sum(word_counts)/len(word_counts):.0f}")
-    table.add_row("Categories", str(len(categories)))
+    table.add_row("Articles found", str(stats.articles))
+    table.add_row("Total words", f"{stats.words:,}")
+    table.add_row("Avg words/article", f"{stats.words / stats.articles:.0f}")
+    table.add_row("Categories", str(len(stats.categories)))
+    if not no_cache:
+        table.add_row("Cached conversions", f"{stats.cache_hits:,} of {stats.items:,} posts")
+    table.add_row("Elapsed", f"{stats.elapsed:.1f}s")
+    table.add_row(
+        "Throughput", f"{stats.items_per_sec:,.0f} posts/s, {stats.mb_per_sec:.1f} MB/s"
+    )
     console.print(table)
 
+    if len(pipeline.source_stats) > 1:
+        src_table = Table(title="Sources")
+        src_table.add_column("File")
+        src_table.add_column("Posts", justify="right")
+        src_table.add_column("Articles", justify="right")
+        src_table.add_column("Duplicates", justify="right")
+        src_table.add_column("MB", justify="right")
+        src_table.add_column("Elapsed", justify="right")
+        src_table.add_column("Posts/s", justify="right")
+        src_table.add_column("MB/s", justify="right")
+        for s in pipeline.source_stats:
+            src_table.add_row(
+                s.name,
+                f"{s.items:,}",
+                f"{s.articles:,}",
+                f"{s.duplicates:,}",
+                f"{s.bytes_read / 1024 / 1024:.1f}",
+                f"{s.elapsed:.1f}s",
+                f"{s.items_per_sec:,.0f}",
+                f"{s.mb_per_sec:.1f}",
+            )
+        console.print(src_table)
+
     if dry_run:
         console.print("[yellow]Dry run — no data saved.[/yellow]")
 
         if ctx.obj.get("verbose"):
             console.print("\n[bold]Sample articles:[/bold]")
-            for a in articles[:5]:
+            for a in samples:
                 console.print(f"  - {a.title} ({a.word_count} words) [{', '.join(a.categories)}]")
                 if a.content:
                     preview = a.content[:200].replace("\n", " ")
                     console.print(f"    [dim]{preview}...[/dim]")
         return
 
-    store = CorpusStore(settings.db_path)
-    try:
-        if force:
-            store.clear_articles()
-            console.print("[yellow]Cleared existing articles.[/yellow]")
-
-        count = store.insert_articles_batch(articles)
-        console.print(f"[green]Imported {count} articles[/green] (skipped {len(articles) - count} duplicates)")
-    finally:
-        store.close()
+    console.print(
+        f"[green]Imported: {result.added} added, {result.changed} changed[/green], "
+        f"{result.unchanged} unchanged"
+    )
+    if stats.duplicates:
+        console.print(
+            f"[yellow]Skipped {stats.duplicates} posts whose ID an earlier post has:[/yellow]"
+        )
+        for s in pipeline.source_stats:
+            if s.duplicates:
+                console.print(f"[yellow]  {s.name}: {s.duplicates}[/yellow]")
+    if result.removed:
+        if result.pruned:
+            console.print(f"[yellow]Removed {result.removed} articles no longer in export.[/yellow]")
+        else:
+            console.print(
+                f"[dim]{result.removed} articles in corpus are no longer in the export "
+                f"(use --prune to delete them).[/dim]"
+            )
+    if dedup.duplicates:
+        console.print(
+            f"[dim]{dedup.duplicates} near-duplicate articles in {dedup.groups} groups "
+            f"will be skipped by sampling and example selection.[/dim]"
+        )
+    if boilerplate:
+        occurrences = sum(b.articles for b in boilerplate)
+        console.print(
+            f"[dim]{len(boilerplate)} boilerplate lines ({occurrences:,} occurrences) will be "
+            f"stripped for analysis; see `rewriter corpus boilerplate` for the savings.[/dim]"
+        )
 
 
 # ── Analyze ───────────────────────────────────────────────────
@@ -133,8 +310,22 @@ def analyze(
             table.add_column("Metric", style="bold")
             table.add_column("Value")
             table.add_row("Sample size", str(est["sample_size"]))
-            table.add_row("Chunks", str(est["n_chunks"]))
+            table.add_row(
+                "Chunks",
+                f"{est['n_chunks']} ({est['chunk_fill']:.0%} full, at least {est['min_chunks']} needed)",
+            )
             table.add_row("Input tokens (est.)", f"{est['total_input_tokens']:,}")
+            if est["token_error_bound"] is None:
+                table.add_row("Token counts", f"{est['token_estimator']} (cl100k_base proxy)")
+            else:
+                table.add_row(
+                    "Token counts",
+                    f"{est['token_estimator']} (±{est['token_error_bound']:.0%} for 95% of requests)",
+                )
+            if est["boilerplate_tokens_saved"]:
+                table.add_row(
+                    "Boilerplate stripped", f"{est['boilerplate_tokens_saved']:,} tokens"
+                )
             table.add_row("Output tokens (est.)", f"{est['total_output_tokens']:,}")
             table.add_row("Cost (Batch API)", f"${est['estimated_cost_batch']:.2f}")
             table.add_row("Cost (Direct API)", f"${est['estimated_cost_direct']:.2f}")
@@ -175,6 +366,12 @@ def analyze(
 @click.option("--preserve-structure", "-p", is_flag=True, help="Preserve original structure")
 @click.option("--temperature", type=float, default=None, help="Sampling temperature")
 @click.option("--n-examples", "-n", type=int, default=None, help="Number of few-shot examples")
+@click.option(
+    "--retrieval",
+    type=click.Choice(["tfidf", "bm25"]),
+    default=None,
+    help="Few-shot example retrieval: cluster representatives (tfidf) or whole corpus (bm25)",
+)
 @click.option(
     "--example-file", "-e",
     type=click.Path(exists=True, path_type=Path),
@@ -191,6 +388,7 @@ def rewrite(
     preserve_structure: bool,
     temperature: float | None,
     n_examples: int | None,
+    retrieval: str | None,
     example_file: tuple[Path, ...],
     output: Path | None,
 ) -> None:
@@ -217,7 +415,10 @@ def rewrite(
         raise SystemExit(1)
 
     verbose = ctx.obj.get("verbose", False)
-    settings = get_settings()
+    overrides = {}
+    if retrieval is not None:
+        overrides["example_retrieval"] = retrieval
+    settings = get_settings(**overrides)
     store = CorpusStore(settings.db_path)
 
     try:
@@ -285,14 +486,15 @@ def stats() -> None:
 
 @corpus.command()
 @click.argument("article_id", type=int)
-def show(article_id: int) -> None:
+@click.option("--html", "show_html", is_flag=True, help="Show the original HTML instead")
+def show(article_id: int, show_html: bool) -> None:
     """Show a specific article by ID."""
     from rewriter.corpus.store import CorpusStore
 
     settings = get_settings()
     store = CorpusStore(settings.db_path)
     try:
-        article = store.get_article(article_id)
+        article = store.get_article(article_id, with_html=show_html)
         if article is None:
             console.print(f"[red]Article {article_id} not found.[/red]")
             return
@@ -304,7 +506,12 @@ def show(article_id: int) -> None:
         if article.published_at:
             console.print(f"[dim]Published: {article.published_at.strftime('%Y-%m-%d')}[/dim]")
         console.print()
-        console.print(article.content)
+        if not show_html:
+            console.print(article.content)
+        elif article.raw_html:
+            console.print(article.raw_html, markup=False, highlight=False)
+        else:
+            console.print("[yellow]Original HTML was not stored (imported with --no-raw-html).[/yellow]")
     finally:
         store.close()
 
@@ -329,8 +536,9 @@ def examples() -> None:
         table.add_column("Words", justify="right")
         table.add_column("Distance", justify="right")
 
+        summaries = {a.id: a for a in store.get_article_summaries([ex.article_id for ex in exs])}
         for ex in exs:
-            article = store.get_article(ex.article_id)
+            article = summaries.get(ex.article_id)
             if article:
                 table.add_row(
                     str(ex.cluster_id),
@@ -344,6 +552,124 @@ def examples() -> None:
         store.close()
 
 
+@corpus.command()
+@click.argument("query", nargs=-1, required=True)
+@click.option("--limit", type=int, default=10, help="Results to show (default: 10)")
+@click.option("--any", "match_any", is_flag=True, help="Match articles with any of the words")
+def search(query: tuple[str, ...], limit: int, match_any: bool) -> None:
+    """Full-text search over article titles and content, ranked by BM25."""
+    from rich.markup import escape
+
+    from rewriter.corpus.store import HIGHLIGHT_END, HIGHLIGHT_START, CorpusStore, fts_query
+
+    settings = get_settings()
+    store = CorpusStore(settings.db_path)
+    try:
+        hits = store.search_articles(
+            fts_query(" ".join(query), match_all=not match_any), limit=limit
+        )
+        if not hits:
+            console.print("[yellow]No matching articles.[/yellow]")
+            return
+
+        table = Table(title=f"Search: {' '.join(query)}")
+        table.add_column("Article ID", justify="right")
+        table.add_column("Title")
+        table.add_column("Score", justify="right")
+        table.add_column("Match")
+        for hit in hits:
+            snippet = escape(" ".join(hit.snippet.split()))
+            snippet = snippet.replace(HIGHLIGHT_START, "[bold]").replace(HIGHLIGHT_END, "[/bold]")
+            title = escape(hit.article.title[:50])
+            if hit.article.duplicate_of is not None:
+                title += f" [dim](duplicate of {hit.article.duplicate_of})[/dim]"
+            table.add_row(str(hit.article.id), title, f"{hit.score:.2f}", snippet)
+        console.print(table)
+    finally:
+        store.close()
+
+
+@corpus.command()
+@click.option("--check", is_flag=True, help="Only report whether the snapshot is up to date")
+def snapshot(check: bool) -> None:
+    """Write a memory-mapped snapshot of the corpus for analysis.
+
+    `rewriter analyze` reads sampling metadata and clustering texts from the
+    snapshot while it is up to date, instead of decoding them from the
+    database. Any article change makes it stale; run this again after imports.
+    """
+    import time
+
+    from rewriter.corpus.snapshot import CorpusSnapshot
+    from rewriter.corpus.store import CorpusStore
+
+    settings = get_settings()
+    if not settings.db_path.exists():
+        console.print("[red]No corpus database found. Run `rewriter import` first.[/red]")
+        return
+
+    path = settings.snapshot_dir
+    store = CorpusStore(settings.db_path)
+    try:
+        if check:
+            try:
+                snap = CorpusSnapshot.open(path)
+            except (FileNotFoundError, ValueError):
+                console.print(f"[yellow]No usable snapshot at {path}.[/yellow]")
+                return
+            if snap.is_fresh(store):
+                console.print(f"[green]Snapshot is up to date[/green] ({len(snap)} articles).")
+            else:
+                console.print("[yellow]Snapshot is stale. Run `rewriter corpus snapshot`.[/yellow]")
+            return
+
+        start = time.perf_counter()
+        snap = CorpusSnapshot.write(store, path)
+        elapsed = time.perf_counter() - start
+        size = sum(f.stat().st_size for f in path.iterdir())
+        console.print(
+            f"[bold green]Snapshot written:[/bold green] {len(snap)} articles, "
+            f"{size / 1e6:.1f} MB in {elapsed:.1f}s"
+        )
+        console.print(f"  {path}")
+    finally:
+        store.close()
+
+
+@corpus.command()
+@click.option("--limit", type=int, default=20, help="Lines to show (default: 20)")
+def boilerplate(limit: int) -> None:
+    """Show lines stripped as corpus boilerplate, and the tokens saved."""
+    from rewriter.corpus.store import CorpusStore
+    from rewriter.llm.client import count_tokens
+
+    settings = get_settings()
+    store = CorpusStore(settings.db_path)
+    try:
+        lines = store.get_boilerplate()
+        if not lines:
+            console.print("[yellow]No boilerplate detected. It is computed on `rewriter import`.[/yellow]")
+            return
+
+        saved = {b.line: b.articles * count_tokens(b.text) for b in lines}
+
+        table = Table(title=f"Boilerplate ({len(lines)} lines)")
+        table.add_column("Line")
+        table.add_column("Articles", justify="right")
+        table.add_column("Tokens saved", justify="right")
+        for b in sorted(lines, key=lambda b: -saved[b.line])[:limit]:
+            table.add_row(b.text[:70], str(b.articles), f"{saved[b.line]:,}")
+        console.print(table)
+
+        total = sum(saved.values())
+        console.print(
+            f"Stripping boilerplate saves [bold]~{total:,}[/bold] tokens across the corpus "
+            f"in analysis and few-shot examples."
+        )
+    finally:
+        store.close()
+
+
 @corpus.command("style-guide")
 def style_guide() -> None:
     """Show the current style guide."""
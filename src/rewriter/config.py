@@ -32,22 +32,33 @@ class Settings(BaseSettings):
     analysis_model: str = "claude-sonnet-4-20250514"
     max_tokens: int = 4096
     temperature: float = 0.7
+    token_estimator: Literal["tiktoken", "fast"] = "tiktoken"  # fast: calibrated on API usage
 
     # Paths
     data_dir: Path = _PROJECT_ROOT / "data"
 
     # Import
     min_words: int = 50
+    import_workers: int = 1
+    import_source_threads: int = 4  # export files read concurrently
+    cleaner_backend: Literal["bs4", "lxml"] = "bs4"
+    import_batch_size: int = 500  # articles written per commit
+    store_raw_html: bool = True
+    dedup_threshold: float = 0.8  # estimated Jaccard similarity of near-duplicates
+    boilerplate_min_share: float = 0.05  # share of articles a boilerplate line appears in
+    boilerplate_min_articles: int = 5
 
     # Analysis
     sample_fraction: float = 0.18
     chunk_max_tokens: int = 90_000
     chunk_articles: int = 12
+    chunk_packing: Literal["greedy", "ffd"] = "ffd"  # ffd: fewer, fuller chunks
     n_clusters: int = 25
 
     # Rewrite
     intensity: Literal["light", "medium", "full"] = "medium"
     n_examples: int = 3
+    example_retrieval: Literal["tfidf", "bm25"] = "tfidf"  # bm25: full-text index, whole corpus
     preserve_structure: bool = False
 
     @property
@@ -66,6 +77,14 @@ class Settings(BaseSettings):
     def tfidf_model_path(self) -> Path:
         return self.data_dir / "tfidf_model.pkl"
 
+    @property
+    def token_calibration_path(self) -> Path:
+        return self.data_dir / "token_calibration.json"
+
+    @property
+    def snapshot_dir(self) -> Path:
+        return self.data_dir / "snapshot"
+
     def ensure_data_dir(self) -> None:
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
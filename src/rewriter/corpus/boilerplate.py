@@ -0,0 +1,119 @@
+"""Corpus-wide boilerplate detection — lines repeated across many articles."""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import Callable, Iterable
+
+from rewriter.config import Settings
+from rewriter.corpus.models import Article, BoilerplateLine
+from rewriter.corpus.store import CorpusStore
+
+# Lines that carry structure rather than text: rules and code fences
+_MARKUP_RE = re.compile(r"^[\s>*`~=_#-]*$")
+
+_MULTI_NEWLINE_RE = re.compile(r"\n{3,}")
+
+
+def normalize_line(line: str) -> str:
+    """Comparison key of a line: collapsed whitespace, case-folded."""
+    return " ".join(line.split()).casefold()
+
+
+def _is_candidate(key: str) -> bool:
+    return " " in key and not _MARKUP_RE.match(key)
+
+
+class Boilerplate:
+    """The corpus boilerplate set, applied to text sent to the model."""
+
+    def __init__(self, lines: Iterable[str] = ()) -> None:
+        self.lines = frozenset(lines)
+        self._line_tokens: dict[str, int] = {}
+
+    @classmethod
+    def load(cls, store: CorpusStore) -> Boilerplate:
+        return cls(b.line for b in store.get_boilerplate())
+
+    def __bool__(self) -> bool:
+        return bool(self.lines)
+
+    def strip(self, text: str) -> str:
+        """Remove boilerplate lines from ``text``."""
+        if not self.lines:
+            return text
+        kept = [line for line in text.split("\n") if normalize_line(line) not in self.lines]
+        return _MULTI_NEWLINE_RE.sub("\n\n", "\n".join(kept)).strip()
+
+    def strip_article(
+        self, article: Article, token_counter: Callable[[str], int] | None = None
+    ) -> Article:
+        """Copy of ``article`` with boilerplate removed from its content.
+
+        A stored token count is reduced by the tokens of the removed lines,
+        counted with ``token_counter``; without one it is cleared.
+        """
+        if not self.lines:
+            return article
+        content = self.strip(article.content)
+        if content == article.content:
+            return article
+        token_count = None
+        if token_counter is not None and article.token_count is not None:
+            removed = 0
+            for line in article.content.split("\n"):
+                if normalize_line(line) in self.lines:
+                    if line not in self._line_tokens:
+                        self._line_tokens[line] = token_counter(line + "\n")
+                    removed += self._line_tokens[line]
+            token_count = max(0, article.token_count - removed)
+        return article.model_copy(update={"content": content, "token_count": token_count})
+
+
+class BoilerplateDetector:
+    """Finds lines repeated across a large share of the corpus.
+
+    A line is boilerplate when it appears in at least
+    ``boilerplate_min_share`` of the articles (and in no fewer than
+    ``boilerplate_min_articles``). Near-duplicates are not counted, so a
+    reposted article cannot turn its own text into boilerplate. Single words
+    and pure markup lines (rules, code fences) are never candidates.
+    """
+
+    def __init__(self, settings: Settings, store: CorpusStore) -> None:
+        self.settings = settings
+        self.store = store
+
+    def update(self) -> list[BoilerplateLine]:
+        """Recompute and store the boilerplate set, most frequent lines first."""
+        n_articles = len(self.store.get_canonical_article_ids())
+        threshold = max(
+            self.settings.boilerplate_min_articles,
+            math.ceil(n_articles * self.settings.boilerplate_min_share),
+        )
+
+        # Counting keys by hash keeps memory proportional to distinct lines;
+        # the text is kept only once a line reaches the threshold
+        counts: dict[int, int] = {}
+        found: dict[str, str] = {}
+        for _, _, content in self.store.iter_article_texts(canonical_only=True, order_by="id"):
+            seen: dict[str, str] = {}
+            for line in content.split("\n"):
+                key = normalize_line(line)
+                if key and key not in seen and _is_candidate(key):
+                    seen[key] = line.strip()
+            for key, text in seen.items():
+                h = hash(key)
+                n = counts.get(h, 0) + 1
+                counts[h] = n
+                if n >= threshold and key not in found:
+                    found[key] = text
+
+        lines = [
+            BoilerplateLine(line=key, text=text, articles=counts[hash(key)])
+            for key, text in found.items()
+        ]
+        lines.sort(key=lambda b: (-b.articles, b.line))
+        self.store.save_boilerplate(lines)
+        return lines
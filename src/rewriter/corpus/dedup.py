@@ -0,0 +1,173 @@
+"""Near-duplicate detection — MinHash signatures with an LSH index."""
+
+from __future__ import annotations
+
+import re
+import zlib
+from datetime import datetime
+
+import numpy as np
+
+from rewriter.config import Settings
+from rewriter.corpus.models import DedupResult
+from rewriter.corpus.store import CorpusStore
+
+# Signature length, split into BANDS bands of ROWS values for LSH. Two
+# articles share a bucket in some band with probability 1 - (1 - J^ROWS)^BANDS,
+# ~50% at Jaccard 0.7 and ~98% at 0.85.
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Words per shingle
+SHINGLE_SIZE = 5
+
+# Articles hashed per transaction
+_SIGN_BATCH = 500
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SHIFT32 = np.uint64(32)
+
+# Fixed seed: signatures are stored, so the hash family must never change
+_rng = np.random.default_rng(0x5EED)
+_PERM_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_SHINGLE_COEF = _rng.integers(1, 2**63, SHINGLE_SIZE, dtype=np.uint64) | np.uint64(1)
+_BAND_COEF = _rng.integers(1, 2**63, ROWS, dtype=np.uint64) | np.uint64(1)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature (``NUM_PERM`` uint32 values) of a text's word shingles."""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint32)
+
+    # Shingle hashes: a linear combination of the word hashes, mod 2**32
+    h = np.fromiter((zlib.crc32(w.encode()) for w in words), dtype=np.uint64, count=len(words))
+    k = min(SHINGLE_SIZE, len(h))
+    n = len(h) - k + 1
+    shingles = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        shingles += h[j:j + n] * _SHINGLE_COEF[j]
+    shingles = np.unique(shingles & _MASK32)
+
+    # Multiply-shift hashing: high 32 bits of (a * x + b) mod 2**64
+    hashed = (np.outer(shingles, _PERM_A) + _PERM_B) >> _SHIFT32
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+def band_buckets(signature: np.ndarray) -> list[int]:
+    """LSH bucket of each band: a 64-bit hash of its rows, as a signed int."""
+    bands = signature.astype(np.uint64).reshape(BANDS, ROWS)
+    keys = (bands * _BAND_COEF).sum(axis=1)
+    return keys.view(np.int64).tolist()
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class DuplicateDetector:
+    """Marks groups of near-duplicate articles in the corpus.
+
+    Signatures and their LSH buckets are stored alongside the articles and
+    recomputed only for new or edited ones. Candidates are the articles
+    sharing a bucket, so the work grows with the number of similar pairs
+    rather than with the square of the corpus size; each candidate is
+    checked against the estimated Jaccard similarity threshold.
+
+    The earliest published article of a group is its canonical one; the
+    others point to it through ``Article.duplicate_of``.
+    """
+
+    def __init__(self, settings: Settings, store: CorpusStore) -> None:
+        self.settings = settings
+        self.store = store
+
+    def update(self) -> DedupResult:
+        """Sign new and edited articles, then recompute the duplicate groups."""
+        result = DedupResult()
+
+        unsigned = self.store.get_unsigned_article_ids()
+        for start in range(0, len(unsigned), _SIGN_BATCH):
+            rows = self.store.get_article_contents(unsigned[start:start + _SIGN_BATCH])
+            signatures = []
+            for article_id, content_hash, content in rows:
+                sig = minhash(content)
+                signatures.append((article_id, content_hash, sig.tobytes(), band_buckets(sig)))
+            self.store.save_minhashes(signatures)
+            result.signed += len(rows)
+
+        groups = self._find_groups()
+        duplicate_of = self._assign_canonical(groups)
+        self.store.set_duplicates(duplicate_of)
+
+        result.groups = len(groups)
+        result.duplicates = len(duplicate_of)
+        return result
+
+    def _find_groups(self) -> list[list[int]]:
+        """Union the verified candidate pairs into groups of 2+ articles."""
+        buckets = self.store.get_lsh_candidates()
+        if not buckets:
+            return []
+
+        candidate_ids = sorted({i for bucket in buckets for i in bucket})
+        signatures = {
+            article_id: np.frombuffer(blob, dtype=np.uint32)
+            for article_id, blob in self.store.get_minhashes(candidate_ids).items()
+        }
+        threshold = self.settings.dedup_threshold
+
+        parent: dict[int, int] = {}
+
+        def find(x: int) -> int:
+            root = x
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while x != root:
+                parent[x], x = root, parent.get(x, x)
+            return root
+
+        for bucket in buckets:
+            # Compare each member with the bucket's leaders only: members of
+            # one bucket are nearly always alike, so this stays linear
+            leaders: list[int] = []
+            for article_id in bucket:
+                sig = signatures[article_id]
+                for leader in leaders:
+                    if similarity(sig, signatures[leader]) >= threshold:
+                        a, b = find(article_id), find(leader)
+                        if a != b:
+                            parent[max(a, b)] = min(a, b)
+                        break
+                else:
+                    leaders.append(article_id)
+
+        groups: dict[int, list[int]] = {}
+        for article_id in {*parent, *parent.values()}:
+            groups.setdefault(find(article_id), []).append(article_id)
+        return [sorted(members) for members in groups.values() if len(members) > 1]
+
+    def _assign_canonical(self, groups: list[list[int]]) -> dict[int, int]:
+        """Map every non-canonical member to its group's earliest article."""
+        dates = self.store.get_publication_dates([i for g in groups for i in g])
+
+        def published(article_id: int) -> tuple[datetime, int]:
+            pub = dates.get(article_id)
+            try:
+                when = datetime.fromisoformat(pub) if pub else datetime.max
+            except ValueError:
+                when = datetime.max
+            return when, article_id
+
+        duplicate_of: dict[int, int] = {}
+        for group in groups:
+            canonical = min(group, key=published)
+            for article_id in group:
+                if article_id != canonical:
+                    duplicate_of[article_id] = canonical
+        return duplicate_of
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
 from datetime import datetime
 from typing import Any
 
@@ -16,18 +18,87 @@ class Article(BaseModel):
     title: str = ""
     slug: str = ""
     content: str = ""  # cleaned plaintext (markdown-like)
-    raw_html: str = ""
+    raw_html: str = ""  # stored compressed apart from the article, loaded on request
     excerpt: str = ""
     published_at: datetime | None = None
     categories: list[str] = Field(default_factory=list)
     tags: list[str] = Field(default_factory=list)
     word_count: int = 0
     status: str = "publish"  # publish, draft, etc.
+    content_hash: str = ""  # sha256 over every stored field, see compute_content_hash
+    duplicate_of: int | None = None  # canonical article if this is a near-duplicate
+    token_count: int | None = None  # tokens of content, counted on import
 
     def compute_word_count(self) -> int:
         self.word_count = len(self.content.split())
         return self.word_count
 
+    def compute_content_hash(self) -> str:
+        """Fingerprint the stored fields so re-imports can detect edits."""
+        h = hashlib.sha256()
+        for value in (
+            self.title,
+            self.slug,
+            self.content,
+            self.raw_html,
+            self.excerpt,
+            self.published_at.isoformat() if self.published_at else "",
+            json.dumps(self.categories, ensure_ascii=False),
+            json.dumps(self.tags, ensure_ascii=False),
+            self.status,
+        ):
+            h.update(value.encode("utf-8"))
+            h.update(b"\x1f")
+        self.content_hash = h.hexdigest()
+        return self.content_hash
+
+
+class ArticleSummary(BaseModel):
+    """An article's metadata without its text, for listings and sampling."""
+
+    id: int
+    wp_id: int = 0
+    title: str = ""
+    published_at: datetime | None = None
+    categories: list[str] = Field(default_factory=list)
+    word_count: int = 0
+    duplicate_of: int | None = None
+
+
+class SearchHit(BaseModel):
+    """An article matching a full-text query."""
+
+    article: ArticleSummary
+    score: float = 0.0  # BM25 relevance, higher is better
+    snippet: str = ""  # content excerpt around the matched terms
+
+
+class ImportResult(BaseModel):
+    """Outcome of an incremental import, by wp_id."""
+
+    added: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    duplicates: int = 0  # repeated wp_id within the same import
+    removed: int = 0  # in the corpus but no longer in the export
+    pruned: bool = False  # whether removed articles were deleted
+
+
+class DedupResult(BaseModel):
+    """Outcome of a near-duplicate detection pass."""
+
+    signed: int = 0  # articles (re)hashed in this pass
+    groups: int = 0  # near-duplicate groups in the corpus
+    duplicates: int = 0  # articles marked as duplicates of a group's canonical one
+
+
+class BoilerplateLine(BaseModel):
+    """A line repeated across many articles, stripped before analysis."""
+
+    line: str  # normalized text, the match key
+    text: str = ""  # first occurrence as written
+    articles: int = 0  # articles containing the line
+
 
 class ChunkAnalysis(BaseModel):
     """Analysis result for a chunk of articles."""
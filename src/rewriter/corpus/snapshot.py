@@ -0,0 +1,249 @@
+"""Columnar, memory-mapped snapshot of the corpus for analysis jobs.
+
+A snapshot is a directory of flat arrays:
+
+    text.bin          UTF-8 titles and contents, back to back
+    text_offsets.npy  int64, 2n+1: title i is [2i, 2i+1), content i [2i+1, 2i+2)
+    ids.npy           int64 article ids
+    wp_ids.npy        int64 WordPress ids
+    word_counts.npy   int64
+    published.npy     datetime64[s], NaT when undated
+    duplicate_of.npy  int64, -1 for canonical articles
+    cat_offsets.npy   int64, n+1: article i has cat_codes[cat_offsets[i]:cat_offsets[i+1]]
+    cat_codes.npy     int32 indices into the manifest's category names
+    manifest.json     version, generation, size and category names
+
+Rows are in publication order, like :meth:`CorpusStore.get_article_summaries`.
+Every file is mapped read-only, so opening a snapshot costs a few page
+faults and concurrent jobs share one copy through the page cache. The
+manifest records the store's generation; once an article is written the
+snapshot is stale and :meth:`CorpusSnapshot.open_fresh` ignores it.
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from rewriter.corpus.models import ArticleSummary
+from rewriter.corpus.store import CorpusStore
+
+SNAPSHOT_VERSION = 1
+
+_MANIFEST = "manifest.json"
+_TEXT = "text.bin"
+_COLUMNS = (
+    "text_offsets", "ids", "wp_ids", "word_counts", "published",
+    "duplicate_of", "cat_offsets", "cat_codes",
+)
+
+
+class CorpusSnapshot:
+    """Read-only columnar view of the articles, mapped from a snapshot directory.
+
+    Offers the article reads the analysis steps need, with the same results
+    and order as the store methods of the same name.
+    """
+
+    def __init__(self, path: Path, manifest: dict, text: np.ndarray, columns: dict[str, np.ndarray]) -> None:
+        self.path = path
+        self.generation: int = manifest["generation"]
+        self.categories: list[str] = manifest["categories"]
+        self._text = text
+        self._text_offsets = columns["text_offsets"]
+        self.ids = columns["ids"]
+        self.wp_ids = columns["wp_ids"]
+        self.word_counts = columns["word_counts"]
+        self.published = columns["published"]
+        self.duplicate_of = columns["duplicate_of"]
+        self._cat_offsets = columns["cat_offsets"]
+        self._cat_codes = columns["cat_codes"]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ── Writing ──────────────────────────────────────────────
+
+    @classmethod
+    def write(cls, store: CorpusStore, path: Path) -> CorpusSnapshot:
+        """Snapshot the store's articles into ``path``, replacing any old snapshot.
+
+        The snapshot is built next to ``path`` and swapped in when complete,
+        so readers never see a partial one.
+        """
+        # Read first: a write racing the copy leaves the snapshot stale, not wrong
+        generation = store.get_generation()
+        summaries = store.get_article_summaries()
+        n = len(summaries)
+
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        text_offsets = np.empty(2 * n + 1, dtype=np.int64)
+        text_offsets[0] = 0
+        pos = 0
+        with open(tmp / _TEXT, "wb") as f:
+            texts = store.iter_article_texts()
+            for i, (summary, (article_id, title, content)) in enumerate(zip(summaries, texts)):
+                if article_id != summary.id:
+                    raise RuntimeError("Corpus changed while writing the snapshot; retry")
+                for j, part in enumerate((title, content)):
+                    data = part.encode("utf-8")
+                    f.write(data)
+                    pos += len(data)
+                    text_offsets[2 * i + 1 + j] = pos
+
+        names: dict[str, int] = {}
+        cat_offsets = np.zeros(n + 1, dtype=np.int64)
+        cat_codes: list[int] = []
+        for i, s in enumerate(summaries):
+            cat_codes.extend(names.setdefault(c, len(names)) for c in s.categories)
+            cat_offsets[i + 1] = len(cat_codes)
+
+        columns = {
+            "text_offsets": text_offsets,
+            "ids": np.array([s.id for s in summaries], dtype=np.int64),
+            "wp_ids": np.array([s.wp_id for s in summaries], dtype=np.int64),
+            "word_counts": np.array([s.word_count for s in summaries], dtype=np.int64),
+            "published": np.array(
+                [s.published_at or "NaT" for s in summaries], dtype="datetime64[s]"
+            ),
+            "duplicate_of": np.array(
+                [-1 if s.duplicate_of is None else s.duplicate_of for s in summaries],
+                dtype=np.int64,
+            ),
+            "cat_offsets": cat_offsets,
+            "cat_codes": np.array(cat_codes, dtype=np.int32),
+        }
+        for name, array in columns.items():
+            np.save(tmp / f"{name}.npy", array)
+        manifest = {
+            "version": SNAPSHOT_VERSION,
+            "generation": generation,
+            "articles": n,
+            "categories": list(names),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        (tmp / _MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+        old = path.with_name(path.name + ".old")
+        shutil.rmtree(old, ignore_errors=True)
+        if path.exists():
+            path.rename(old)
+        tmp.rename(path)
+        shutil.rmtree(old, ignore_errors=True)
+        return cls.open(path)
+
+    # ── Opening ──────────────────────────────────────────────
+
+    @classmethod
+    def open(cls, path: Path) -> CorpusSnapshot:
+        """Map a snapshot directory.
+
+        Raises:
+            FileNotFoundError: There is no snapshot at ``path``.
+            ValueError: The snapshot was written by an incompatible version.
+        """
+        manifest = json.loads((path / _MANIFEST).read_text(encoding="utf-8"))
+        if manifest.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {manifest.get('version')!r} at {path}")
+        columns = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in _COLUMNS}
+        if (path / _TEXT).stat().st_size:
+            text = np.memmap(path / _TEXT, dtype=np.uint8, mode="r")
+        else:
+            text = np.empty(0, dtype=np.uint8)  # mmap refuses empty files
+        return cls(path, manifest, text, columns)
+
+    @classmethod
+    def open_fresh(cls, path: Path, store: CorpusStore) -> CorpusSnapshot | None:
+        """The snapshot at ``path`` if it matches the store, else None."""
+        try:
+            snapshot = cls.open(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        return snapshot if snapshot.is_fresh(store) else None
+
+    def is_fresh(self, store: CorpusStore) -> bool:
+        """Whether no article was written since the snapshot was taken."""
+        return self.generation == store.get_generation()
+
+    # ── Reads ────────────────────────────────────────────────
+
+    def _str(self, i: int) -> str:
+        start, end = self._text_offsets[i:i + 2]
+        return self._text[start:end].tobytes().decode("utf-8")
+
+    def title(self, i: int) -> str:
+        return self._str(2 * i)
+
+    def content(self, i: int) -> str:
+        return self._str(2 * i + 1)
+
+    def _rows(self, canonical_only: bool) -> np.ndarray:
+        if canonical_only:
+            return np.flatnonzero(np.asarray(self.duplicate_of) < 0)
+        return np.arange(len(self))
+
+    def iter_article_texts(self, *, canonical_only: bool = False) -> Iterator[tuple[int, str, str]]:
+        """Stream (id, title, content), like :meth:`CorpusStore.iter_article_texts`."""
+        ids = self.ids.tolist()
+        offsets = self._text_offsets.tolist()
+        text = memoryview(self._text)
+        for i in self._rows(canonical_only).tolist():
+            start, mid, end = offsets[2 * i:2 * i + 3]
+            yield ids[i], str(text[start:mid], "utf-8"), str(text[mid:end], "utf-8")
+
+    def get_sampling_frame(self) -> list[tuple[int, str | None, datetime | None]]:
+        """(id, primary category, published_at), like :meth:`CorpusStore.get_sampling_frame`."""
+        rows = self._rows(canonical_only=True)
+        starts = self._cat_offsets[rows].tolist()
+        ends = self._cat_offsets[rows + 1].tolist()
+        cat_codes = self._cat_codes
+        names = self.categories
+        return [
+            (id_, names[cat_codes[start]] if end > start else None, published_at)
+            for id_, start, end, published_at in zip(
+                self.ids[rows].tolist(), starts, ends, self.published[rows].astype(object).tolist()
+            )
+        ]
+
+    def get_article_summaries(self, *, canonical_only: bool = False) -> list[ArticleSummary]:
+        """Article metadata, like :meth:`CorpusStore.get_article_summaries`."""
+        rows = self._rows(canonical_only)
+        cat_offsets = self._cat_offsets.tolist()
+        cat_codes = self._cat_codes.tolist()
+        offsets = self._text_offsets.tolist()
+        text = memoryview(self._text)
+        names = self.categories
+        published = self.published[rows].astype(object).tolist()
+        duplicate_of = self.duplicate_of[rows].tolist()
+        summaries = []
+        for k, (i, id_, wp_id, word_count) in enumerate(zip(
+            rows.tolist(),
+            self.ids[rows].tolist(),
+            self.wp_ids[rows].tolist(),
+            self.word_counts[rows].tolist(),
+        )):
+            start, end = cat_offsets[i], cat_offsets[i + 1]
+            summaries.append(ArticleSummary(
+                id=id_,
+                wp_id=wp_id,
+                title=str(text[offsets[2 * i]:offsets[2 * i + 1]], "utf-8"),
+                published_at=published[k],
+                categories=[names[c] for c in cat_codes[start:end]],
+                word_count=word_count,
+                duplicate_of=None if duplicate_of[k] < 0 else duplicate_of[k],
+            ))
+        return summaries
+
+
+def load_snapshot(path: Path, store: CorpusStore) -> CorpusSnapshot | CorpusStore:
+    """Fresh snapshot at ``path`` to read articles from, or the store itself."""
+    snapshot = CorpusSnapshot.open_fresh(path, store)
+    return store if snapshot is None else snapshot
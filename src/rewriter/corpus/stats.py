@@ -11,36 +11,13 @@ from rewriter.corpus.store import CorpusStore
 
 def compute_stats(store: CorpusStore) -> CorpusStats:
     """Compute summary statistics for the corpus."""
-    articles = store.get_all_articles()
-
-    if not articles:
-        return CorpusStats()
-
-    word_counts = [a.word_count for a in articles]
-    categories = store.get_categories_distribution()
-
-    dates = [a.published_at for a in articles if a.published_at]
-    date_range = None
-    if dates:
-        date_range = (
-            min(dates).strftime("%Y-%m-%d"),
-            max(dates).strftime("%Y-%m-%d"),
-        )
-
-    examples = store.get_examples()
-    guide = store.get_latest_style_guide()
-
-    return CorpusStats(
-        total_articles=len(articles),
-        total_words=sum(word_counts),
-        avg_words=sum(word_counts) / len(word_counts),
-        min_words=min(word_counts),
-        max_words=max(word_counts),
-        categories=categories,
-        date_range=date_range,
-        n_examples=len(examples),
-        has_style_guide=guide is not None,
-    )
+    stats = store.get_corpus_stats()
+    if not stats.total_articles:
+        return stats
+
+    stats.n_examples = len(store.get_examples())
+    stats.has_style_guide = store.get_latest_style_guide() is not None
+    return stats
 
 
 def print_stats(stats: CorpusStats, console: Console | None = None) -> None:
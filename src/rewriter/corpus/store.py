@@ -3,12 +3,30 @@
 from __future__ import annotations
 
 import json
+import re
 import sqlite3
+import threading
+import time
+import weakref
+import zlib
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator, Literal
 
-from rewriter.corpus.models import Article, ChunkAnalysis, FewShotExample, StyleGuide
+from rewriter.corpus.models import (
+    Article,
+    ArticleSummary,
+    BoilerplateLine,
+    ChunkAnalysis,
+    CorpusStats,
+    FewShotExample,
+    ImportResult,
+    SearchHit,
+    StyleGuide,
+)
 
 _SCHEMA = """
 CREATE TABLE IF NOT EXISTS articles (
@@ -17,13 +35,21 @@ CREATE TABLE IF NOT EXISTS articles (
     title       TEXT NOT NULL DEFAULT '',
     slug        TEXT NOT NULL DEFAULT '',
     content     TEXT NOT NULL DEFAULT '',
-    raw_html    TEXT NOT NULL DEFAULT '',
     excerpt     TEXT NOT NULL DEFAULT '',
     published_at TEXT,
     categories  TEXT NOT NULL DEFAULT '[]',
     tags        TEXT NOT NULL DEFAULT '[]',
     word_count  INTEGER NOT NULL DEFAULT 0,
-    status      TEXT NOT NULL DEFAULT 'publish'
+    status      TEXT NOT NULL DEFAULT 'publish',
+    content_hash TEXT NOT NULL DEFAULT '',
+    duplicate_of INTEGER,
+    token_count INTEGER  -- tokens of content; NULL if not counted on import
+);
+
+-- Original post HTML, zlib-compressed; read only on request
+CREATE TABLE IF NOT EXISTS article_html (
+    article_id INTEGER PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+    html       BLOB NOT NULL
 );
 
 CREATE TABLE IF NOT EXISTS chunk_analyses (
@@ -53,104 +79,837 @@ CREATE TABLE IF NOT EXISTS examples (
     UNIQUE(article_id)
 );
 
+-- MinHash signature of each article's content, see corpus/dedup.py
+CREATE TABLE IF NOT EXISTS minhashes (
+    article_id   INTEGER PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+    content_hash TEXT NOT NULL,
+    signature    BLOB NOT NULL
+);
+
+-- LSH index: one row per (band, bucket) an article's signature falls in
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band       INTEGER NOT NULL,
+    bucket     INTEGER NOT NULL,
+    article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, article_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_lsh_buckets_article ON lsh_buckets(article_id);
+
+-- Lines repeated across the corpus, see corpus/boilerplate.py
+CREATE TABLE IF NOT EXISTS boilerplate (
+    line     TEXT PRIMARY KEY,
+    text     TEXT NOT NULL DEFAULT '',
+    articles INTEGER NOT NULL DEFAULT 0
+);
+
+-- clean_html output by (sha256 of the raw HTML, backend, CLEANER_VERSION)
+CREATE TABLE IF NOT EXISTS cleaned_cache (
+    raw_hash        TEXT NOT NULL,
+    backend         TEXT NOT NULL,
+    cleaner_version INTEGER NOT NULL,
+    content         TEXT NOT NULL,
+    word_count      INTEGER NOT NULL,
+    token_count     INTEGER,
+    used_at         INTEGER,  -- unix time an import last saw the HTML, to the day
+    PRIMARY KEY (raw_hash, backend, cleaner_version)
+) WITHOUT ROWID;
+
+-- Categories and tags of each article in export order, mirrored from the
+-- JSON columns by the triggers below so they can be filtered on in SQL
+CREATE TABLE IF NOT EXISTS article_categories (
+    article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+    position   INTEGER NOT NULL,
+    category   TEXT NOT NULL,
+    PRIMARY KEY (article_id, position)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS article_tags (
+    article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+    position   INTEGER NOT NULL,
+    tag        TEXT NOT NULL,
+    PRIMARY KEY (article_id, position)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_article_categories_category
+    ON article_categories(category, position, article_id);
+CREATE INDEX IF NOT EXISTS idx_article_tags_tag ON article_tags(tag, article_id);
+
+-- Full-text index over title and content, read from the articles table
+-- (external content) and kept in step by the triggers below
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, content,
+    content='articles', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+-- Running totals over articles, kept up to date by the triggers below.
+-- generation grows with every article write, so copies of the corpus
+-- (see corpus/snapshot.py) can tell whether they are stale.
+CREATE TABLE IF NOT EXISTS corpus_totals (
+    id         INTEGER PRIMARY KEY CHECK (id = 1),
+    articles   INTEGER NOT NULL DEFAULT 0,
+    words      INTEGER NOT NULL DEFAULT 0,
+    generation INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS category_counts (
+    category TEXT PRIMARY KEY,
+    articles INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
 CREATE INDEX IF NOT EXISTS idx_articles_wp_id ON articles(wp_id);
 CREATE INDEX IF NOT EXISTS idx_articles_word_count ON articles(word_count);
 CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published_at);
+
+CREATE TRIGGER IF NOT EXISTS articles_terms_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO article_categories (article_id, position, category)
+        SELECT NEW.id, key, value FROM json_each(NEW.categories);
+    INSERT INTO article_tags (article_id, position, tag)
+        SELECT NEW.id, key, value FROM json_each(NEW.tags);
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_terms_update
+AFTER UPDATE OF categories, tags ON articles BEGIN
+    DELETE FROM article_categories WHERE article_id = NEW.id;
+    INSERT INTO article_categories (article_id, position, category)
+        SELECT NEW.id, key, value FROM json_each(NEW.categories);
+    DELETE FROM article_tags WHERE article_id = NEW.id;
+    INSERT INTO article_tags (article_id, position, tag)
+        SELECT NEW.id, key, value FROM json_each(NEW.tags);
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, content) VALUES (NEW.id, NEW.title, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, content)
+        VALUES ('delete', OLD.id, OLD.title, OLD.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, content ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, content)
+        VALUES ('delete', OLD.id, OLD.title, OLD.content);
+    INSERT INTO articles_fts (rowid, title, content) VALUES (NEW.id, NEW.title, NEW.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_generation_insert AFTER INSERT ON articles BEGIN
+    UPDATE corpus_totals SET generation = generation + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_generation_delete AFTER DELETE ON articles BEGIN
+    UPDATE corpus_totals SET generation = generation + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_generation_update AFTER UPDATE ON articles BEGIN
+    UPDATE corpus_totals SET generation = generation + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_totals_insert AFTER INSERT ON articles BEGIN
+    UPDATE corpus_totals SET articles = articles + 1, words = words + NEW.word_count;
+    INSERT INTO category_counts (category, articles)
+        SELECT DISTINCT value, 1 FROM json_each(NEW.categories) WHERE true
+        ON CONFLICT (category) DO UPDATE SET articles = articles + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_totals_delete AFTER DELETE ON articles BEGIN
+    UPDATE corpus_totals SET articles = articles - 1, words = words - OLD.word_count;
+    UPDATE category_counts SET articles = articles - 1
+        WHERE category IN (SELECT value FROM json_each(OLD.categories));
+    DELETE FROM category_counts WHERE articles <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS articles_totals_update
+AFTER UPDATE OF word_count, categories ON articles BEGIN
+    UPDATE corpus_totals SET words = words - OLD.word_count + NEW.word_count;
+    UPDATE category_counts SET articles = articles - 1
+        WHERE category IN (SELECT value FROM json_each(OLD.categories));
+    INSERT INTO category_counts (category, articles)
+        SELECT DISTINCT value, 1 FROM json_each(NEW.categories) WHERE true
+        ON CONFLICT (category) DO UPDATE SET articles = articles + 1;
+    DELETE FROM category_counts WHERE articles <= 0;
+END;
 """
 
+# Columns added after the initial schema: table -> {column: declaration}.
+# Applied with ALTER TABLE to databases created by older versions.
+_ADDED_COLUMNS: dict[str, dict[str, str]] = {
+    "articles": {
+        "content_hash": "TEXT NOT NULL DEFAULT ''",
+        "duplicate_of": "INTEGER",
+        "token_count": "INTEGER",
+    },
+    "corpus_totals": {
+        "generation": "INTEGER NOT NULL DEFAULT 0",
+    },
+    "cleaned_cache": {
+        "token_count": "INTEGER",
+        "used_at": "INTEGER",
+    },
+}
+
+# Indexes over columns that _ADDED_COLUMNS may add, created after them.
+# idx_articles_sampling covers get_sampling_frame, which so never reads rows.
+_ADDED_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_articles_sampling ON articles(duplicate_of, published_at)",
+)
+
+# Writable article columns, in the order produced by _article_params
+_ARTICLE_FIELDS = (
+    "wp_id", "title", "slug", "content", "excerpt",
+    "published_at", "categories", "tags", "word_count", "status", "content_hash",
+    "token_count",
+)
+_INSERT_ARTICLE = (
+    f"INSERT INTO articles ({', '.join(_ARTICLE_FIELDS)}) "
+    f"VALUES ({', '.join('?' for _ in _ARTICLE_FIELDS)})"
+)
+_UPDATE_ARTICLE = (
+    f"UPDATE articles SET {', '.join(f'{c} = ?' for c in _ARTICLE_FIELDS)} WHERE id = ?"
+)
+_UPSERT_ARTICLE = (
+    f"{_INSERT_ARTICLE} ON CONFLICT (wp_id) DO UPDATE SET "
+    f"{', '.join(f'{c} = excluded.{c}' for c in _ARTICLE_FIELDS[1:])}"
+)
+
+# Secondary indexes and per-row triggers that bulk_load drops and rebuilds
+# once at the end: building an index from sorted data beats updating it
+# for every row, and the derived tables are filled with one statement each
+_BULK_DEFERRED = (
+    "idx_articles_wp_id",
+    "idx_articles_word_count",
+    "idx_articles_published",
+    "idx_articles_sampling",
+    "articles_terms_insert",
+    "articles_fts_insert",
+    "articles_totals_insert",
+    "articles_generation_insert",
+    "articles_terms_update",
+    "articles_fts_update",
+    "articles_totals_update",
+    "articles_generation_update",
+)
+
+# Page cache used during bulk_load, in KiB
+_BULK_CACHE_KIB = 256 * 1024
+
+# BM25 weights of the full-text columns: title, content
+_FTS_WEIGHTS = (4.0, 1.0)
+
+# Snippet highlight markers, chosen not to occur in article text
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+_TERM_RE = re.compile(r"\w+")
+
+# Rows fetched per round trip by the streaming iterators
+_FETCH_BATCH = 500
+
+ArticleOrder = Literal["published_at", "id"]
+_ARTICLE_ORDER: dict[str, str] = {"published_at": "published_at, id", "id": "id"}
+
+# Columns read into an Article and an ArticleSummary (which leaves out the
+# text), in the order _row_to_article and _row_to_summary unpack them
+_ARTICLE_COLUMNS = (
+    "id, wp_id, title, slug, content, excerpt, published_at, "
+    "categories, tags, word_count, status, content_hash, duplicate_of, token_count"
+)
+_SUMMARY_COLUMNS = "id, wp_id, title, published_at, categories, word_count, duplicate_of"
+
+
+def _compress_html(html: str) -> bytes:
+    return zlib.compress(html.encode("utf-8"))
+
+
+def _decompress_html(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def fts_query(text: str, *, match_all: bool = True, max_terms: int = 64) -> str:
+    """FTS5 MATCH expression for the words of ``text``.
+
+    Every word is quoted, so the result is valid whatever ``text`` holds.
+    With ``match_all`` an article must contain every word; otherwise any
+    word matches and BM25 ranks articles by how many and how rare. Words
+    shorter than three characters are dropped from any-word queries, and
+    only the ``max_terms`` most frequent words are kept, so long texts can
+    be used as queries.
+    """
+    words = _TERM_RE.findall(text.lower())
+    if match_all:
+        return " AND ".join(f'"{w}"' for w in dict.fromkeys(words))
+    counts = Counter(w for w in words if len(w) >= 3)
+    return " OR ".join(f'"{w}"' for w, _ in counts.most_common(max_terms))
+
+
+@lru_cache(maxsize=4096)
+def _json_list(value: str) -> tuple[str, ...]:
+    """Decode a JSON list column; category and tag lists repeat a lot.
+
+    A tuple, so the cached value cannot be changed: validation copies it
+    into the model's list.
+    """
+    return tuple(json.loads(value))
+
+
+def _parse_date(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+class _Reader:
+    """A thread's read-only connection; closed when the thread's locals go."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
 
 class CorpusStore:
-    """SQLite-backed storage for the corpus."""
+    """SQLite-backed storage for the corpus, safe to share between threads.
+
+    All writes go through one connection, serialized by a lock (see
+    :meth:`writing`). Reads use a read-only connection per thread, opened on
+    first use; with WAL they run concurrently with each other and with the
+    writer, and see everything committed so far. Inside :meth:`writing`, the
+    writing thread reads through the write connection, so it sees its own
+    uncommitted changes.
+    """
 
     def __init__(self, db_path: Path) -> None:
         self.db_path = db_path
         db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(str(db_path))
-        self.conn.row_factory = sqlite3.Row
-        self.conn.execute("PRAGMA journal_mode=WAL")
-        self.conn.execute("PRAGMA foreign_keys=ON")
-        self._init_schema()
+        self._writer = self._connect(db_path)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA foreign_keys=ON")
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers: weakref.WeakSet[_Reader] = weakref.WeakSet()
+        self._readers_lock = threading.Lock()
+        with self.writing():
+            self._init_schema()
+
+    @staticmethod
+    def _connect(path: Path, *, read_only: bool = False) -> sqlite3.Connection:
+        if read_only:
+            conn = sqlite3.connect(
+                f"{path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            conn = sqlite3.connect(str(path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The connection for the calling thread: see :meth:`reading`."""
+        if getattr(self._local, "write_depth", 0):
+            return self._writer
+        reader: _Reader | None = getattr(self._local, "reader", None)
+        if reader is None:
+            reader = _Reader(self._connect(self.db_path, read_only=True))
+            self._local.reader = reader
+            with self._readers_lock:
+                self._readers.add(reader)
+        return reader.conn
+
+    @contextmanager
+    def reading(self) -> Iterator[sqlite3.Connection]:
+        """Connection for reads in the calling thread.
+
+        This is the thread's read-only connection, or the write connection
+        when the thread is inside :meth:`writing`.
+        """
+        yield self.conn
+
+    @contextmanager
+    def writing(self) -> Iterator[sqlite3.Connection]:
+        """Hold the write connection for a transaction.
+
+        Writers in other threads wait until the block ends. The transaction
+        is committed when the outermost block exits and rolled back if it
+        raises; nested blocks join the enclosing transaction.
+        """
+        with self._write_lock:
+            depth = getattr(self._local, "write_depth", 0)
+            self._local.write_depth = depth + 1
+            try:
+                yield self._writer
+                if not depth:
+                    self._writer.commit()
+            except BaseException:
+                if not depth:
+                    self._writer.rollback()
+                raise
+            finally:
+                self._local.write_depth = depth
+
+    def __enter__(self) -> CorpusStore:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
 
     def _init_schema(self) -> None:
+        before = self._tables()
         self.conn.executescript(_SCHEMA)
+        self._migrate(self._tables() - before)
         self.conn.commit()
 
+    def _tables(self) -> set[str]:
+        rows = self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        return {r["name"] for r in rows}
+
+    def _migrate(self, created: set[str]) -> None:
+        """Bring a database created by an older version up to date.
+
+        Args:
+            created: Tables that did not exist before this connection.
+        """
+        for table, columns in _ADDED_COLUMNS.items():
+            existing = {
+                r["name"] for r in self.conn.execute(f"PRAGMA table_info({table})")
+            }
+            for name, decl in columns.items():
+                if name not in existing:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+        for sql in _ADDED_INDEXES:
+            self.conn.execute(sql)
+
+        columns = {r["name"] for r in self.conn.execute("PRAGMA table_info(articles)")}
+        if "raw_html" in columns:
+            self._migrate_raw_html()
+
+        columns = {r["name"] for r in self.conn.execute("PRAGMA table_info(cleaned_cache)")}
+        if "backend" not in columns:
+            # Keyed without the backend before: the cache starts over
+            self.conn.execute("DROP TABLE cleaned_cache")
+            self.conn.executescript(_SCHEMA)
+
+        if self.conn.execute("SELECT 1 FROM corpus_totals").fetchone() is None:
+            self._rebuild_totals()
+        if "article_categories" in created:
+            self.conn.execute(
+                """INSERT INTO article_categories (article_id, position, category)
+                   SELECT a.id, c.key, c.value FROM articles a, json_each(a.categories) c"""
+            )
+        if "articles_fts" in created:
+            self.conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+        if "article_tags" in created:
+            self.conn.execute(
+                """INSERT INTO article_tags (article_id, position, tag)
+                   SELECT a.id, t.key, t.value FROM articles a, json_each(a.tags) t"""
+            )
+
+    def _migrate_raw_html(self) -> None:
+        """Move articles.raw_html into the compressed article_html table.
+
+        SQLite before 3.35 cannot drop a column: there the column is kept,
+        empty, and this only has work to do once.
+        """
+        cur = self.conn.execute("SELECT id, raw_html FROM articles WHERE raw_html != ''")
+        moved = 0
+        while rows := cur.fetchmany(500):
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO article_html (article_id, html) VALUES (?, ?)",
+                [(r["id"], _compress_html(r["raw_html"])) for r in rows],
+            )
+            moved += len(rows)
+        if sqlite3.sqlite_version_info >= (3, 35, 0):
+            self.conn.execute("ALTER TABLE articles DROP COLUMN raw_html")
+        elif moved:
+            self.conn.execute("UPDATE articles SET raw_html = '' WHERE raw_html != ''")
+        else:
+            return
+        self.conn.commit()
+        # Give the space of the dropped column back to the filesystem
+        self.conn.execute("VACUUM")
+
+    def _rebuild_totals(self) -> None:
+        """Recompute the totals the article triggers maintain."""
+        # The generation moves on, never back, so no older copy can match
+        generation = self.conn.execute(
+            "SELECT COALESCE(MAX(generation), 0) FROM corpus_totals"
+        ).fetchone()[0]
+        self.conn.execute("DELETE FROM corpus_totals")
+        self.conn.execute(
+            """INSERT INTO corpus_totals (id, articles, words, generation)
+               SELECT 1, COUNT(*), COALESCE(SUM(word_count), 0), ? FROM articles""",
+            (generation + 1,),
+        )
+        self.conn.execute("DELETE FROM category_counts")
+        self.conn.execute(
+            """INSERT INTO category_counts (category, articles)
+               SELECT c.value, COUNT(DISTINCT a.id) FROM articles a, json_each(a.categories) c
+               GROUP BY c.value"""
+        )
+
     def close(self) -> None:
-        self.conn.close()
+        with self._readers_lock:
+            readers = list(self._readers)
+        for reader in readers:
+            reader.conn.close()
+        with self._write_lock:
+            self._writer.close()
 
     # ── Articles ──────────────────────────────────────────────
 
-    def insert_article(self, article: Article) -> int:
+    def insert_article(self, article: Article, *, store_html: bool = True) -> int:
         """Insert an article, returning its row id. Skips duplicates by wp_id."""
         try:
-            cur = self.conn.execute(
-                """INSERT INTO articles
-                   (wp_id, title, slug, content, raw_html, excerpt,
-                    published_at, categories, tags, word_count, status)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    article.wp_id,
-                    article.title,
-                    article.slug,
-                    article.content,
-                    article.raw_html,
-                    article.excerpt,
-                    article.published_at.isoformat() if article.published_at else None,
-                    json.dumps(article.categories, ensure_ascii=False),
-                    json.dumps(article.tags, ensure_ascii=False),
-                    article.word_count,
-                    article.status,
-                ),
-            )
-            self.conn.commit()
-            return cur.lastrowid  # type: ignore[return-value]
+            with self.writing():
+                return self._insert(article, store_html)
         except sqlite3.IntegrityError:
             # Duplicate wp_id — skip
             return -1
 
-    def insert_articles_batch(self, articles: list[Article]) -> int:
+    def insert_articles_batch(self, articles: list[Article], *, store_html: bool = True) -> int:
         """Insert multiple articles in a transaction. Returns count of inserted."""
         count = 0
-        with self.conn:
+        with self.writing():
             for article in articles:
                 try:
-                    self.conn.execute(
-                        """INSERT INTO articles
-                           (wp_id, title, slug, content, raw_html, excerpt,
-                            published_at, categories, tags, word_count, status)
-                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                        (
-                            article.wp_id,
-                            article.title,
-                            article.slug,
-                            article.content,
-                            article.raw_html,
-                            article.excerpt,
-                            article.published_at.isoformat() if article.published_at else None,
-                            json.dumps(article.categories, ensure_ascii=False),
-                            json.dumps(article.tags, ensure_ascii=False),
-                            article.word_count,
-                            article.status,
-                        ),
-                    )
+                    self._insert(article, store_html)
                     count += 1
                 except sqlite3.IntegrityError:
                     continue
         return count
 
-    def get_article(self, article_id: int) -> Article | None:
+    def upsert_articles_batch(
+        self,
+        articles: Iterable[Article],
+        *,
+        prune: bool = False,
+        batch_size: int = 0,
+        store_html: bool = True,
+    ) -> ImportResult:
+        """Synchronize the corpus with an export, keyed by wp_id.
+
+        New posts are inserted, posts whose content hash differs are updated
+        in place (keeping their row id), and identical posts are not touched.
+        Articles missing from ``articles`` are counted as removed, and deleted
+        along with their examples only when ``prune`` is set.
+
+        ``articles`` may be a stream: with ``batch_size`` set, the transaction
+        is committed after every ``batch_size`` writes instead of once at the
+        end, so a long import keeps neither the articles nor a huge
+        transaction in memory. On error, only the current batch is rolled back.
+        Writes from other threads wait until the synchronization is done.
+
+        Without ``store_html``, the original HTML of written articles is not
+        kept (see :meth:`get_raw_html`). Identical posts stored without a
+        token count get the one of the import, if it has any.
+
+        A wp_id repeated in ``articles`` replaces the article written for it
+        earlier in the run, which is counted in ``duplicates`` instead; see
+        :meth:`ImportPipeline.articles` for why the last one wins.
+        """
+        with self.writing():
+            existing: dict[int, tuple[int, str, bool]] = {
+                r["wp_id"]: (r["id"], r["content_hash"], r["token_count"] is None)
+                for r in self.conn.execute(
+                    "SELECT id, wp_id, content_hash, token_count FROM articles"
+                )
+            }
+            result = ImportResult(pruned=prune)
+            # wp_id -> (row id, outcome counted) of the articles written so far
+            written: dict[int, tuple[int, str]] = {}
+            pending = 0
+
+            for article in articles:
+                content_hash = article.content_hash or article.compute_content_hash()
+                row = existing.get(article.wp_id)
+                earlier = written.get(article.wp_id)
+                if earlier is not None:
+                    result.duplicates += 1
+                    setattr(result, earlier[1], getattr(result, earlier[1]) - 1)
+
+                wrote = True
+                if row is None and earlier is None:
+                    row_id = self._insert(article, store_html)
+                    outcome = "added"
+                elif row is not None and row[1] == content_hash and (
+                    earlier is None or earlier[1] == "unchanged"
+                ):
+                    # Identical to the stored row, which this run has not changed
+                    row_id, outcome = row[0], "unchanged"
+                    wrote = row[2] and article.token_count is not None
+                    if wrote:
+                        self.conn.execute(
+                            "UPDATE articles SET token_count = ? WHERE id = ?",
+                            (article.token_count, row_id),
+                        )
+                else:
+                    # An edited post, or one replacing an article of this run
+                    row_id = row[0] if row is not None else earlier[0]  # type: ignore[index]
+                    self.conn.execute(_UPDATE_ARTICLE, (*self._article_params(article), row_id))
+                    self._write_html(row_id, article.raw_html if store_html else "")
+                    if row is None:
+                        outcome = "added"
+                    else:
+                        outcome = "unchanged" if row[1] == content_hash else "changed"
+                written[article.wp_id] = (row_id, outcome)
+                setattr(result, outcome, getattr(result, outcome) + 1)
+                if not wrote:
+                    continue
+
+                pending += 1
+                if batch_size and pending >= batch_size:
+                    self.conn.commit()
+                    pending = 0
+
+            removed = [row[0] for wp_id, row in existing.items() if wp_id not in written]
+            result.removed = len(removed)
+            if prune and removed:
+                self.conn.executemany(
+                    "DELETE FROM examples WHERE article_id = ?", [(i,) for i in removed]
+                )
+                self.conn.executemany(
+                    "DELETE FROM articles WHERE id = ?", [(i,) for i in removed]
+                )
+
+        return result
+
+    def bulk_load(
+        self,
+        articles: Iterable[Article],
+        *,
+        batch_size: int = 500,
+        store_html: bool = True,
+    ) -> ImportResult:
+        """Fast first load of an empty corpus.
+
+        Articles are written with ``executemany`` and ``INSERT OR IGNORE``,
+        ``batch_size`` at a time, in a single transaction run with
+        ``synchronous=OFF`` and a large page cache. The secondary indexes,
+        the category/tag tables, the full-text index and the totals are not
+        updated per row but built once at the end. The compressed HTML is
+        staged in a temporary table and copied into ``article_html`` by one
+        statement.
+
+        A repeated wp_id replaces the article loaded for it earlier and is
+        counted in ``duplicates``, as in :meth:`upsert_articles_batch`. If
+        anything fails, the corpus is left empty. Must not be called inside
+        :meth:`writing`.
+        """
+        result = ImportResult()
+        # The pragmas cannot change inside a transaction, so they are set
+        # around it, under the write lock
+        with self._write_lock:
+            conn = self._writer
+            pragmas = {
+                p: conn.execute(f"PRAGMA {p}").fetchone()[0] for p in ("synchronous", "cache_size")
+            }
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(f"PRAGMA cache_size=-{_BULK_CACHE_KIB}")
+            try:
+                with self.writing():
+                    self._bulk_load(articles, batch_size, store_html, result)
+            finally:
+                for p, value in pragmas.items():
+                    conn.execute(f"PRAGMA {p}={value}")
+        return result
+
+    def _bulk_load(
+        self,
+        articles: Iterable[Article],
+        batch_size: int,
+        store_html: bool,
+        result: ImportResult,
+    ) -> None:
+        conn = self.conn
+        if self.count_articles():
+            raise RuntimeError("bulk_load needs an empty corpus; use upsert_articles_batch")
+
+        # Explicit BEGIN so the DROPs below are part of the transaction
+        conn.execute("BEGIN")
+        deferred = conn.execute(
+            f"""SELECT type, name, sql FROM sqlite_master
+                WHERE name IN ({', '.join('?' for _ in _BULK_DEFERRED)})""",
+            _BULK_DEFERRED,
+        ).fetchall()
+        for row in deferred:
+            conn.execute(f"DROP {row['type'].upper()} {row['name']}")
+
+        # HTML is staged by wp_id, so a repeated wp_id overwrites the copy
+        # staged before it, and moved into article_html in one statement
+        conn.execute(
+            "CREATE TEMP TABLE bulk_html (wp_id INTEGER PRIMARY KEY, html BLOB) WITHOUT ROWID"
+        )
+        seen: set[int] = set()
+        batch: list[Article] = []
+        for article in articles:
+            if article.wp_id in seen:
+                result.duplicates += 1
+            else:
+                seen.add(article.wp_id)
+                result.added += 1
+            if not article.content_hash:
+                article.compute_content_hash()
+            batch.append(article)
+            if len(batch) >= batch_size:
+                self._bulk_insert(batch, store_html)
+                batch = []
+        if batch:
+            self._bulk_insert(batch, store_html)
+        conn.execute(
+            """INSERT INTO article_html (article_id, html)
+               SELECT a.id, s.html FROM temp.bulk_html s JOIN articles a USING (wp_id)
+               WHERE s.html IS NOT NULL"""
+        )
+        conn.execute("DROP TABLE temp.bulk_html")
+
+        for row in deferred:
+            conn.execute(row["sql"])
+        conn.execute(
+            """INSERT INTO article_categories (article_id, position, category)
+               SELECT a.id, c.key, c.value FROM articles a, json_each(a.categories) c"""
+        )
+        conn.execute(
+            """INSERT INTO article_tags (article_id, position, tag)
+               SELECT a.id, t.key, t.value FROM articles a, json_each(a.tags) t"""
+        )
+        conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+        self._rebuild_totals()
+
+    def _bulk_insert(self, batch: list[Article], store_html: bool) -> None:
+        """Write ``batch`` and stage its HTML; the last copy of a wp_id wins."""
+        self.conn.executemany(_UPSERT_ARTICLE, [self._article_params(a) for a in batch])
+        if store_html:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO temp.bulk_html (wp_id, html) VALUES (?, ?)",
+                [
+                    (a.wp_id, _compress_html(a.raw_html) if a.raw_html else None)
+                    for a in batch
+                ],
+            )
+
+    def _insert(self, article: Article, store_html: bool) -> int:
+        cur = self.conn.execute(_INSERT_ARTICLE, self._article_params(article))
+        article_id: int = cur.lastrowid  # type: ignore[assignment]
+        if store_html:
+            self._write_html(article_id, article.raw_html)
+        return article_id
+
+    def _write_html(self, article_id: int, html: str) -> None:
+        if html:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO article_html (article_id, html) VALUES (?, ?)",
+                (article_id, _compress_html(html)),
+            )
+        else:
+            self.conn.execute("DELETE FROM article_html WHERE article_id = ?", (article_id,))
+
+    def get_article(self, article_id: int, *, with_html: bool = False) -> Article | None:
+        """Load one article; its ``raw_html`` is filled only with ``with_html``."""
         row = self.conn.execute(
-            "SELECT * FROM articles WHERE id = ?", (article_id,)
+            f"SELECT {_ARTICLE_COLUMNS} FROM articles WHERE id = ?", (article_id,)
         ).fetchone()
         if row is None:
             return None
-        return self._row_to_article(row)
+        article = self._row_to_article(row)
+        if with_html:
+            article.raw_html = self.get_raw_html(article_id) or ""
+        return article
+
+    def get_raw_html(self, article_id: int) -> str | None:
+        """Original HTML of an article, or None if it was not stored."""
+        row = self.conn.execute(
+            "SELECT html FROM article_html WHERE article_id = ?", (article_id,)
+        ).fetchone()
+        return _decompress_html(row["html"]) if row else None
 
     def get_all_articles(self) -> list[Article]:
-        rows = self.conn.execute(
-            "SELECT * FROM articles ORDER BY published_at"
-        ).fetchall()
-        return [self._row_to_article(r) for r in rows]
+        return list(self.iter_articles())
+
+    def iter_articles(
+        self,
+        *,
+        canonical_only: bool = False,
+        category: str | None = None,
+        tag: str | None = None,
+        order_by: ArticleOrder = "published_at",
+        batch_size: int = _FETCH_BATCH,
+    ) -> Iterator[Article]:
+        """Stream articles, fetching ``batch_size`` rows at a time.
+
+        Only one batch is held in memory, so the whole corpus can be walked
+        at constant memory. The connection must not be written to until the
+        iterator is exhausted or closed.
+
+        Args:
+            canonical_only: Leave out articles marked as near-duplicates.
+            category: Only articles in this category.
+            tag: Only articles with this tag.
+            order_by: ``"published_at"`` (undated first) or ``"id"``.
+        """
+        rows = self._iter_rows(
+            _ARTICLE_COLUMNS, canonical_only=canonical_only, category=category, tag=tag,
+            order_by=order_by, batch_size=batch_size,
+        )
+        for r in rows:
+            yield self._row_to_article(r)
+
+    def iter_article_texts(
+        self,
+        *,
+        canonical_only: bool = False,
+        category: str | None = None,
+        tag: str | None = None,
+        order_by: ArticleOrder = "published_at",
+        batch_size: int = _FETCH_BATCH,
+    ) -> Iterator[tuple[int, str, str]]:
+        """Stream (id, title, content) of articles, like :meth:`iter_articles`."""
+        rows = self._iter_rows(
+            "id, title, content", canonical_only=canonical_only, category=category, tag=tag,
+            order_by=order_by, batch_size=batch_size,
+        )
+        for r in rows:
+            yield r["id"], r["title"], r["content"]
+
+    def _iter_rows(
+        self,
+        columns: str,
+        *,
+        canonical_only: bool,
+        category: str | None,
+        tag: str | None,
+        order_by: ArticleOrder,
+        batch_size: int,
+    ) -> Iterator[sqlite3.Row]:
+        where, params = self._article_filter(canonical_only, category, tag)
+        sql = f"SELECT {columns} FROM articles"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY " + _ARTICLE_ORDER[order_by]
+
+        cur = self.conn.execute(sql, params)
+        try:
+            while rows := cur.fetchmany(batch_size):
+                yield from rows
+        finally:
+            cur.close()
+
+    @staticmethod
+    def _article_filter(
+        canonical_only: bool, category: str | None, tag: str | None
+    ) -> tuple[list[str], list[Any]]:
+        """WHERE clauses and parameters of the common article filters."""
+        where = ["duplicate_of IS NULL"] if canonical_only else []
+        params: list[Any] = []
+        if category is not None:
+            where.append("id IN (SELECT article_id FROM article_categories WHERE category = ?)")
+            params.append(category)
+        if tag is not None:
+            where.append("id IN (SELECT article_id FROM article_tags WHERE tag = ?)")
+            params.append(tag)
+        return where, params
 
     def get_article_ids(self) -> list[int]:
         rows = self.conn.execute("SELECT id FROM articles ORDER BY id").fetchall()
@@ -161,60 +920,144 @@ class CorpusStore:
             return []
         placeholders = ",".join("?" for _ in ids)
         rows = self.conn.execute(
-            f"SELECT * FROM articles WHERE id IN ({placeholders}) ORDER BY id",
+            f"SELECT {_ARTICLE_COLUMNS} FROM articles WHERE id IN ({placeholders}) ORDER BY id",
             ids,
         ).fetchall()
         return [self._row_to_article(r) for r in rows]
 
+    def get_article_summaries(
+        self,
+        ids: list[int] | None = None,
+        *,
+        canonical_only: bool = False,
+        category: str | None = None,
+        tag: str | None = None,
+    ) -> list[ArticleSummary]:
+        """Article metadata without the text, ordered by publication date.
+
+        Args:
+            ids: Restrict to these articles (default: all).
+            canonical_only: Leave out articles marked as near-duplicates.
+            category: Only articles in this category.
+            tag: Only articles with this tag.
+        """
+        where, params = self._article_filter(canonical_only, category, tag)
+        if ids is None:
+            batches: list[list[int]] = [[]]
+        else:
+            batches = [ids[i:i + 500] for i in range(0, len(ids), 500)]
+            where.append("id IN ({})")
+        sql = f"SELECT {_SUMMARY_COLUMNS} FROM articles"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY " + _ARTICLE_ORDER["published_at"]
+
+        rows: list[sqlite3.Row] = []
+        for batch in batches:
+            placeholders = ",".join("?" for _ in batch)
+            rows += self.conn.execute(sql.format(placeholders), [*params, *batch]).fetchall()
+        if len(batches) > 1:
+            # Same order as the query: undated first, then by date and id
+            rows.sort(key=lambda r: (r["published_at"] or "", r["id"]))
+        return [self._row_to_summary(r) for r in rows]
+
+    def get_sampling_frame(self) -> list[tuple[int, str | None, datetime | None]]:
+        """(id, primary category, published_at) of canonical articles.
+
+        In the order of :meth:`get_article_summaries`. The primary category
+        is an article's first one, None if it has none. Only the sampling
+        index and the category table are read, never the article rows.
+        """
+        rows = self.conn.execute(
+            """SELECT a.id, c.category, a.published_at
+               FROM articles a
+               LEFT JOIN article_categories c ON c.article_id = a.id AND c.position = 0
+               WHERE a.duplicate_of IS NULL
+               ORDER BY a.published_at, a.id"""
+        ).fetchall()
+        return [(id_, category, _parse_date(published_at)) for id_, category, published_at in rows]
+
     def count_articles(self) -> int:
         row = self.conn.execute("SELECT COUNT(*) as cnt FROM articles").fetchone()
         return row["cnt"]
 
     def clear_articles(self) -> None:
-        with self.conn:
-            self.conn.execute("DELETE FROM articles")
+        with self.writing():
             self.conn.execute("DELETE FROM examples")
+            self.conn.execute("DELETE FROM articles")
+
+    @staticmethod
+    def _article_params(article: Article) -> tuple[Any, ...]:
+        return (
+            article.wp_id,
+            article.title,
+            article.slug,
+            article.content,
+            article.excerpt,
+            article.published_at.isoformat() if article.published_at else None,
+            json.dumps(article.categories, ensure_ascii=False),
+            json.dumps(article.tags, ensure_ascii=False),
+            article.word_count,
+            article.status,
+            article.content_hash,
+            article.token_count,
+        )
 
     @staticmethod
     def _row_to_article(row: sqlite3.Row) -> Article:
-        pub = row["published_at"]
-        published_at = None
-        if pub:
-            try:
-                published_at = datetime.fromisoformat(pub)
-            except ValueError:
-                pass
+        """Article from a row of _ARTICLE_COLUMNS; the HTML is not loaded."""
+        (
+            id_, wp_id, title, slug, content, excerpt, published_at,
+            categories, tags, word_count, status, content_hash, duplicate_of, token_count,
+        ) = row
         return Article(
-            id=row["id"],
-            wp_id=row["wp_id"],
-            title=row["title"],
-            slug=row["slug"],
-            content=row["content"],
-            raw_html=row["raw_html"],
-            excerpt=row["excerpt"],
-            published_at=published_at,
-            categories=json.loads(row["categories"]),
-            tags=json.loads(row["tags"]),
-            word_count=row["word_count"],
-            status=row["status"],
+            id=id_,
+            wp_id=wp_id,
+            title=title,
+            slug=slug,
+            content=content,
+            raw_html="",
+            excerpt=excerpt,
+            published_at=_parse_date(published_at),
+            categories=_json_list(categories),
+            tags=_json_list(tags),
+            word_count=word_count,
+            status=status,
+            content_hash=content_hash,
+            duplicate_of=duplicate_of,
+            token_count=token_count,
+        )
+
+    @staticmethod
+    def _row_to_summary(row: sqlite3.Row) -> ArticleSummary:
+        """ArticleSummary from a row starting with _SUMMARY_COLUMNS."""
+        id_, wp_id, title, published_at, categories, word_count, duplicate_of = row[:7]
+        return ArticleSummary(
+            id=id_,
+            wp_id=wp_id,
+            title=title,
+            published_at=_parse_date(published_at),
+            categories=_json_list(categories),
+            word_count=word_count,
+            duplicate_of=duplicate_of,
         )
 
     # ── Chunk Analyses ────────────────────────────────────────
 
     def save_chunk_analysis(self, analysis: ChunkAnalysis) -> int:
-        cur = self.conn.execute(
-            """INSERT INTO chunk_analyses
-               (chunk_id, article_ids, analysis_text, token_count, created_at)
-               VALUES (?, ?, ?, ?, ?)""",
-            (
-                analysis.chunk_id,
-                json.dumps(analysis.article_ids),
-                analysis.analysis_text,
-                analysis.token_count,
-                analysis.created_at.isoformat(),
-            ),
-        )
-        self.conn.commit()
+        with self.writing():
+            cur = self.conn.execute(
+                """INSERT INTO chunk_analyses
+                   (chunk_id, article_ids, analysis_text, token_count, created_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (
+                    analysis.chunk_id,
+                    json.dumps(analysis.article_ids),
+                    analysis.analysis_text,
+                    analysis.token_count,
+                    analysis.created_at.isoformat(),
+                ),
+            )
         return cur.lastrowid  # type: ignore[return-value]
 
     def get_chunk_analyses(self) -> list[ChunkAnalysis]:
@@ -233,26 +1076,26 @@ class CorpusStore:
         ]
 
     def clear_analyses(self) -> None:
-        with self.conn:
+        with self.writing():
             self.conn.execute("DELETE FROM chunk_analyses")
 
     # ── Style Guide ───────────────────────────────────────────
 
     def save_style_guide(self, guide: StyleGuide) -> int:
-        cur = self.conn.execute(
-            """INSERT INTO style_guide
-               (version, markdown, structured, sample_size, n_chunks, created_at)
-               VALUES (?, ?, ?, ?, ?, ?)""",
-            (
-                guide.version,
-                guide.markdown,
-                json.dumps(guide.structured, ensure_ascii=False),
-                guide.sample_size,
-                guide.n_chunks,
-                guide.created_at.isoformat(),
-            ),
-        )
-        self.conn.commit()
+        with self.writing():
+            cur = self.conn.execute(
+                """INSERT INTO style_guide
+                   (version, markdown, structured, sample_size, n_chunks, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (
+                    guide.version,
+                    guide.markdown,
+                    json.dumps(guide.structured, ensure_ascii=False),
+                    guide.sample_size,
+                    guide.n_chunks,
+                    guide.created_at.isoformat(),
+                ),
+            )
         return cur.lastrowid  # type: ignore[return-value]
 
     def get_latest_style_guide(self) -> StyleGuide | None:
@@ -273,7 +1116,7 @@ class CorpusStore:
     # ── Examples ──────────────────────────────────────────────
 
     def save_examples(self, examples: list[FewShotExample]) -> None:
-        with self.conn:
+        with self.writing():
             self.conn.execute("DELETE FROM examples")
             for ex in examples:
                 self.conn.execute(
@@ -301,13 +1144,269 @@ class CorpusStore:
         ).fetchall()
         return [r["article_id"] for r in rows]
 
+    # ── Near-duplicates ───────────────────────────────────────
+
+    def get_unsigned_article_ids(self) -> list[int]:
+        """Articles without a MinHash signature for their current content."""
+        rows = self.conn.execute(
+            """SELECT a.id FROM articles a
+               LEFT JOIN minhashes m ON m.article_id = a.id
+               WHERE m.article_id IS NULL OR m.content_hash != a.content_hash
+               ORDER BY a.id"""
+        ).fetchall()
+        return [r["id"] for r in rows]
+
+    def get_canonical_article_ids(self) -> list[int]:
+        """Ids of articles not marked as a near-duplicate of another."""
+        rows = self.conn.execute(
+            "SELECT id FROM articles WHERE duplicate_of IS NULL ORDER BY id"
+        ).fetchall()
+        return [r["id"] for r in rows]
+
+    def get_article_contents(self, ids: list[int]) -> list[tuple[int, str, str]]:
+        """(id, content_hash, content) of the given articles."""
+        if not ids:
+            return []
+        placeholders = ",".join("?" for _ in ids)
+        rows = self.conn.execute(
+            f"SELECT id, content_hash, content FROM articles WHERE id IN ({placeholders})",
+            ids,
+        ).fetchall()
+        return [(r["id"], r["content_hash"], r["content"]) for r in rows]
+
+    def save_minhashes(
+        self, signatures: list[tuple[int, str, bytes, list[int]]]
+    ) -> None:
+        """Store (article_id, content_hash, signature, band buckets) and index them."""
+        with self.writing():
+            for article_id, content_hash, signature, buckets in signatures:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO minhashes VALUES (?, ?, ?)",
+                    (article_id, content_hash, signature),
+                )
+                self.conn.execute("DELETE FROM lsh_buckets WHERE article_id = ?", (article_id,))
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO lsh_buckets VALUES (?, ?, ?)",
+                    [(band, bucket, article_id) for band, bucket in enumerate(buckets)],
+                )
+
+    def get_minhashes(self, ids: list[int]) -> dict[int, bytes]:
+        result: dict[int, bytes] = {}
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" for _ in batch)
+            rows = self.conn.execute(
+                f"SELECT article_id, signature FROM minhashes WHERE article_id IN ({placeholders})",
+                batch,
+            )
+            result.update((r["article_id"], r["signature"]) for r in rows)
+        return result
+
+    def get_lsh_candidates(self) -> list[list[int]]:
+        """Article ids sharing an LSH bucket, one list per bucket with 2+ members."""
+        rows = self.conn.execute(
+            """SELECT group_concat(article_id) AS ids FROM lsh_buckets
+               GROUP BY band, bucket HAVING COUNT(*) > 1"""
+        )
+        return [sorted(int(i) for i in r["ids"].split(",")) for r in rows]
+
+    def get_publication_dates(self, ids: list[int]) -> dict[int, str | None]:
+        result: dict[int, str | None] = {}
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" for _ in batch)
+            rows = self.conn.execute(
+                f"SELECT id, published_at FROM articles WHERE id IN ({placeholders})", batch
+            )
+            result.update((r["id"], r["published_at"]) for r in rows)
+        return result
+
+    def set_duplicates(self, duplicate_of: dict[int, int]) -> None:
+        """Replace the duplicate marks: article id -> canonical article id.
+
+        Only articles whose mark changes are written, so an import that
+        leaves the groups as they were does not move the generation on.
+        """
+        with self.writing():
+            current = dict(self.conn.execute(
+                "SELECT id, duplicate_of FROM articles WHERE duplicate_of IS NOT NULL"
+            ).fetchall())
+            changes = [
+                (None, article_id) for article_id in current.keys() - duplicate_of.keys()
+            ] + [
+                (canonical, article_id)
+                for article_id, canonical in duplicate_of.items()
+                if current.get(article_id) != canonical
+            ]
+            self.conn.executemany("UPDATE articles SET duplicate_of = ? WHERE id = ?", changes)
+
+    # ── Boilerplate ───────────────────────────────────────────
+
+    def save_boilerplate(self, lines: list[BoilerplateLine]) -> None:
+        with self.writing():
+            self.conn.execute("DELETE FROM boilerplate")
+            self.conn.executemany(
+                "INSERT INTO boilerplate (line, text, articles) VALUES (?, ?, ?)",
+                [(b.line, b.text, b.articles) for b in lines],
+            )
+
+    def get_boilerplate(self) -> list[BoilerplateLine]:
+        rows = self.conn.execute(
+            "SELECT * FROM boilerplate ORDER BY articles DESC, line"
+        ).fetchall()
+        return [
+            BoilerplateLine(line=r["line"], text=r["text"], articles=r["articles"])
+            for r in rows
+        ]
+
+    # ── Full-text search ──────────────────────────────────────
+
+    def search_articles(
+        self,
+        query: str,
+        *,
+        limit: int = 10,
+        canonical_only: bool = False,
+    ) -> list[SearchHit]:
+        """Articles matching an FTS5 query, most relevant first.
+
+        Args:
+            query: FTS5 MATCH expression, see :func:`fts_query`.
+            limit: Maximum number of hits.
+            canonical_only: Leave out articles marked as near-duplicates.
+        """
+        if not query:
+            return []
+        where = "articles_fts MATCH ?"
+        if canonical_only:
+            where += " AND a.duplicate_of IS NULL"
+        cols = ", ".join(f"a.{c.strip()}" for c in _SUMMARY_COLUMNS.split(","))
+        rows = self.conn.execute(
+            f"""SELECT {cols},
+                       bm25(articles_fts, ?, ?) AS bm25,
+                       snippet(articles_fts, 1, ?, ?, '…', 16) AS snippet
+                FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid
+                WHERE {where}
+                ORDER BY bm25 LIMIT ?""",
+            (*_FTS_WEIGHTS, HIGHLIGHT_START, HIGHLIGHT_END, query, limit),
+        ).fetchall()
+        # bm25() is lower for better matches; report it the other way round
+        return [
+            SearchHit(article=self._row_to_summary(r), score=-r["bm25"], snippet=r["snippet"])
+            for r in rows
+        ]
+
+    # ── Cleaned-content cache ─────────────────────────────────
+
+    def get_cleaned(
+        self, raw_hashes: list[str], version: int, *, backend: str
+    ) -> dict[str, tuple[str, int, int | None]]:
+        """Look up cached conversions: raw HTML hash -> (content, word_count, token_count)."""
+        if not raw_hashes:
+            return {}
+        placeholders = ",".join("?" for _ in raw_hashes)
+        rows = self.conn.execute(
+            f"""SELECT raw_hash, content, word_count, token_count FROM cleaned_cache
+                WHERE backend = ? AND cleaner_version = ? AND raw_hash IN ({placeholders})""",
+            (backend, version, *raw_hashes),
+        )
+        return {
+            r["raw_hash"]: (r["content"], r["word_count"], r["token_count"]) for r in rows
+        }
+
+    def put_cleaned(
+        self,
+        entries: Iterable[tuple[str, str, int, int | None]],
+        version: int,
+        *,
+        backend: str,
+    ) -> None:
+        """Cache (raw_hash, content, word_count, token_count) conversions.
+
+        Existing keys are kept and marked as used now, for
+        :meth:`prune_cleaned`; a missing token count is filled in. Marks are
+        only renewed once a day, so re-imports do not rewrite the cache.
+        """
+        now = int(time.time())
+        with self.writing():
+            self.conn.executemany(
+                """INSERT INTO cleaned_cache
+                   (raw_hash, backend, cleaner_version, content, word_count, token_count,
+                    used_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (raw_hash, backend, cleaner_version) DO UPDATE SET
+                       token_count = coalesce(cleaned_cache.token_count, excluded.token_count),
+                       used_at = excluded.used_at
+                   WHERE cleaned_cache.used_at IS NULL
+                   OR cleaned_cache.used_at < excluded.used_at - 86400
+                   OR (cleaned_cache.token_count IS NULL AND excluded.token_count IS NOT NULL)""",
+                ((h, backend, version, content, wc, tc, now) for h, content, wc, tc in entries),
+            )
+
+    def prune_cleaned(self, version: int, *, unused_for: float | None = None) -> int:
+        """Drop conversions made by other cleaner versions; returns rows deleted.
+
+        Conversions by every backend at ``version`` are kept, for any export.
+        With ``unused_for`` (seconds), so are only those that an import has
+        seen within that time. Conversions cached before imports marked them
+        count as seen now.
+        """
+        with self.writing():
+            deleted = self.conn.execute(
+                "DELETE FROM cleaned_cache WHERE cleaner_version != ?", (version,)
+            ).rowcount
+            if unused_for is not None:
+                now = int(time.time())
+                self.conn.execute(
+                    "UPDATE cleaned_cache SET used_at = ? WHERE used_at IS NULL", (now,)
+                )
+                deleted += self.conn.execute(
+                    "DELETE FROM cleaned_cache WHERE used_at < ?", (now - unused_for,)
+                ).rowcount
+        return deleted
+
     # ── Utilities ─────────────────────────────────────────────
 
+    def get_corpus_stats(self) -> CorpusStats:
+        """Article totals, word count range and date range of the corpus.
+
+        Totals come from the trigger-maintained tables and the ranges from
+        the word_count and published_at indexes, so this does not scan the
+        articles. Example and style guide fields are left at their defaults.
+        """
+        row = self.conn.execute(
+            """SELECT t.articles, t.words,
+                      (SELECT MIN(word_count) FROM articles) AS min_words,
+                      (SELECT MAX(word_count) FROM articles) AS max_words,
+                      (SELECT MIN(published_at) FROM articles) AS first,
+                      (SELECT MAX(published_at) FROM articles) AS last
+               FROM corpus_totals t"""
+        ).fetchone()
+        if row is None or not row["articles"]:
+            return CorpusStats()
+
+        first, last = _parse_date(row["first"]), _parse_date(row["last"])
+        return CorpusStats(
+            total_articles=row["articles"],
+            total_words=row["words"],
+            avg_words=row["words"] / row["articles"],
+            min_words=row["min_words"],
+            max_words=row["max_words"],
+            categories=self.get_categories_distribution(),
+            date_range=(
+                (first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d"))
+                if first and last else None
+            ),
+        )
+
+    def get_generation(self) -> int:
+        """Counter that changes whenever any article is written or deleted."""
+        row = self.conn.execute("SELECT generation FROM corpus_totals").fetchone()
+        return row["generation"] if row else 0
+
     def get_categories_distribution(self) -> dict[str, int]:
         """Get article count per category."""
-        articles = self.get_all_articles()
-        dist: dict[str, int] = {}
-        for a in articles:
-            for cat in a.categories:
-                dist[cat] = dist.get(cat, 0) + 1
-        return dict(sorted(dist.items(), key=lambda x: -x[1]))
+        rows = self.conn.execute(
+            "SELECT category, articles FROM category_counts ORDER BY articles DESC, category"
+        )
+        return {r["category"]: r["articles"] for r in rows}
@@ -0,0 +1,125 @@
+"""Markdown output shared by the bs4 and lxml converters of ``cleaner.py``.
+
+Both backends walk their own tree but emit through the same writer and
+inline buffer, with the same tag tables, so their output matches.
+"""
+
+from __future__ import annotations
+
+import re
+
+# Elements dropped together with their content
+STRIP_TAGS = ("script", "style", "iframe", "noscript", "svg")
+
+HEADINGS = frozenset(("h1", "h2", "h3", "h4", "h5", "h6"))
+ROW_TAGS = frozenset(("tr",))
+CELL_TAGS = frozenset(("td", "th"))
+
+# Stack marker: leave the innermost blockquote
+END_QUOTE = object()
+
+# Runs of spaces/tabs (newlines are kept)
+SPACES_RE = re.compile(r"[ \t]+")
+
+
+class LineWriter:
+    """Single output buffer of lines.
+
+    Blockquote prefixes are applied when a line is emitted, based on the
+    current quote depth, instead of re-prefixing each nested level.
+    """
+
+    __slots__ = ("lines", "quote_depth")
+
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+        self.quote_depth = 0
+
+    def emit(self, line: str) -> None:
+        depth = self.quote_depth
+        if depth:
+            line = "> " * depth + line if line else "> " * (depth - 1) + ">"
+        self.lines.append(line)
+
+    def text(self, text: str) -> None:
+        """A block-level text node: collapse whitespace onto one line."""
+        text = SPACES_RE.sub(" ", text).replace("\n", " ").strip()
+        if text:
+            self.emit(text)
+
+    def block(self, prefix: str, inner: str) -> None:
+        """A paragraph-like block, surrounded by blank lines."""
+        if inner:
+            self.emit("")
+            self.emit(prefix + inner)
+            self.emit("")
+
+    def code_block(self, code: str) -> None:
+        for line in ("", "```", code.strip(), "```", ""):
+            self.emit(line)
+
+    def start_quote(self) -> None:
+        self.emit("")
+        self.quote_depth += 1
+
+    def end_quote(self) -> None:
+        self.quote_depth -= 1
+        self.emit("")
+
+
+class InlineBuffer:
+    """Fragments of one inline run, built in a single pass.
+
+    Every nested element is a frame over the tail of ``parts``: ``open``
+    marks where it starts and ``close`` strips its whitespace in place and
+    wraps it in emphasis markers. A non-empty frame is left starting with its
+    first non-blank fragment, so enclosing frames never rescan it; the whole
+    run is joined and whitespace-collapsed once, in ``getvalue``.
+    """
+
+    __slots__ = ("parts",)
+
+    def __init__(self) -> None:
+        self.parts: list[str] = []
+
+    def append(self, text: str) -> None:
+        self.parts.append(text)
+
+    def open(self, marker: str) -> int:
+        if marker:
+            self.parts.append("")  # slot for the opening marker
+        return len(self.parts)
+
+    def close(self, start: int, marker: str) -> None:
+        if self._strip(start):
+            if marker:
+                self.parts[start - 1] = marker
+                self.parts.append(marker)
+        elif marker:
+            self.parts.pop()
+
+    def getvalue(self) -> str:
+        self._strip(0)
+        return SPACES_RE.sub(" ", "".join(self.parts))
+
+    def _strip(self, start: int) -> bool:
+        """Strip ``parts[start:]`` as one string; False if nothing is left."""
+        parts = self.parts
+        while len(parts) > start:
+            tail = parts[-1].rstrip()
+            if tail:
+                parts[-1] = tail
+                break
+            parts.pop()
+        else:
+            return False
+
+        i = start
+        head = parts[i].lstrip()
+        while not head:
+            parts[i] = ""
+            i += 1
+            head = parts[i].lstrip()
+        parts[i] = ""
+        parts[start] = head
+        return True
@@ -2,10 +2,28 @@
 
 from __future__ import annotations
 
+import hashlib
 import re
+from typing import Any, Literal
 
 from bs4 import BeautifulSoup, NavigableString, Tag
 
+from rewriter.importer._markdown import (
+    CELL_TAGS,
+    END_QUOTE,
+    HEADINGS,
+    ROW_TAGS,
+    STRIP_TAGS,
+    InlineBuffer,
+    LineWriter,
+)
+from rewriter.importer.cleaner_lxml import convert_html
+
+CleanerBackend = Literal["bs4", "lxml"]
+
+# Bump whenever a change alters clean_html output: cached conversions are
+# keyed by this version, so a bump makes the next import convert afresh.
+CLEANER_VERSION = 2
 
 # WordPress shortcode pattern: [shortcode ...] ... [/shortcode] or [shortcode ... /]
 _SHORTCODE_RE = re.compile(r"\[/?[a-zA-Z_][\w-]*(?:\s[^\]]*)?/?\]")
@@ -17,11 +35,16 @@ _MULTI_NEWLINE_RE = re.compile(r"\n{3,}")
 _TRAILING_SPACE_RE = re.compile(r"[ \t]+$", re.MULTILINE)
 
 
-def clean_html(html: str) -> str:
+def clean_html(html: str, *, backend: CleanerBackend = "bs4") -> str:
     """Convert HTML content to structured plaintext (markdown-like).
 
     Preserves semantic structure: headings, lists, emphasis, paragraphs.
     Strips scripts, styles, shortcodes, and extraneous markup.
+
+    Args:
+        html: Raw post HTML.
+        backend: ``"bs4"`` walks a BeautifulSoup tree; ``"lxml"`` walks the
+            lxml.html tree directly and produces the same output faster.
     """
     if not html or not html.strip():
         return ""
@@ -29,14 +52,12 @@ def clean_html(html: str) -> str:
     # Strip shortcodes before parsing
     html = _SHORTCODE_RE.sub("", html)
 
-    soup = BeautifulSoup(html, "lxml")
-
-    # Remove non-content elements
-    for tag in soup.find_all(["script", "style", "iframe", "noscript", "svg"]):
-        tag.decompose()
-
     # Convert to markdown-like text
-    lines = _convert_element(soup)
+    lines: list[str] | None = None
+    if backend == "lxml":
+        lines = convert_html(html)
+    if lines is None:
+        lines = _convert_soup(html)
     text = "\n".join(lines)
 
     # Normalize whitespace
@@ -47,155 +68,161 @@ def clean_html(html: str) -> str:
     return text
 
 
-def _convert_element(element: Tag | NavigableString) -> list[str]:
-    """Recursively convert an element to lines of text."""
-    if isinstance(element, NavigableString):
-        text = str(element)
-        # Collapse internal whitespace but preserve meaningful content
-        text = re.sub(r"[ \t]+", " ", text)
-        text = text.replace("\n", " ")
-        if text.strip():
-            return [text.strip()]
-        return []
-
-    if not isinstance(element, Tag):
-        return []
-
-    tag_name = element.name
-
-    # Headings → markdown-style
-    if tag_name in ("h1", "h2", "h3", "h4", "h5", "h6"):
-        level = int(tag_name[1])
-        inner = _inline_text(element)
-        if inner:
-            return ["", "#" * level + " " + inner, ""]
-        return []
-
-    # Paragraphs
-    if tag_name == "p":
-        inner = _inline_text(element)
-        if inner:
-            return ["", inner, ""]
-        return []
-
-    # Block quotes
-    if tag_name == "blockquote":
-        children_lines = _collect_children(element)
-        return [""] + ["> " + line if line else ">" for line in children_lines] + [""]
-
-    # Unordered lists
-    if tag_name in ("ul", "ol"):
-        items: list[str] = []
-        items.append("")
-        for i, li in enumerate(element.find_all("li", recursive=False)):
-            inner = _inline_text(li)
+def html_hash(html: str) -> str:
+    """Key of a raw HTML document in the cleaned-content cache."""
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def _convert_soup(html: str) -> list[str]:
+    """Convert HTML to lines with a single explicit-stack walk over the soup."""
+    soup = BeautifulSoup(html, "lxml")
+
+    # Remove non-content elements
+    for tag in soup.find_all(list(STRIP_TAGS)):
+        tag.decompose()
+
+    out = LineWriter()
+    stack: list[Any] = [soup]
+    while stack:
+        node = stack.pop()
+        if node is END_QUOTE:
+            out.end_quote()
+            continue
+
+        if isinstance(node, NavigableString):
+            out.text(str(node))
+            continue
+
+        if not isinstance(node, Tag):
+            continue
+
+        tag_name = node.name
+
+        # Headings → markdown-style
+        if tag_name in HEADINGS:
+            out.block("#" * int(tag_name[1]) + " ", _inline_text(node))
+
+        # Paragraphs
+        elif tag_name == "p":
+            out.block("", _inline_text(node))
+
+        # Block quotes: children are prefixed as they are emitted
+        elif tag_name == "blockquote":
+            out.start_quote()
+            stack.append(END_QUOTE)
+            stack.extend(reversed(node.contents))
+
+        # Lists: only direct <li> children, numbered by position
+        elif tag_name in ("ul", "ol"):
+            out.emit("")
+            for i, li in enumerate(node.find_all("li", recursive=False)):
+                inner = _inline_text(li)
+                if inner:
+                    out.emit(f"{i + 1}. {inner}" if tag_name == "ol" else f"- {inner}")
+            out.emit("")
+
+        # List items (if not nested inside ul/ol)
+        elif tag_name == "li":
+            inner = _inline_text(node)
+            if inner:
+                out.emit(f"- {inner}")
+
+        # Line breaks
+        elif tag_name == "br":
+            out.emit("")
+
+        # Horizontal rules
+        elif tag_name == "hr":
+            out.block("", "---")
+
+        # Pre/code blocks
+        elif tag_name == "pre":
+            out.code_block(node.get_text())
+
+        # Images — preserve alt text
+        elif tag_name == "img":
+            alt = node.get("alt", "")
+            if alt:
+                out.emit(f"[{alt}]")
+
+        # Links — preserve text
+        elif tag_name == "a":
+            inner = _inline_text(node)
             if inner:
-                if tag_name == "ol":
-                    items.append(f"{i + 1}. {inner}")
-                else:
-                    items.append(f"- {inner}")
-        items.append("")
-        return items
-
-    # List items (if not nested inside ul/ol)
-    if tag_name == "li":
-        inner = _inline_text(element)
-        if inner:
-            return [f"- {inner}"]
-        return []
-
-    # Line breaks
-    if tag_name == "br":
-        return [""]
-
-    # Horizontal rules
-    if tag_name == "hr":
-        return ["", "---", ""]
-
-    # Pre/code blocks
-    if tag_name == "pre":
-        code = element.get_text()
-        return ["", "```", code.strip(), "```", ""]
-
-    # Images — preserve alt text
-    if tag_name == "img":
-        alt = element.get("alt", "")
-        if alt:
-            return [f"[{alt}]"]
-        return []
-
-    # Links — preserve text
-    if tag_name == "a":
-        inner = _inline_text(element)
-        return [inner] if inner else []
-
-    # Divs, sections, articles — just recurse
-    if tag_name in ("div", "section", "article", "main", "figure", "figcaption", "span"):
-        return _collect_children(element)
-
-    # Table → simplified text
-    if tag_name == "table":
-        return _convert_table(element)
-
-    # Default: recurse into children
-    return _collect_children(element)
+                out.emit(inner)
+
+        # Table → simplified text
+        elif tag_name == "table":
+            out.emit("")
+            for row in _find_owned(node, ROW_TAGS):
+                cells = [_inline_text(cell) for cell in _find_owned(row, CELL_TAGS)]
+                if cells:
+                    out.emit(" | ".join(cells))
+            out.emit("")
+
+        # Divs, sections, spans and anything else — descend
+        else:
+            stack.extend(reversed(node.contents))
+
+    return out.lines
 
 
 def _inline_text(element: Tag) -> str:
     """Extract inline text with emphasis markers."""
-    parts: list[str] = []
-
-    for child in element.children:
-        if isinstance(child, NavigableString):
-            text = re.sub(r"[ \t]+", " ", str(child))
-            parts.append(text)
-        elif isinstance(child, Tag):
-            if child.name in ("strong", "b"):
-                inner = _inline_text(child)
-                if inner:
-                    parts.append(f"**{inner.strip()}**")
-            elif child.name in ("em", "i"):
-                inner = _inline_text(child)
-                if inner:
-                    parts.append(f"*{inner.strip()}*")
-            elif child.name == "code":
-                inner = child.get_text()
-                if inner:
-                    parts.append(f"`{inner.strip()}`")
-            elif child.name == "br":
-                parts.append("\n")
-            elif child.name == "a":
-                inner = _inline_text(child)
-                parts.append(inner)
-            elif child.name == "img":
-                alt = child.get("alt", "")
-                if alt:
-                    parts.append(f"[{alt}]")
-            else:
-                parts.append(_inline_text(child))
-
-    result = "".join(parts)
-    # Collapse whitespace but preserve newlines
-    result = re.sub(r"[ \t]+", " ", result)
-    return result.strip()
-
-
-def _collect_children(element: Tag) -> list[str]:
-    """Collect lines from all children."""
-    lines: list[str] = []
-    for child in element.children:
-        lines.extend(_convert_element(child))
-    return lines
-
-
-def _convert_table(table: Tag) -> list[str]:
-    """Convert a table to simplified text rows."""
-    lines: list[str] = [""]
-    for row in table.find_all("tr"):
-        cells = []
-        for cell in row.find_all(["td", "th"]):
-            cells.append(_inline_text(cell))
-        if cells:
-            lines.append(" | ".join(cells))
-    lines.append("")
-    return lines
+    buf = InlineBuffer()
+    stack: list[Any] = list(reversed(element.contents))
+    while stack:
+        node = stack.pop()
+        if type(node) is tuple:
+            buf.close(*node)
+            continue
+
+        if isinstance(node, NavigableString):
+            buf.append(str(node))
+            continue
+
+        if not isinstance(node, Tag):
+            continue
+
+        if node.name in ("strong", "b"):
+            marker = "**"
+        elif node.name in ("em", "i"):
+            marker = "*"
+        elif node.name == "code":
+            inner = node.get_text()
+            if inner:
+                buf.append(f"`{inner.strip()}`")
+            continue
+        elif node.name == "br":
+            buf.append("\n")
+            continue
+        elif node.name == "img":
+            alt = node.get("alt", "")
+            if alt:
+                buf.append(f"[{alt}]")
+            continue
+        else:
+            # Links, spans and other containers contribute their stripped text
+            marker = ""
+
+        stack.append((buf.open(marker), marker))
+        stack.extend(reversed(node.contents))
+
+    return buf.getvalue()
+
+
+def _find_owned(element: Tag, names: frozenset[str]) -> list[Tag]:
+    """Find descendants named ``names`` that belong to ``element`` itself.
+
+    The walk does not enter a match or a nested table, so rows and cells of
+    an inner table are reached only through the outer cell's inline text.
+    """
+    found: list[Tag] = []
+    stack = [c for c in reversed(element.contents) if isinstance(c, Tag)]
+    while stack:
+        node = stack.pop()
+        if node.name in names:
+            found.append(node)
+        elif node.name != "table":
+            stack.extend(c for c in reversed(node.contents) if isinstance(c, Tag))
+    return found
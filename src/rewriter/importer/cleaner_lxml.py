@@ -0,0 +1,275 @@
+"""lxml-native backend for :func:`rewriter.importer.cleaner.clean_html`.
+
+Walks ``lxml.html`` elements directly instead of BeautifulSoup's
+``Tag``/``NavigableString`` objects. The conversion rules mirror the bs4
+converter in ``cleaner.py`` line for line, including the quirks of the tree
+bs4 builds: comments are text nodes, whitespace-only strings are collapsed
+to a single space or newline outside <pre>, and removed elements still
+separate the text around them.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Iterator
+
+import lxml.html
+from lxml import etree
+
+from rewriter.importer._markdown import (
+    CELL_TAGS,
+    END_QUOTE,
+    HEADINGS,
+    ROW_TAGS,
+    STRIP_TAGS,
+    InlineBuffer,
+    LineWriter,
+)
+
+_DOCTYPE_RE = re.compile(r"<!doctype", re.IGNORECASE)
+
+# bs4 keeps whitespace-only strings verbatim only inside these
+_PRESERVE_WHITESPACE = frozenset(("pre", "textarea"))
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+# Stands in for a removed element so the text on either side stays split
+_REMOVED = "rewriter-removed"
+
+# Stack marker: leave the innermost <pre>/<textarea> inside inline text
+_END_PRESERVE = object()
+
+# A child of an element: either a text run (.text/.tail) or a node
+_Child = str | etree._Element
+
+
+def convert_html(html: str) -> list[str] | None:
+    """Convert HTML to lines of markdown-like text.
+
+    Returns None when libxml2 cannot build the full tree: the markup is
+    only comments, or it nests deeper than libxml2's limit (2048 levels with
+    huge_tree; the rest would be silently dropped). The caller then falls back
+    to the bs4 converter, which has no depth limit.
+    """
+    parser = lxml.html.HTMLParser(huge_tree=True)
+    try:
+        root = lxml.html.document_fromstring(html, parser=parser)
+    except etree.ParserError:
+        return None
+    if any(e.type_name == "ERR_RESOURCE_LIMIT" for e in parser.error_log):
+        return None
+
+    # Remove non-content elements
+    for element in list(root.iter(*STRIP_TAGS)):
+        placeholder = etree.Element(_REMOVED)
+        placeholder.tail = element.tail
+        element.getparent().replace(element, placeholder)
+
+    out = LineWriter()
+    if _DOCTYPE_RE.search(html):
+        out.text(_doctype_text(root.getroottree().docinfo))
+
+    top: list[_Child] = list(root.itersiblings(preceding=True))
+    top.reverse()
+    top.append(root)
+    top.extend(root.itersiblings())
+
+    stack: list[Any] = top[::-1]
+    while stack:
+        node = stack.pop()
+        if node is END_QUOTE:
+            out.end_quote()
+            continue
+
+        if isinstance(node, str):
+            out.text(node)
+            continue
+
+        if _is_text(node):
+            out.text(node.text or "")
+            continue
+
+        tag_name = node.tag
+
+        if tag_name in HEADINGS:
+            out.block("#" * int(tag_name[1]) + " ", _inline_text(node))
+
+        elif tag_name == "p":
+            out.block("", _inline_text(node))
+
+        elif tag_name == "blockquote":
+            out.start_quote()
+            stack.append(END_QUOTE)
+            stack.extend(_reversed_children(node))
+
+        elif tag_name in ("ul", "ol"):
+            out.emit("")
+            for i, li in enumerate(c for c in node if c.tag == "li"):
+                inner = _inline_text(li)
+                if inner:
+                    out.emit(f"{i + 1}. {inner}" if tag_name == "ol" else f"- {inner}")
+            out.emit("")
+
+        elif tag_name == "li":
+            inner = _inline_text(node)
+            if inner:
+                out.emit(f"- {inner}")
+
+        elif tag_name == "br":
+            out.emit("")
+
+        elif tag_name == "hr":
+            out.block("", "---")
+
+        elif tag_name == "pre":
+            out.code_block("".join(node.itertext()))
+
+        elif tag_name == "img":
+            alt = node.get("alt", "")
+            if alt:
+                out.emit(f"[{alt}]")
+
+        elif tag_name == "a":
+            inner = _inline_text(node)
+            if inner:
+                out.emit(inner)
+
+        elif tag_name == "table":
+            out.emit("")
+            for row in _find_owned(node, ROW_TAGS):
+                cells = [_inline_text(cell) for cell in _find_owned(row, CELL_TAGS)]
+                if cells:
+                    out.emit(" | ".join(cells))
+            out.emit("")
+
+        else:
+            stack.extend(_reversed_children(node))
+
+    return out.lines
+
+
+def _inline_text(element: etree._Element) -> str:
+    """Extract inline text with emphasis markers."""
+    buf = InlineBuffer()
+    # bs4 decides at parse time, so a <pre> around the element counts too
+    preserve = int(
+        element.tag in _PRESERVE_WHITESPACE
+        or next(element.iterancestors(*_PRESERVE_WHITESPACE), None) is not None
+    )
+    stack: list[Any] = _reversed_children(element)
+    while stack:
+        node = stack.pop()
+        if type(node) is tuple:
+            buf.close(*node)
+            continue
+
+        if node is _END_PRESERVE:
+            preserve -= 1
+            continue
+
+        if isinstance(node, str) or _is_text(node):
+            text = node if isinstance(node, str) else node.text or ""
+            buf.append(text if preserve else _collapse_blank(text))
+            continue
+
+        tag_name = node.tag
+        if tag_name in ("strong", "b"):
+            marker = "**"
+        elif tag_name in ("em", "i"):
+            marker = "*"
+        elif tag_name == "code":
+            inner = _get_text(node, bool(preserve))
+            if inner:
+                buf.append(f"`{inner.strip()}`")
+            continue
+        elif tag_name == "br":
+            buf.append("\n")
+            continue
+        elif tag_name == "img":
+            alt = node.get("alt", "")
+            if alt:
+                buf.append(f"[{alt}]")
+            continue
+        else:
+            marker = ""
+
+        stack.append((buf.open(marker), marker))
+        if tag_name in _PRESERVE_WHITESPACE:
+            preserve += 1
+            stack.append(_END_PRESERVE)
+        stack.extend(_reversed_children(node))
+
+    return buf.getvalue()
+
+
+def _children(element: etree._Element) -> Iterator[_Child]:
+    """Yield text runs and child nodes in document order."""
+    if element.text:
+        yield element.text
+    for child in element:
+        yield child
+        if child.tail:
+            yield child.tail
+
+
+def _reversed_children(element: etree._Element) -> list[_Child]:
+    children = list(_children(element))
+    children.reverse()
+    return children
+
+
+def _get_text(element: etree._Element, preserve: bool) -> str:
+    """Text of ``element`` as bs4's ``get_text()`` returns it.
+
+    Comments are left out, and whitespace-only runs are collapsed unless
+    ``preserve`` is set or they are inside a <pre>/<textarea>.
+    """
+    parts: list[str] = []
+    stack: list[tuple[_Child, bool]] = [(element, preserve)]
+    while stack:
+        node, keep = stack.pop()
+        if isinstance(node, str):
+            parts.append(node if keep else _collapse_blank(node))
+        elif not _is_text(node):
+            keep = keep or node.tag in _PRESERVE_WHITESPACE
+            stack.extend((child, keep) for child in _reversed_children(node))
+    return "".join(parts)
+
+
+def _find_owned(element: etree._Element, names: frozenset[str]) -> list[etree._Element]:
+    """Find descendants named ``names`` that belong to ``element`` itself.
+
+    The walk does not enter a match or a nested table.
+    """
+    found: list[etree._Element] = []
+    stack = [c for c in reversed(element) if isinstance(c.tag, str)]
+    while stack:
+        node = stack.pop()
+        if node.tag in names:
+            found.append(node)
+        elif node.tag != "table":
+            stack.extend(c for c in reversed(node) if isinstance(c.tag, str))
+    return found
+
+
+def _is_text(node: etree._Element) -> bool:
+    """Comments and processing instructions are text nodes to bs4."""
+    return not isinstance(node.tag, str)
+
+
+def _collapse_blank(text: str) -> str:
+    """bs4 reduces strings of only ASCII whitespace to one character."""
+    if text.strip(_ASCII_SPACES):
+        return text
+    return "\n" if "\n" in text else " "
+
+
+def _doctype_text(docinfo: etree.DocInfo) -> str:
+    """Render a doctype the way bs4 stringifies its Doctype node."""
+    text = docinfo.root_name or ""
+    if docinfo.public_id:
+        text += f' PUBLIC "{docinfo.public_id}"'
+        if docinfo.system_url:
+            text += f' "{docinfo.system_url}"'
+    elif docinfo.system_url:
+        text += f' SYSTEM "{docinfo.system_url}"'
+    return text
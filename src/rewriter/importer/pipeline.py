@@ -0,0 +1,422 @@
+"""Pipelined import: parse → clean → write, connected by bounded queues."""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterator, Sequence
+
+from rewriter.corpus.models import Article
+from rewriter.corpus.store import CorpusStore
+from rewriter.importer.cleaner import CLEANER_VERSION, CleanerBackend, html_hash
+from rewriter.importer.wordpress import build_articles, iter_raw_items
+
+# Items buffered between two stages
+QUEUE_SIZE = 256
+
+# Sources read at the same time by default
+SOURCE_THREADS = 4
+
+# New cleaned-content cache entries written per commit
+_CACHE_FLUSH = 256
+
+# Cached conversions of HTML that no import has seen for this long are
+# dropped, in seconds
+CACHE_MAX_AGE = 180 * 24 * 3600
+
+# Articles whose tokens are counted in one call of the token counter
+_TOKEN_BATCH = 64
+
+# End-of-stream marker passed down the queues
+_DONE = object()
+
+
+class _Failure:
+    """Carries an exception from a stage thread to the consumer."""
+
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+class _Stopped(Exception):
+    """Raised inside a stage thread once the consumer has gone away."""
+
+
+class _Either:
+    """Stop signal that is set as soon as any of its events is."""
+
+    def __init__(self, *events: threading.Event) -> None:
+        self.events = events
+
+    def is_set(self) -> bool:
+        return any(e.is_set() for e in self.events)
+
+
+class PipelineStats:
+    """Counters updated as items flow through the pipeline."""
+
+    def __init__(self, name: str = "") -> None:
+        self.name = name  # source file, empty for the totals
+        self.items = 0  # posts that went through cleaning
+        self.articles = 0  # posts accepted (non-empty, >= min_words)
+        self.words = 0
+        self.categories: dict[str, int] = {}
+        self.duplicates = 0  # accepted posts dropped for a post ID taken by an earlier one
+        self.bytes_read = 0  # uncompressed XML consumed by the parser
+        self.cache_hits = 0  # posts whose cleaned content came from the cache
+        self.started = time.perf_counter()
+        self.finished: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return max(end - self.started, 1e-9)
+
+    @property
+    def items_per_sec(self) -> float:
+        return self.items / self.elapsed
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes_read / 1024 / 1024 / self.elapsed
+
+    def add(self, article: Article) -> None:
+        self.articles += 1
+        self.words += article.word_count
+        for cat in article.categories:
+            self.categories[cat] = self.categories.get(cat, 0) + 1
+
+    def drop(self, word_count: int, categories: list[str]) -> None:
+        """Take back an accepted article that another one has replaced."""
+        self.articles -= 1
+        self.duplicates += 1
+        self.words -= word_count
+        for cat in categories:
+            self.categories[cat] -= 1
+            if not self.categories[cat]:
+                del self.categories[cat]
+
+
+class ImportPipeline:
+    """Concurrent, pipelined import of one or more WXR files.
+
+    Up to ``source_threads`` sources are read at the same time. Each one
+    gets a parser thread streaming its raw items and a cleaner thread
+    turning them into articles, through a process pool shared by all
+    sources when ``workers > 1``. The caller consumes :meth:`articles` as
+    the single writer: it owns the database connection and commits in
+    batches, so concurrent sources never contend for the SQLite lock.
+
+    A post ID belongs to the first source in ``sources`` that has an
+    accepted post with it, whatever order the sources are read in; see
+    :meth:`articles`.
+
+    Bounded queues between the stages provide backpressure, so the stages
+    overlap while memory stays bounded: wall time approaches that of the
+    slowest stage instead of the sum.
+
+    With a ``cache`` store, the cleaners reuse conversions of unchanged HTML
+    from earlier imports (reading through their thread's connection), and
+    new ones are saved from the consumer's thread, inside the caller's
+    write transaction. The cache serves every export imported into the
+    corpus, so conversions are only dropped once the sources are exhausted
+    if no import has seen their HTML for ``cache_max_age`` seconds. With
+    ``cache_read_only`` (a dry run), the cache is only read.
+
+    With a ``token_counter`` (texts to token counts), the cleaners count
+    the content tokens of accepted articles in batches and set their
+    ``token_count``. Counts are cached with the conversions, so only new or
+    edited content is counted again.
+    """
+
+    def __init__(
+        self,
+        sources: Sequence[Path],
+        *,
+        min_words: int = 50,
+        workers: int = 1,
+        cleaner: CleanerBackend = "bs4",
+        queue_size: int = QUEUE_SIZE,
+        source_threads: int = SOURCE_THREADS,
+        cache: CorpusStore | None = None,
+        cache_read_only: bool = False,
+        cache_max_age: float = CACHE_MAX_AGE,
+        token_counter: Callable[[list[str]], list[int]] | None = None,
+    ) -> None:
+        self.sources = list(sources)
+        self.min_words = min_words
+        self.workers = workers
+        self.cleaner = cleaner
+        self.queue_size = queue_size
+        self.source_threads = max(1, min(source_threads, len(self.sources)))
+        self.cache = cache
+        self.cache_read_only = cache_read_only
+        self.cache_max_age = cache_max_age
+        self.token_counter = token_counter
+        self.stats = PipelineStats()
+        self.source_stats = [PipelineStats(p.name) for p in self.sources]
+
+    def articles(
+        self,
+        progress: Callable[[PipelineStats], None] | None = None,
+        *,
+        progress_every: int = 50,
+    ) -> Iterator[Article]:
+        """Run the pipeline, yielding accepted articles.
+
+        Articles of one source keep their export order; articles of sources
+        read at the same time are interleaved.
+
+        Post IDs repeated within a source keep their first post. Across
+        sources, the earlier source in ``sources`` wins: a later source's
+        post is dropped if the ID is already taken, and if it was yielded
+        first, the earlier source's post is yielded as well and must
+        replace it, as :meth:`CorpusStore.upsert_articles_batch` and
+        :meth:`CorpusStore.bulk_load` do. Dropped and replaced posts are
+        counted in ``duplicates`` of the source they came from.
+
+        Args:
+            progress: Called with the live totals every ``progress_every``
+                items and once at the end.
+        """
+        built_q: queue.Queue[Any] = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        pending = iter(range(len(self.sources)))
+        pending_lock = threading.Lock()
+
+        def next_source() -> int | None:
+            with pending_lock:
+                return next(pending, None)
+
+        cache = None if self.cache_read_only else self.cache
+        if cache is not None:
+            cache.prune_cleaned(CLEANER_VERSION)
+        fresh: list[tuple[str, str, int, int | None]] = []
+        # wp_id -> (source, word count, categories) of the accepted article
+        owners: dict[int, tuple[int, int, list[str]]] = {}
+
+        stats = self.stats = PipelineStats()
+        self.source_stats = [PipelineStats(p.name) for p in self.sources]
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        threads = [
+            threading.Thread(
+                target=self._run_sources,
+                args=(next_source, built_q, stop, pool),
+                name=f"import-clean-{i}",
+                daemon=True,
+            )
+            for i in range(self.source_threads)
+        ]
+        for t in threads:
+            t.start()
+        try:
+            remaining = len(self.sources)
+            while remaining:
+                idx, article = _get(built_q, stop)
+                if isinstance(article, _Failure):
+                    raise article.exc
+                source = self.source_stats[idx]
+                if article is _DONE:
+                    source.finished = time.perf_counter()
+                    remaining -= 1
+                    continue
+
+                stats.items += 1
+                source.items += 1
+                if article is not None and cache is not None:
+                    # Known hashes are only marked as used
+                    raw_hash = html_hash(article.raw_html)
+                    fresh.append(
+                        (raw_hash, article.content, article.word_count, article.token_count)
+                    )
+                    if len(fresh) >= _CACHE_FLUSH:
+                        cache.put_cleaned(fresh, CLEANER_VERSION, backend=self.cleaner)
+                        fresh.clear()
+                if article is not None and article.word_count >= self.min_words:
+                    owner = owners.get(article.wp_id)
+                    if owner is not None and owner[0] <= idx:
+                        source.duplicates += 1
+                        stats.duplicates += 1
+                    else:
+                        if owner is not None:
+                            # Replaces the post of a later source, written already
+                            self.source_stats[owner[0]].drop(owner[1], owner[2])
+                            stats.drop(owner[1], owner[2])
+                        owners[article.wp_id] = (idx, article.word_count, article.categories)
+                        stats.add(article)
+                        source.add(article)
+                        yield article
+                if progress and stats.items % progress_every == 0:
+                    self._sum_sources()
+                    progress(stats)
+            if cache is not None:
+                if fresh:
+                    cache.put_cleaned(fresh, CLEANER_VERSION, backend=self.cleaner)
+                cache.prune_cleaned(CLEANER_VERSION, unused_for=self.cache_max_age)
+            self._sum_sources()
+            stats.finished = time.perf_counter()
+            if progress:
+                progress(stats)
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+    def _sum_sources(self) -> None:
+        """Totals of the counters that stage threads update per source."""
+        self.stats.bytes_read = sum(s.bytes_read for s in self.source_stats)
+        self.stats.cache_hits = sum(s.cache_hits for s in self.source_stats)
+
+    def _run_sources(
+        self,
+        next_source: Callable[[], int | None],
+        built_q: queue.Queue[Any],
+        stop: threading.Event,
+        pool: Executor | None,
+    ) -> None:
+        """Clean sources one after another until none are left."""
+        try:
+            while (idx := next_source()) is not None:
+                self._clean(idx, built_q, stop, pool)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            _put_failure(built_q, (None, _Failure(e)), stop)
+
+    def _clean(
+        self,
+        idx: int,
+        built_q: queue.Queue[Any],
+        stop: threading.Event,
+        pool: Executor | None,
+    ) -> None:
+        source = self.source_stats[idx]
+        source.started = time.perf_counter()
+        raw_q: queue.Queue[Any] = queue.Queue(maxsize=self.queue_size)
+        done = threading.Event()  # set once this cleaner stops reading raw_q
+        parser = threading.Thread(
+            target=self._produce,
+            args=(self.sources[idx], source, raw_q, _Either(stop, done)),
+            name=f"import-parse-{idx}",
+            daemon=True,
+        )
+
+        lookup = None
+        if self.cache is not None:
+            cache = self.cache
+
+            def lookup(hashes: list[str]) -> dict[str, tuple[str, int, int | None]]:
+                found = cache.get_cleaned(hashes, CLEANER_VERSION, backend=self.cleaner)
+                source.cache_hits += len(found)
+                return found
+
+        parser.start()
+        try:
+            built = build_articles(
+                _drain(raw_q, stop),
+                workers=self.workers,
+                cleaner=self.cleaner,
+                lookup=lookup,
+                pool=pool,
+            )
+            if self.token_counter is not None:
+                built = self._count_tokens(built, self.token_counter)
+            for article in built:
+                _put(built_q, (idx, article), stop)
+            _put(built_q, (idx, _DONE), stop)
+        finally:
+            done.set()
+            parser.join()
+
+    def _count_tokens(
+        self,
+        built: Iterator[Article | None],
+        token_counter: Callable[[list[str]], list[int]],
+    ) -> Iterator[Article | None]:
+        """Pass ``built`` through, counting tokens of accepted articles in batches."""
+        batch: list[Article | None] = []
+        for article in built:
+            batch.append(article)
+            if len(batch) >= _TOKEN_BATCH:
+                yield from self._count_batch(batch, token_counter)
+                batch = []
+        yield from self._count_batch(batch, token_counter)
+
+    def _count_batch(
+        self,
+        batch: list[Article | None],
+        token_counter: Callable[[list[str]], list[int]],
+    ) -> list[Article | None]:
+        # Rejected articles are dropped by the consumer, so are not counted,
+        # nor are those whose count came with their cached conversion
+        accepted = [
+            a for a in batch
+            if a is not None and a.word_count >= self.min_words and a.token_count is None
+        ]
+        if accepted:
+            for article, n in zip(accepted, token_counter([a.content for a in accepted])):
+                article.token_count = n
+        return batch
+
+    def _produce(
+        self,
+        path: Path,
+        source: PipelineStats,
+        raw_q: queue.Queue[Any],
+        stop: _Either,
+    ) -> None:
+        def on_read(n: int) -> None:
+            source.bytes_read += n
+
+        try:
+            for raw in iter_raw_items(path, on_read=on_read):
+                _put(raw_q, raw, stop)
+            _put(raw_q, _DONE, stop)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            _put_failure(raw_q, _Failure(e), stop)
+
+
+def _put(q: queue.Queue[Any], item: Any, stop: threading.Event | _Either) -> None:
+    """Blocking put that gives up once the pipeline is stopped."""
+    while True:
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            if stop.is_set():
+                raise _Stopped
+
+
+def _put_failure(q: queue.Queue[Any], failure: Any, stop: threading.Event | _Either) -> None:
+    try:
+        _put(q, failure, stop)
+    except _Stopped:
+        pass
+
+
+def _get(q: queue.Queue[Any], stop: threading.Event) -> Any:
+    """Blocking get that gives up once the pipeline is stopped."""
+    while True:
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                raise _Stopped
+
+
+def _drain(q: queue.Queue[Any], stop: threading.Event) -> Iterator[Any]:
+    """Yield queue items until the end marker, re-raising upstream failures."""
+    while True:
+        item = _get(q, stop)
+        if item is _DONE:
+            return
+        if isinstance(item, _Failure):
+            raise item.exc
+        yield item
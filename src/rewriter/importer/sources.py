@@ -0,0 +1,105 @@
+"""Locating and opening WXR export files (split and/or compressed)."""
+
+from __future__ import annotations
+
+import bz2
+import glob
+import gzip
+import lzma
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterable
+
+# Leading bytes of each supported compression format
+_MAGIC = (
+    (b"\x1f\x8b", gzip.open),
+    (b"\xfd7zXZ\x00", lzma.open),
+    (b"BZh", bz2.open),
+)
+
+# Raised while reading a truncated or corrupt export
+READ_ERRORS = (EOFError, OSError, lzma.LZMAError, zlib.error)
+
+
+class SourceError(Exception):
+    """An export file could not be read or decompressed; the message names it."""
+
+
+def expand_sources(patterns: Iterable[str]) -> list[Path]:
+    """Resolve file paths and glob patterns into a list of export files.
+
+    Each pattern's glob matches are sorted, so split exports
+    (``export-001.xml.gz``, ``export-002.xml.gz``, ...) are read in order.
+    A file matched by several patterns is listed once.
+
+    Raises:
+        FileNotFoundError: If a pattern matches no file.
+    """
+    paths: list[Path] = []
+    seen: set[Path] = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_file():
+            matches = [path]
+        else:
+            matches = [Path(p) for p in sorted(glob.glob(pattern, recursive=True))]
+            matches = [p for p in matches if p.is_file()]
+        if not matches:
+            raise FileNotFoundError(f"No export files match {pattern!r}")
+        for match in matches:
+            key = match.resolve()
+            if key not in seen:
+                seen.add(key)
+                paths.append(match)
+    return paths
+
+
+def open_source(
+    path: Path,
+    *,
+    on_read: Callable[[int], None] | None = None,
+) -> BinaryIO:
+    """Open an export for binary reading, decompressing on the fly.
+
+    gzip, xz/lzma and bzip2 are detected by their magic bytes, so the file
+    extension does not matter; anything else is read as plain XML.
+
+    Args:
+        path: Export file.
+        on_read: Called with the size of every chunk read (uncompressed
+            bytes), e.g. to measure parsing throughput.
+    """
+    with open(path, "rb") as f:
+        head = f.read(6)
+    f = None
+    for magic, opener in _MAGIC:
+        if head.startswith(magic):
+            f = opener(path, "rb")
+            break
+    if f is None:
+        f = open(path, "rb")
+    if on_read is not None:
+        return _CountingReader(f, on_read)  # type: ignore[return-value]
+    return f  # type: ignore[return-value]
+
+
+class _CountingReader:
+    """Minimal binary reader that reports how much was read through it."""
+
+    def __init__(self, f: Any, on_read: Callable[[int], None]) -> None:
+        self._f = f
+        self._on_read = on_read
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        self._on_read(len(data))
+        return data
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> _CountingReader:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
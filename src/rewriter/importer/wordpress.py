@@ -2,53 +2,86 @@
 
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
 from datetime import datetime
+from itertools import chain, islice
 from pathlib import Path
-from typing import Iterator
+from typing import Callable, Iterable, Iterator, NamedTuple, Sequence
 
-from bs4 import BeautifulSoup
+from lxml import etree
 from rich.console import Console
 
 from rewriter.corpus.models import Article
-from rewriter.importer.cleaner import clean_html
+from rewriter.importer.cleaner import CleanerBackend, clean_html, html_hash
+from rewriter.importer.sources import READ_ERRORS, SourceError, open_source
 
 console = Console()
 
-# WXR XML namespaces
-WP_NS = "http://wordpress.org/export/"
+# WXR XML namespaces. The wp: and excerpt: URIs carry the WXR version
+# (1.0, 1.1, 1.2), so they are matched by prefix rather than exactly.
+WP_NS_PREFIX = "http://wordpress.org/export/"
 CONTENT_NS = "http://purl.org/rss/1.0/modules/content/"
-EXCERPT_NS = "http://wordpress.org/export/"
 DC_NS = "http://purl.org/dc/elements/1.1/"
 
-# Namespace prefixes used in WXR
-_NS_MAP = {
-    "wp": "http://wordpress.org/export/1.2/",
-    "content": "http://purl.org/rss/1.0/modules/content/",
-    "excerpt": "http://wordpress.org/export/1.2/excerpt/",
-    "dc": "http://purl.org/dc/elements/1.1/",
-}
+_CONTENT_ENCODED = f"{{{CONTENT_NS}}}encoded"
 
 
-def parse_wxr(xml_path: Path, *, min_words: int = 50) -> Iterator[Article]:
-    """Parse a WordPress WXR XML export file.
+# Items handed to each worker process per task
+_BATCH_SIZE = 32
+
+# Earlier conversions of raw HTML: {html_hash: (content, word_count,
+# token_count)} for the hashes that are known; token_count may be None
+CleanedLookup = Callable[[list[str]], dict[str, tuple[str, int, int | None]]]
+
+
+class RawItem(NamedTuple):
+    """Fields extracted from a post <item>, before any HTML cleaning."""
+
+    wp_id: int
+    title: str
+    slug: str
+    raw_html: str
+    excerpt_html: str
+    post_date: str
+    categories: list[str]
+    tags: list[str]
+    status: str
+
+
+# A raw item with its cached conversion, if any
+_Task = tuple[RawItem, "tuple[str, int, int | None] | None"]
+
+
+def parse_wxr(
+    xml_path: Path | Sequence[Path],
+    *,
+    min_words: int = 50,
+    workers: int = 1,
+    cleaner: CleanerBackend = "bs4",
+) -> Iterator[Article]:
+    """Parse a WordPress WXR XML export file, or several parts of one.
+
+    The export is streamed one ``<item>`` at a time; each element is freed
+    once its fields have been extracted, so memory stays flat regardless of
+    the export size. Compressed files are decompressed on the fly.
 
     Args:
-        xml_path: Path to the XML file.
+        xml_path: Path to the XML file, or the paths of a split export in
+            order.
         min_words: Minimum word count to include an article.
+        workers: Number of processes for HTML cleaning. With more than one,
+            items are cleaned in ordered, bounded batches; the output is
+            identical to a serial run.
+        cleaner: HTML cleaner backend, see :func:`clean_html`.
 
     Yields:
         Article objects for each published post meeting the word threshold.
     """
-    console.print(f"[dim]Parsing {xml_path.name}...[/dim]")
-
-    with open(xml_path, "r", encoding="utf-8") as f:
-        soup = BeautifulSoup(f, "lxml-xml")
-
-    items = soup.find_all("item")
-    console.print(f"[dim]Found {len(items)} items in export[/dim]")
+    paths = [xml_path] if isinstance(xml_path, Path) else list(xml_path)
+    raw_items = chain.from_iterable(iter_raw_items(p) for p in paths)
 
-    for item in items:
-        article = _parse_item(item)
+    for article in build_articles(raw_items, workers=workers, cleaner=cleaner):
         if article is None:
             continue
         if article.word_count < min_words:
@@ -56,123 +89,244 @@ def parse_wxr(xml_path: Path, *, min_words: int = 50) -> Iterator[Article]:
         yield article
 
 
-def _parse_item(item: BeautifulSoup) -> Article | None:
-    """Parse a single <item> element into an Article."""
-    # Only process posts (not pages, attachments, etc.)
-    post_type = _get_wp_text(item, "post_type")
-    if post_type != "post":
-        return None
-
-    status = _get_wp_text(item, "status")
-    if status != "publish":
-        return None
+def iter_raw_items(
+    xml_path: Path,
+    *,
+    on_read: Callable[[int], None] | None = None,
+) -> Iterator[RawItem]:
+    """Stream published posts from a WXR file without cleaning their HTML.
 
-    # Basic fields
-    title = _get_text(item, "title")
-    slug = _get_wp_text(item, "post_name")
+    Args:
+        xml_path: Path to the (optionally compressed) XML file.
+        on_read: Called with the number of XML bytes consumed per read.
 
-    # Content
-    raw_html = _get_ns_text(item, "encoded", "content") or ""
+    Raises:
+        SourceError: If the file cannot be read or decompressed, e.g. a
+            truncated download.
+    """
+    console.print(f"[dim]Parsing {xml_path.name}...[/dim]")
 
+    n_items = 0
+    try:
+        with open_source(xml_path, on_read=on_read) as f:
+            context = etree.iterparse(
+                f, events=("end",), tag="item", huge_tree=True, recover=True
+            )
+            for _, item in context:
+                n_items += 1
+                raw = _extract_item(item)
+                _release(item)
+                if raw is not None:
+                    yield raw
+    except READ_ERRORS as e:
+        raise SourceError(f"Cannot read {xml_path} after {n_items} items: {e}") from e
+
+    console.print(f"[dim]Processed {n_items} items in export[/dim]")
+
+
+def build_article(
+    raw: RawItem,
+    *,
+    cleaner: CleanerBackend = "bs4",
+    cleaned: tuple[str, int, int | None] | None = None,
+) -> Article | None:
+    """Clean a raw item's HTML and build its Article.
+
+    ``cleaned`` is a cached ``(content, word_count, token_count)``
+    conversion of the item's HTML; when given, the HTML is not converted
+    again and its token count, if known, is reused.
+
+    Returns None when the post has no content left after cleaning.
+    """
     # Clean HTML to markdown-like text
-    content = clean_html(raw_html)
+    content = clean_html(raw.raw_html, backend=cleaner) if cleaned is None else cleaned[0]
     if not content:
         return None
 
-    # Excerpt
-    excerpt_html = _get_ns_text(item, "encoded", "excerpt") or ""
-    excerpt = clean_html(excerpt_html) if excerpt_html else ""
-
-    # WordPress post ID
-    wp_id = int(_get_wp_text(item, "post_id") or "0")
+    excerpt = clean_html(raw.excerpt_html, backend=cleaner) if raw.excerpt_html else ""
 
     # Date
-    pub_date_str = _get_wp_text(item, "post_date")
     published_at = None
-    if pub_date_str and pub_date_str != "0000-00-00 00:00:00":
+    if raw.post_date and raw.post_date != "0000-00-00 00:00:00":
         try:
-            published_at = datetime.strptime(pub_date_str, "%Y-%m-%d %H:%M:%S")
+            published_at = datetime.strptime(raw.post_date, "%Y-%m-%d %H:%M:%S")
         except ValueError:
             pass
 
+    article = Article(
+        wp_id=raw.wp_id,
+        title=raw.title,
+        slug=raw.slug,
+        content=content,
+        raw_html=raw.raw_html,
+        excerpt=excerpt,
+        published_at=published_at,
+        categories=raw.categories,
+        tags=raw.tags,
+        status=raw.status,
+    )
+    if cleaned is None:
+        article.compute_word_count()
+    else:
+        article.word_count = cleaned[1]
+        article.token_count = cleaned[2]
+    article.compute_content_hash()
+    return article
+
+
+def build_articles(
+    raw_items: Iterable[RawItem],
+    *,
+    workers: int = 1,
+    cleaner: CleanerBackend = "bs4",
+    lookup: CleanedLookup | None = None,
+    pool: Executor | None = None,
+) -> Iterator[Article | None]:
+    """Build articles in input order, in a process pool if ``workers > 1``.
+
+    With ``lookup``, items are looked up in batches by :func:`html_hash` of
+    their HTML, and only the misses are converted. ``pool`` is a process
+    pool shared with other callers, used instead of starting one.
+
+    Yields None for items with no content left after cleaning.
+    """
+    tasks = _tasks(raw_items, lookup)
+    if pool is not None:
+        return _build_parallel(tasks, pool, workers, cleaner)
+    if workers > 1:
+        return _build_in_new_pool(tasks, workers, cleaner)
+    return chain.from_iterable(_build_batch(batch, cleaner) for batch in tasks)
+
+
+def _tasks(raw_items: Iterable[RawItem], lookup: CleanedLookup | None) -> Iterator[list[_Task]]:
+    """Group raw items into batches, attaching their cached conversions."""
+    it = iter(raw_items)
+    while batch := list(islice(it, _BATCH_SIZE)):
+        if lookup is None:
+            yield [(raw, None) for raw in batch]
+            continue
+        hashes = [html_hash(raw.raw_html) for raw in batch]
+        found = lookup(hashes)
+        yield [(raw, found.get(h)) for raw, h in zip(batch, hashes)]
+
+
+def _build_batch(batch: list[_Task], cleaner: CleanerBackend) -> list[Article | None]:
+    return [build_article(raw, cleaner=cleaner, cleaned=cached) for raw, cached in batch]
+
+
+def _build_in_new_pool(
+    tasks: Iterable[list[_Task]],
+    workers: int,
+    cleaner: CleanerBackend,
+) -> Iterator[Article | None]:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from _build_parallel(tasks, pool, workers, cleaner)
+
+
+def _build_parallel(
+    tasks: Iterable[list[_Task]],
+    pool: Executor,
+    workers: int,
+    cleaner: CleanerBackend,
+) -> Iterator[Article | None]:
+    """Build batches of articles in a process pool, preserving input order.
+
+    At most ``2 * workers`` batches are in flight, so a fast parser cannot
+    run arbitrarily far ahead of the cleaners.
+    """
+    pending: deque[Future[list[Article | None]]] = deque()
+    for batch in tasks:
+        pending.append(pool.submit(_build_batch, batch, cleaner))
+        if len(pending) >= 2 * workers:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _release(item: etree._Element) -> None:
+    """Free a processed <item> and every sibling parsed before it."""
+    item.clear(keep_tail=True)
+    parent = item.getparent()
+    if parent is None:
+        return
+    while item.getprevious() is not None:
+        del parent[0]
+
+
+def _extract_item(item: etree._Element) -> RawItem | None:
+    """Extract a post's fields from an <item>; None for non-published posts."""
+    wp, title, raw_html, excerpt_html, cat_elems = _collect_fields(item)
+
+    # Only process posts (not pages, attachments, etc.)
+    if wp.get("post_type") != "post":
+        return None
+
+    status = wp.get("status", "")
+    if status != "publish":
+        return None
+
     # Categories and tags
     categories: list[str] = []
     tags: list[str] = []
-    for cat_elem in item.find_all("category"):
+    for cat_elem in cat_elems:
         domain = cat_elem.get("domain", "")
-        name = cat_elem.get_text(strip=True)
+        name = _text(cat_elem)
         if domain == "category" and name:
             categories.append(name)
         elif domain == "post_tag" and name:
             tags.append(name)
 
-    article = Article(
-        wp_id=wp_id,
+    return RawItem(
+        wp_id=int(wp.get("post_id") or "0"),
         title=title,
-        slug=slug,
-        content=content,
+        slug=wp.get("post_name", ""),
         raw_html=raw_html,
-        excerpt=excerpt,
-        published_at=published_at,
+        excerpt_html=excerpt_html,
+        post_date=wp.get("post_date", ""),
         categories=categories,
         tags=tags,
         status=status,
     )
-    article.compute_word_count()
-    return article
 
 
-def _get_text(element: BeautifulSoup, tag: str) -> str:
-    """Get text content of a direct child tag."""
-    found = element.find(tag, recursive=False)
-    if found:
-        return found.get_text(strip=True)
-    return ""
+def _collect_fields(
+    item: etree._Element,
+) -> tuple[dict[str, str], str, str, str, list[etree._Element]]:
+    """Single pass over the direct children of an <item>, keyed by namespace.
 
+    Returns:
+        (wp:* fields by local name, title, content:encoded, excerpt:encoded,
+        <category> elements).
+    """
+    wp: dict[str, str] = {}
+    title = ""
+    raw_html = ""
+    excerpt_html = ""
+    cat_elems: list[etree._Element] = []
+
+    for child in item:
+        tag = child.tag
+        if not isinstance(tag, str):
+            continue  # comments, processing instructions
+        if tag[0] != "{":
+            if tag == "title":
+                title = _text(child)
+            elif tag == "category":
+                cat_elems.append(child)
+            continue
 
-def _get_wp_text(element: BeautifulSoup, local_name: str) -> str:
-    """Get text from a wp: namespaced tag.
+        ns, local = tag[1:].split("}", 1)
+        if tag == _CONTENT_ENCODED:
+            raw_html = _text(child)
+        elif ns.startswith(WP_NS_PREFIX):
+            if ns.endswith("/excerpt/"):
+                if local == "encoded":
+                    excerpt_html = _text(child)
+            elif local not in wp:
+                wp[local] = _text(child)
 
-    Tries multiple namespace variations since WXR versions differ.
-    """
-    # Try with explicit namespace
-    for ns_uri in [
-        "http://wordpress.org/export/1.2/",
-        "http://wordpress.org/export/1.1/",
-        "http://wordpress.org/export/1.0/",
-        "http://wordpress.org/export/",
-    ]:
-        found = element.find(f"{local_name}", attrs={}, recursive=False)
-        if found and found.prefix == "wp":
-            return found.get_text(strip=True)
-
-    # Fallback: find by local name with wp prefix pattern
-    for child in element.children:
-        if hasattr(child, "name") and child.name and ":" in str(child.name):
-            prefix, name = str(child.name).split(":", 1)
-            if name == local_name and prefix == "wp":
-                return child.get_text(strip=True)
-
-    # Last resort: find by local name matching
-    found = element.find(local_name, recursive=False)
-    if found:
-        return found.get_text(strip=True)
-
-    return ""
-
-
-def _get_ns_text(element: BeautifulSoup, local_name: str, prefix: str) -> str:
-    """Get text from a namespaced tag by prefix (content:encoded, excerpt:encoded)."""
-    # Try prefixed name
-    for child in element.children:
-        if hasattr(child, "name") and child.name and ":" in str(child.name):
-            p, n = str(child.name).split(":", 1)
-            if n == local_name and p == prefix:
-                return child.get_text(strip=True)
-
-    # Try with just the local name and check prefix attribute
-    found = element.find(local_name, recursive=False)
-    if found and getattr(found, "prefix", "") == prefix:
-        return found.get_text(strip=True)
-
-    return ""
+    return wp, title, raw_html, excerpt_html, cat_elems
+
+
+def _text(element: etree._Element) -> str:
+    return (element.text or "").strip()
@@ -11,6 +11,7 @@ from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 
 from rewriter.config import Settings
+from rewriter.llm.tokens import record_usage, request_features
 
 console = Console()
 
@@ -69,9 +70,18 @@ class BatchProcessor:
         console.print(f"[green]Batch submitted: {batch.id} ({len(requests)} requests)[/green]")
         return batch.id
 
-    def wait_for_batch(self, batch_id: str) -> dict[str, str]:
+    def wait_for_batch(
+        self,
+        batch_id: str,
+        features: dict[str, list[int]] | None = None,
+    ) -> dict[str, str]:
         """Poll until batch completes, then retrieve results.
 
+        Args:
+            batch_id: Batch to wait for.
+            features: Token estimator features of the requests by custom_id;
+                their billed input tokens are recorded for calibration.
+
         Returns:
             Mapping of custom_id → response text.
         """
@@ -97,7 +107,7 @@ class BatchProcessor:
 
                 time.sleep(POLL_INTERVAL)
 
-        return self._collect_results(batch_id)
+        return self._collect_results(batch_id, features or {})
 
     def submit_and_wait(
         self,
@@ -106,9 +116,15 @@ class BatchProcessor:
     ) -> dict[str, str]:
         """Submit batch and block until results are ready."""
         batch_id = self.submit_batch(requests, **kwargs)
-        return self.wait_for_batch(batch_id)
-
-    def _collect_results(self, batch_id: str) -> dict[str, str]:
+        features = {
+            req["custom_id"]: request_features(req.get("system"), req["messages"])
+            for req in requests
+        }
+        return self.wait_for_batch(batch_id, features)
+
+    def _collect_results(
+        self, batch_id: str, features: dict[str, list[int]]
+    ) -> dict[str, str]:
         """Download and parse batch results."""
         results: dict[str, str] = {}
 
@@ -121,6 +137,17 @@ class BatchProcessor:
                     if block.type == "text":
                         text += block.text
                 results[custom_id] = text
+                if custom_id in features:
+                    u = message.usage
+                    billed = (
+                        u.input_tokens
+                        + (u.cache_read_input_tokens or 0)
+                        + (u.cache_creation_input_tokens or 0)
+                    )
+                    # Per response, so results already downloaded keep their usage
+                    record_usage(
+                        self.settings.token_calibration_path, [[*features[custom_id], billed]]
+                    )
             else:
                 console.print(f"[red]Request {custom_id} failed: {event.result.type}[/red]")
                 results[custom_id] = ""
@@ -3,12 +3,14 @@
 from __future__ import annotations
 
 import time
+from functools import lru_cache
 from typing import Any
 
 import anthropic
 from rich.console import Console
 
 from rewriter.config import Settings
+from rewriter.llm.tokens import get_estimator, record_usage, request_features
 
 console = Console()
 
@@ -18,6 +20,38 @@ BASE_DELAY = 2.0
 MAX_DELAY = 120.0
 
 
+@lru_cache(maxsize=1)
+def _encoding() -> Any:
+    import tiktoken
+
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def tokenizer_available() -> bool:
+    """Whether the tokenizer loads; tiktoken downloads it on first use."""
+    try:
+        _encoding()
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def count_tokens(text: str) -> int:
+    """Estimate token count using tiktoken (cl100k_base as approximation).
+
+    Special-token markers in the text are counted as plain text.
+    """
+    return len(_encoding().encode_ordinary(text))
+
+
+def count_tokens_batch(texts: list[str], *, num_threads: int = 8) -> list[int]:
+    """Token counts of many texts, like :func:`count_tokens`.
+
+    tiktoken encodes the batch on ``num_threads`` native threads.
+    """
+    return [len(t) for t in _encoding().encode_ordinary_batch(texts, num_threads=num_threads)]
+
+
 class LLMClient:
     """Wrapper around Anthropic SDK with retry and caching support."""
 
@@ -31,6 +65,7 @@ class LLMClient:
         self._total_output_tokens = 0
         self._total_cache_read_tokens = 0
         self._total_cache_creation_tokens = 0
+        self.tokens = get_estimator(settings)
 
     def complete(
         self,
@@ -65,11 +100,12 @@ class LLMClient:
         }
         if system:
             kwargs["system"] = system
+        features = request_features(system, messages)
 
         for attempt in range(MAX_RETRIES):
             try:
                 response = self.client.messages.create(**kwargs)
-                self._track_usage(response.usage)
+                self._track_usage(response.usage, features)
                 return self._extract_text(response)
             except anthropic.RateLimitError as e:
                 delay = min(BASE_DELAY * (2 ** attempt), MAX_DELAY)
@@ -122,17 +158,21 @@ class LLMClient:
         )
 
     def count_tokens(self, text: str) -> int:
-        """Estimate token count using tiktoken (cl100k_base as approximation)."""
-        import tiktoken
-
-        enc = tiktoken.get_encoding("cl100k_base")
-        return len(enc.encode(text))
-
-    def _track_usage(self, usage: Any) -> None:
-        self._total_input_tokens += getattr(usage, "input_tokens", 0)
+        """Estimate token count with the configured estimator (see settings.token_estimator)."""
+        return self.tokens.count(text)
+
+    def _track_usage(self, usage: Any, features: list[int] | None = None) -> None:
+        input_tokens = getattr(usage, "input_tokens", 0)
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_creation = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        self._total_input_tokens += input_tokens
         self._total_output_tokens += getattr(usage, "output_tokens", 0)
-        self._total_cache_read_tokens += getattr(usage, "cache_read_input_tokens", 0)
-        self._total_cache_creation_tokens += getattr(usage, "cache_creation_input_tokens", 0)
+        self._total_cache_read_tokens += cache_read
+        self._total_cache_creation_tokens += cache_creation
+        if features is not None:
+            # Cached prompt tokens are billed apart from input_tokens
+            billed = input_tokens + cache_read + cache_creation
+            record_usage(self.settings.token_calibration_path, [[*features, billed]])
 
     @staticmethod
     def _extract_text(response: Any) -> str:
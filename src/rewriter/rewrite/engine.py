@@ -8,6 +8,7 @@ from rich.console import Console
 
 from rewriter.analyzer.examples import ExampleSelector
 from rewriter.config import Settings
+from rewriter.corpus.boilerplate import Boilerplate
 from rewriter.corpus.store import CorpusStore
 from rewriter.llm.client import LLMClient
 from rewriter.rewrite.prompts import build_system_prompt, build_user_prompt
@@ -23,6 +24,7 @@ class RewriteEngine:
         self.store = store
         self.llm = LLMClient(settings)
         self.selector = ExampleSelector(settings, store)
+        self.boilerplate = Boilerplate.load(store)
 
     def rewrite(
         self,
@@ -82,8 +84,11 @@ class RewriteEngine:
         if verbose:
             sys_tokens = self.llm.count_tokens(system_prompt)
             usr_tokens = self.llm.count_tokens(user_prompt)
+            bound = self.llm.tokens.error_bound
             console.print(
-                f"[dim]Prompt: system={sys_tokens} tokens, user={usr_tokens} tokens[/dim]"
+                f"[dim]Prompt: system={sys_tokens} tokens, user={usr_tokens} tokens"
+                + (f" (±{bound:.0%})" if bound is not None else "")
+                + "[/dim]"
             )
 
         # Call API with prompt caching on system prompt
@@ -139,7 +144,7 @@ class RewriteEngine:
                 console.print(f"[dim]  - {a.title} ({a.word_count} words)[/dim]")
 
         return [
-            f"**{a.title}**\n\n{a.content}"
+            f"**{a.title}**\n\n{self.boilerplate.strip(a.content)}"
             for a in articles
         ]
 
@@ -0,0 +1,89 @@
+"""Builders for small WordPress exports used across the tests."""
+
+from __future__ import annotations
+
+import bz2
+import gzip
+import lzma
+from pathlib import Path
+from typing import Any
+from xml.sax.saxutils import escape
+
+_OPENERS = {"gz": gzip.open, "xz": lzma.open, "bz2": bz2.open}
+
+
+def post(
+    wp_id: int,
+    *,
+    title: str | None = None,
+    html: str | None = None,
+    words: int = 80,
+    categories: tuple[str, ...] = ("News",),
+    tags: tuple[str, ...] = (),
+    date: str = "2024-01-01 12:00:00",
+    post_type: str = "post",
+    status: str = "publish",
+) -> dict[str, Any]:
+    """Fields of one <item>; the HTML defaults to ``words`` distinct words."""
+    if html is None:
+        body = " ".join(f"w{wp_id}x{i}" for i in range(words))
+        html = f"<p>{body}</p>"
+    return {
+        "wp_id": wp_id,
+        "title": title if title is not None else f"Post {wp_id}",
+        "html": html,
+        "categories": categories,
+        "tags": tags,
+        "date": date,
+        "post_type": post_type,
+        "status": status,
+    }
+
+
+def wxr(posts: list[dict[str, Any]]) -> bytes:
+    """A WXR 1.2 document holding ``posts``."""
+    items = []
+    for p in posts:
+        terms = "".join(
+            f'<category domain="category" nicename="{escape(c)}"><![CDATA[{c}]]></category>'
+            for c in p["categories"]
+        ) + "".join(
+            f'<category domain="post_tag" nicename="{escape(t)}"><![CDATA[{t}]]></category>'
+            for t in p["tags"]
+        )
+        items.append(
+            f"""<item>
+<title>{escape(p["title"])}</title>
+<content:encoded><![CDATA[{p["html"]}]]></content:encoded>
+<excerpt:encoded><![CDATA[]]></excerpt:encoded>
+<wp:post_id>{p["wp_id"]}</wp:post_id>
+<wp:post_date>{p["date"]}</wp:post_date>
+<wp:post_name>post-{p["wp_id"]}</wp:post_name>
+<wp:status>{p["status"]}</wp:status>
+<wp:post_type>{p["post_type"]}</wp:post_type>
+{terms}
+</item>"""
+        )
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"
+    xmlns:excerpt="http://wordpress.org/export/1.2/excerpt/"
+    xmlns:content="http://purl.org/rss/1.0/modules/content/"
+    xmlns:dc="http://purl.org/dc/elements/1.1/"
+    xmlns:wp="http://wordpress.org/export/1.2/">
+<channel>
+<title>Test blog</title>
+{"".join(items)}
+</channel>
+</rss>
+""".encode("utf-8")
+
+
+def write_wxr(path: Path, posts: list[dict[str, Any]], *, compress: str | None = None) -> Path:
+    """Write an export of ``posts`` to ``path``, compressed with "gz", "xz" or "bz2"."""
+    data = wxr(posts)
+    if compress is None:
+        path.write_bytes(data)
+    else:
+        with _OPENERS[compress](path, "wb") as f:
+            f.write(data)
+    return path
@@ -0,0 +1,75 @@
+"""Boilerplate: lines repeated across the corpus, and stripping them."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from rewriter.config import Settings
+from rewriter.corpus.boilerplate import Boilerplate, BoilerplateDetector
+from rewriter.corpus.models import Article
+from rewriter.corpus.store import CorpusStore
+
+_FOOTER = "Подписывайтесь на наш   Telegram-канал!"
+_RARE = "Читайте также наш обзор видеокарт"
+
+
+def _article(wp_id: int, *lines: str) -> Article:
+    body = f"Post {wp_id} starts with its own text.\n\nSecond paragraph of post {wp_id}."
+    article = Article(
+        wp_id=wp_id, title=f"Post {wp_id}", content="\n\n".join([body, *lines])
+    )
+    article.compute_word_count()
+    article.compute_content_hash()
+    return article
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[CorpusStore]:
+    with CorpusStore(tmp_path / "corpus.db") as store:
+        yield store
+
+
+def test_repeated_footer_is_detected_and_stripped(tmp_path: Path, store: CorpusStore) -> None:
+    # 100 articles: threshold max(5, 5% of 100) = 5; the footer is in 40,
+    # the rare line in 4, and "---" in all of them
+    articles = []
+    for i in range(1, 101):
+        lines = []
+        if i <= 4:
+            lines.append(_RARE)
+        if i % 5 < 2:
+            # Whitespace and case vary between articles
+            lines.append(_FOOTER if i % 2 else _FOOTER.upper())
+        articles.append(_article(i, *lines, "---"))
+    store.upsert_articles_batch(articles)
+
+    lines = BoilerplateDetector(Settings(data_dir=tmp_path), store).update()
+    assert [(b.line, b.articles) for b in lines] == [
+        ("подписывайтесь на наш telegram-канал!", 40)
+    ]
+    assert lines[0].text in (_FOOTER, _FOOTER.upper())
+
+    boilerplate = Boilerplate.load(store)
+    article = next(a for a in store.iter_articles() if a.wp_id == 1)
+    stripped = boilerplate.strip(article.content)
+    assert stripped == (
+        f"Post 1 starts with its own text.\n\nSecond paragraph of post 1.\n\n{_RARE}\n\n---"
+    )
+
+    article.token_count = 100
+    copy = boilerplate.strip_article(article, lambda text: len(text.split()))
+    assert copy.content == stripped
+    assert copy.token_count == 100 - 4
+    assert boilerplate.strip_article(article).token_count is None
+    assert article.content != stripped
+
+
+def test_no_boilerplate_in_a_small_corpus(tmp_path: Path, store: CorpusStore) -> None:
+    # Below boilerplate_min_articles, even a line in every article is kept
+    store.upsert_articles_batch([_article(i, _FOOTER) for i in range(1, 5)])
+    assert BoilerplateDetector(Settings(data_dir=tmp_path), store).update() == []
+    assert not Boilerplate.load(store)
+    assert Boilerplate.load(store).strip("a\n\n\n\nb") == "a\n\n\n\nb"
@@ -0,0 +1,104 @@
+"""clean_html: the lxml backend produces exactly what the bs4 backend does."""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+
+from rewriter.importer.cleaner import clean_html
+
+FIXTURES = Path(__file__).parent / "fixtures" / "cleaner"
+
+# Building blocks of the generated malformed documents
+_TAGS = (
+    "p", "div", "span", "b", "i", "em", "strong", "code", "pre", "a", "ul", "ol", "li",
+    "table", "tr", "td", "th", "blockquote", "h2", "br", "hr", "img", "textarea", "script",
+)
+_TEXTS = ("foo", " ", "  \n ", "\t", "bar baz", "\xa0", "&nbsp;", "<!-- c -->", "x\n\ny", " \r\n")
+
+
+def _read(path: Path) -> str:
+    # Bytes as committed: \r\n must reach the parser unchanged
+    return path.read_bytes().decode("utf-8")
+
+
+def _malformed(rng: random.Random, depth: int = 0) -> str:
+    """Random tag soup; about one element in five is left unclosed."""
+    out = []
+    for _ in range(rng.randint(1, 5)):
+        if depth < 6 and rng.random() < 0.5:
+            tag = rng.choice(_TAGS)
+            close = f"</{tag}>" if rng.random() < 0.8 else ""
+            out.append(f"<{tag}>{_malformed(rng, depth + 1)}{close}")
+        else:
+            out.append(rng.choice(_TEXTS))
+    return "".join(out)
+
+
+@pytest.mark.parametrize("path", sorted(FIXTURES.glob("*.html")), ids=lambda p: p.stem)
+def test_fixture_corpus(path: Path) -> None:
+    html = _read(path)
+    expected = clean_html(html, backend="bs4")
+    assert expected
+    assert clean_html(html, backend="lxml") == expected
+
+
+def test_generated_malformed_documents() -> None:
+    rng = random.Random(20260216)
+    for _ in range(1500):
+        html = _malformed(rng)
+        assert clean_html(html, backend="lxml") == clean_html(html, backend="bs4"), html
+
+
+def test_fixture_structure() -> None:
+    text = clean_html(_read(FIXTURES / "post_basic.html"), backend="lxml")
+    assert "## Почему память подорожала" in text
+    assert "- сборка нового ПК обойдётся дороже;" in text
+    assert "2. Второй шаг `npm install`" in text
+    assert "> > Но не в этот раз." in text
+    assert "[График цен]" in text
+    assert "caption" not in text
+
+
+# ── Pathological input ───────────────────────────────────────
+
+_DEPTH = 10_000
+
+_PATHOLOGICAL = {
+    "nested divs": "<div>" * _DEPTH + "deep text" + "</div>" * _DEPTH,
+    "nested spans": "<p>" + "<span>w " * _DEPTH + "deep text" + "</span>" * _DEPTH + "</p>",
+    "nested emphasis": (
+        "<p>" + "<b> <i>w " * (_DEPTH // 2) + "deep text" + "</i></b>" * (_DEPTH // 2)
+    ),
+    "nested lists": "<ul><li>" * (_DEPTH // 2) + "deep text" + "</li></ul>" * (_DEPTH // 2),
+    "nested quotes": "<blockquote><p>q</p>" * 500 + "deep text" + "</blockquote>" * 500,
+    "nested tables": "<table><tr><td>" * 3000 + "deep text" + "</td></tr></table>" * 3000,
+    "huge table": (
+        "<table>"
+        + "".join(
+            f"<tr>{''.join(f'<td>r{r}c{c} <b>x</b></td>' for c in range(8))}</tr>"
+            for r in range(2000)
+        )
+        + "</table><p>deep text</p>"
+    ),
+    "unclosed divs": "<div>" * _DEPTH + "deep text",
+    "unclosed inline": "<p>" + "<b><i><a href='#'>w " * (_DEPTH // 3) + "deep text",
+    "unclosed mixed": "<ul><li><table><tr><td><blockquote><span>" * 1500 + "deep text",
+}
+
+
+@pytest.mark.parametrize("backend", ["bs4", "lxml"])
+@pytest.mark.parametrize("name", list(_PATHOLOGICAL))
+def test_pathological_input(name: str, backend: str) -> None:
+    html = _PATHOLOGICAL[name]
+    text = clean_html(html, backend=backend)
+    assert "deep text" in text
+    assert clean_html(html, backend=backend) == text
+
+
+@pytest.mark.parametrize("name", list(_PATHOLOGICAL))
+def test_pathological_input_backends_agree(name: str) -> None:
+    html = _PATHOLOGICAL[name]
+    assert clean_html(html, backend="lxml") == clean_html(html, backend="bs4")
@@ -0,0 +1,85 @@
+"""DuplicateDetector: near-duplicate groups and their canonical articles."""
+
+from __future__ import annotations
+
+import random
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from rewriter.config import Settings
+from rewriter.corpus.dedup import DuplicateDetector
+from rewriter.corpus.models import Article
+from rewriter.corpus.store import CorpusStore
+
+_rng = random.Random(3)
+_VOCABULARY = [f"w{i}" for i in range(5000)]
+
+
+def _text(n: int = 300) -> str:
+    return " ".join(_rng.choice(_VOCABULARY) for _ in range(n))
+
+
+def _article(wp_id: int, content: str, published_at: datetime | None) -> Article:
+    article = Article(
+        wp_id=wp_id, title=f"Post {wp_id}", content=content, published_at=published_at
+    )
+    article.compute_word_count()
+    article.compute_content_hash()
+    return article
+
+
+def _edited(text: str, words: int) -> str:
+    """``text`` with its last ``words`` words rewritten."""
+    kept = text.split()[:-words]
+    return " ".join(kept + _text(words).split())
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[CorpusStore]:
+    with CorpusStore(tmp_path / "corpus.db") as store:
+        yield store
+
+
+def _marks(store: CorpusStore) -> dict[int, int | None]:
+    return {a.wp_id: a.duplicate_of for a in store.iter_articles()}
+
+
+def test_near_duplicates_are_marked(tmp_path: Path, store: CorpusStore) -> None:
+    original = _text()
+    repost = _text()
+    store.upsert_articles_batch([
+        _article(1, original, datetime(2020, 5, 1)),
+        # Earlier and nearly identical: canonical for the group of 1, 2 and 3
+        _article(2, _edited(original, 3), datetime(2019, 1, 1)),
+        _article(3, _edited(original, 5), None),
+        _article(4, repost, datetime(2021, 1, 1)),
+        _article(5, repost, datetime(2021, 1, 1)),
+        # Distinct, or sharing only part of their text
+        *(_article(i, _text(), datetime(2020, 1, i)) for i in range(6, 26)),
+        _article(26, _edited(original, 150), datetime(2018, 1, 1)),
+    ])
+    settings = Settings(data_dir=tmp_path)
+    result = DuplicateDetector(settings, store).update()
+    assert (result.signed, result.groups, result.duplicates) == (26, 2, 3)
+
+    ids = {a.wp_id: a.id for a in store.iter_articles()}
+    marks = _marks(store)
+    assert marks[1] == marks[3] == ids[2]
+    assert marks[5] == ids[4]
+    assert {wp_id for wp_id, mark in marks.items() if mark is not None} == {1, 3, 5}
+
+    # Nothing changed: no article is written again
+    generation = store.get_generation()
+    result = DuplicateDetector(settings, store).update()
+    assert (result.signed, result.duplicates) == (0, 3)
+    assert store.get_generation() == generation
+
+    # An edit that splits a group clears its mark
+    store.upsert_articles_batch([_article(5, _text(), datetime(2021, 1, 1))])
+    result = DuplicateDetector(settings, store).update()
+    assert (result.signed, result.groups, result.duplicates) == (1, 1, 2)
+    assert _marks(store)[5] is None
+    assert _marks(store)[1] == ids[2]
@@ -0,0 +1,173 @@
+"""ImportPipeline: the cleaned-content cache and post ID collisions."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from rewriter.corpus.store import CorpusStore
+from rewriter.importer.pipeline import ImportPipeline
+from tests.helpers import post, write_wxr
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[CorpusStore]:
+    with CorpusStore(tmp_path / "corpus.db") as store:
+        yield store
+
+
+def _cached(store: CorpusStore) -> int:
+    return store.conn.execute("SELECT COUNT(*) FROM cleaned_cache").fetchone()[0]
+
+
+def _import(store: CorpusStore, sources: list[Path], **kwargs) -> ImportPipeline:
+    pipeline = ImportPipeline(sources, min_words=5, cache=store, **kwargs)
+    store.upsert_articles_batch(pipeline.articles())
+    return pipeline
+
+
+def test_dry_run_leaves_cache_alone(tmp_path: Path, store: CorpusStore) -> None:
+    export = write_wxr(tmp_path / "export.xml", [post(i) for i in range(1, 11)])
+    pipeline = ImportPipeline([export], min_words=5, cache=store, cache_read_only=True)
+    assert len(list(pipeline.articles())) == 10
+    assert _cached(store) == 0
+
+    _import(store, [export])
+    assert _cached(store) == 10
+
+    pipeline = ImportPipeline([export], min_words=5, cache=store, cache_read_only=True)
+    assert len(list(pipeline.articles())) == 10
+    assert pipeline.stats.cache_hits == 10
+
+
+def test_cache_keeps_other_sources(tmp_path: Path, store: CorpusStore) -> None:
+    blog = write_wxr(tmp_path / "blog.xml", [post(i) for i in range(1, 11)])
+    sister = write_wxr(tmp_path / "sister.xml", [post(i) for i in range(101, 106)])
+    _import(store, [blog])
+    _import(store, [sister])
+    assert _cached(store) == 15
+
+    pipeline = _import(store, [blog])
+    assert pipeline.stats.cache_hits == 10
+
+
+def test_cache_drops_conversions_unused_for_long(
+    tmp_path: Path, store: CorpusStore, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    export = tmp_path / "export.xml"
+    write_wxr(export, [post(i) for i in range(1, 11)])
+    _import(store, [export])
+
+    # A year later, posts 6-10 are gone from the export and post 1 is edited
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 365 * 24 * 3600)
+    write_wxr(export, [post(1, words=20)] + [post(i) for i in range(2, 6)])
+    pipeline = _import(store, [export])
+    assert pipeline.stats.cache_hits == 4
+    assert _cached(store) == 5
+
+
+def test_cache_is_per_backend(tmp_path: Path, store: CorpusStore) -> None:
+    export = write_wxr(tmp_path / "export.xml", [post(i) for i in range(1, 6)])
+    _import(store, [export], cleaner="bs4")
+    pipeline = _import(store, [export], cleaner="lxml")
+    assert pipeline.stats.cache_hits == 0
+    pipeline = _import(store, [export], cleaner="bs4")
+    assert pipeline.stats.cache_hits == 5
+
+
+class _Counter:
+    """Token counter that records the texts it was given."""
+
+    def __init__(self) -> None:
+        self.texts: list[str] = []
+
+    def __call__(self, texts: list[str]) -> list[int]:
+        self.texts += texts
+        return [len(t.split()) for t in texts]
+
+
+def test_token_counts_are_cached(tmp_path: Path, store: CorpusStore) -> None:
+    export = tmp_path / "export.xml"
+    write_wxr(export, [post(i) for i in range(1, 11)])
+    counter = _Counter()
+    _import(store, [export], token_counter=counter)
+    assert len(counter.texts) == 10
+
+    # Only the edited post is counted again
+    write_wxr(export, [post(1, words=20)] + [post(i) for i in range(2, 11)])
+    counter = _Counter()
+    _import(store, [export], token_counter=counter)
+    assert len(counter.texts) == 1
+    assert {a.token_count for a in store.iter_articles()} == {20, 80}
+
+
+def test_token_counts_filled_in_after_an_import_without_them(
+    tmp_path: Path, store: CorpusStore
+) -> None:
+    export = write_wxr(tmp_path / "export.xml", [post(i) for i in range(1, 6)])
+    _import(store, [export])
+    assert {a.token_count for a in store.iter_articles()} == {None}
+
+    counter = _Counter()
+    pipeline = _import(store, [export], token_counter=counter)
+    assert pipeline.stats.cache_hits == 5
+    assert len(counter.texts) == 5
+    counter = _Counter()
+    _import(store, [export], token_counter=counter)
+    assert not counter.texts
+    assert {a.token_count for a in store.iter_articles()} == {80}
+
+
+def _blog(name: str, ids: range, words: int = 40) -> list[dict]:
+    return [
+        post(i, html=f"<p>{' '.join(f'{name}{i}w{j}' for j in range(words))}</p>") for i in ids
+    ]
+
+
+def _load(store: CorpusStore, pipeline: ImportPipeline):
+    if store.count_articles():
+        return store.upsert_articles_batch(pipeline.articles(), batch_size=50)
+    return store.bulk_load(pipeline.articles(), batch_size=50)
+
+
+def test_first_source_keeps_colliding_ids(tmp_path: Path, store: CorpusStore) -> None:
+    a = write_wxr(tmp_path / "a.xml", _blog("alpha", range(1, 201)))
+    b = write_wxr(tmp_path / "b.xml.xz", _blog("beta", range(1, 101)), compress="xz")
+
+    for run in range(3):
+        pipeline = ImportPipeline([a, b], min_words=5, cache=store, source_threads=2)
+        result = _load(store, pipeline)
+        assert pipeline.stats.articles == 200
+        assert [s.duplicates for s in pipeline.source_stats] == [0, 100]
+        assert [s.articles for s in pipeline.source_stats] == [200, 0]
+        if run:
+            assert (result.added, result.changed, result.unchanged) == (0, 0, 200)
+        assert all(a.content.startswith("alpha") for a in store.iter_articles())
+
+
+def test_earlier_source_replaces_post_written_first(tmp_path: Path, store: CorpusStore) -> None:
+    # The first source reaches its colliding posts long after the second one
+    slow = write_wxr(
+        tmp_path / "slow.xml",
+        _blog("slow", range(1000, 1600), words=400) + _blog("slow", range(1, 21)),
+    )
+    fast = write_wxr(tmp_path / "fast.xml", _blog("fast", range(1, 21)))
+
+    pipeline = ImportPipeline([slow, fast], min_words=5, source_threads=2)
+    result = store.bulk_load(pipeline.articles(), batch_size=50)
+    assert result.added == 620
+    assert pipeline.stats.articles == 620
+    assert pipeline.stats.duplicates == 20
+    assert [s.duplicates for s in pipeline.source_stats] == [0, 20]
+
+    by_wp_id = {a.wp_id: a for a in store.iter_articles()}
+    assert len(by_wp_id) == 620
+    for i in range(1, 21):
+        assert by_wp_id[i].content.startswith(f"slow{i}w0")
+        assert "slow" in store.get_raw_html(by_wp_id[i].id)
+    assert store.get_corpus_stats().total_articles == 620
+    assert not store.search_articles('"fast1w0"')
@@ -0,0 +1,121 @@
+"""Sampling and chunk packing for analysis."""
+
+from __future__ import annotations
+
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from rewriter.analyzer import sampler
+from rewriter.analyzer.sampler import (
+    _MIX_PARTNERS,
+    _mix_partners,
+    _pack_ffd,
+    sample_frame,
+    stratified_sample,
+)
+from rewriter.config import Settings
+from rewriter.corpus.models import Article
+from rewriter.corpus.snapshot import CorpusSnapshot
+from rewriter.corpus.store import CorpusStore
+
+_CATEGORIES = (["News"], ["Reviews", "News"], ["Guides"], ["Opinion"], [])
+
+
+def _corpus(store: CorpusStore) -> None:
+    """Articles with tied and missing dates, some uncategorized, some near-duplicates."""
+    rng = random.Random(7)
+    start = datetime(2015, 1, 1)
+    articles = []
+    for wp_id in range(1, 601):
+        if rng.random() < 0.1:
+            published_at = None
+        else:
+            # Few distinct days, so many articles share a date
+            published_at = start + timedelta(days=rng.randrange(40) * 30)
+        article = Article(
+            wp_id=wp_id,
+            title=f"Post {wp_id}",
+            content=f"content of post {wp_id}",
+            published_at=published_at,
+            categories=rng.choice(_CATEGORIES),
+        )
+        article.compute_word_count()
+        article.compute_content_hash()
+        articles.append(article)
+    store.upsert_articles_batch(articles)
+    ids = [a.id for a in store.iter_articles()]
+    store.set_duplicates({d: rng.choice(ids[:100]) for d in rng.sample(ids[100:], 60)})
+
+
+@pytest.mark.parametrize("fraction", [0.01, 0.18, 0.5, 1.0])
+def test_frame_sample_matches_article_sample(tmp_path: Path, fraction: float) -> None:
+    settings = Settings(sample_fraction=fraction, data_dir=tmp_path)
+    with CorpusStore(tmp_path / "corpus.db") as store:
+        _corpus(store)
+        snapshot = CorpusSnapshot.write(store, tmp_path / "snapshot")
+        summaries = store.get_article_summaries()
+        frame = store.get_sampling_frame()
+        assert snapshot.get_sampling_frame() == frame
+        assert len(frame) == 540
+
+        for seed in (0, 42, 1234):
+            expected = [a.id for a in stratified_sample(summaries, settings, seed=seed)]
+            assert sample_frame(frame, settings, seed=seed) == expected
+            articles = list(store.iter_articles())
+            assert [a.id for a in stratified_sample(articles, settings, seed=seed)] == expected
+
+
+_MAX_TOKENS = 90_000
+_PER_CHUNK = 12
+
+
+def _articles(n: int, n_strata: int, seed: int) -> tuple[list[int], list[str]]:
+    """Sizes and strata of ``n`` articles; larger strata have larger articles."""
+    rng = random.Random(seed)
+    strata = [f"c{min(int(rng.expovariate(3 / n_strata)), n_strata - 1)}" for _ in range(n)]
+    sizes = [int(rng.lognormvariate(7.5 + int(s[1:]) * 2 / n_strata, 0.6)) for s in strata]
+    return sizes, strata
+
+
+@pytest.mark.parametrize("n", [2, 20, _MIX_PARTNERS + 1, _MIX_PARTNERS + 2, 300, 5000])
+def test_mix_partners_are_bounded(n: int) -> None:
+    for pass_ in range(8):
+        for a in range(n):
+            partners = list(_mix_partners(a, n, pass_))
+            assert len(partners) == len(set(partners)) <= _MIX_PARTNERS
+            assert all(0 <= b < n and b != a for b in partners)
+
+
+@pytest.mark.parametrize("n_strata", [2, 5, 15, 40])
+def test_ffd_packing_mixes_strata(n_strata: int, monkeypatch: pytest.MonkeyPatch) -> None:
+    n = 3000
+    sizes, strata = _articles(n, n_strata, seed=n_strata)
+    # Count the chunk pairs compared instead of timing the packing
+    compared = Counter()
+
+    def partners(a: int, n_bins: int, pass_: int) -> list[int]:
+        found = list(_mix_partners(a, n_bins, pass_))
+        compared[pass_] += len(found)
+        return found
+
+    monkeypatch.setattr(sampler, "_mix_partners", partners)
+    bins = _pack_ffd(sizes, strata, _MAX_TOKENS, _PER_CHUNK)
+    assert len(bins) > _MIX_PARTNERS + 1
+    assert len(compared) <= 8
+    assert all(pairs <= _MIX_PARTNERS * len(bins) for pairs in compared.values())
+
+    assert sorted(i for b in bins for i in b) == list(range(n))
+    assert all(b == sorted(b) for b in bins)
+    assert all(len(b) <= _PER_CHUNK for b in bins)
+    assert all(sum(sizes[i] for i in b) <= _MAX_TOKENS for b in bins)
+    assert len(bins) == len(_pack_ffd(sizes, ["one"] * n, _MAX_TOKENS, _PER_CHUNK))
+
+    # Every chunk holds about its share of each stratum
+    total = Counter(strata)
+    for b in bins:
+        for stratum, count in Counter(strata[i] for i in b).items():
+            assert count <= total[stratum] * len(b) / n + 2
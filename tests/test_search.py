@@ -0,0 +1,104 @@
+"""Full-text search: query building, ranking, index sync, BM25 example retrieval."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from rewriter.analyzer.examples import ExampleSelector
+from rewriter.config import Settings
+from rewriter.corpus.models import Article, FewShotExample
+from rewriter.corpus.store import HIGHLIGHT_END, HIGHLIGHT_START, CorpusStore, fts_query
+
+_FILLER = " ".join(f"слово{i}" for i in range(40))
+
+
+def _article(wp_id: int, title: str, content: str) -> Article:
+    article = Article(wp_id=wp_id, title=title, content=f"{content} {_FILLER}")
+    article.compute_word_count()
+    article.compute_content_hash()
+    return article
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[CorpusStore]:
+    with CorpusStore(tmp_path / "corpus.db") as store:
+        store.upsert_articles_batch([
+            _article(1, "Видеокарты дорожают", "цены на память растут"),
+            _article(2, "Обзор ноутбука", "в ноутбуке стоят видеокарты и память"),
+            _article(3, "Рецепт пирога", "мука, яйца и сахар"),
+            _article(4, "Память и цены", "память память память"),
+        ])
+        yield store
+
+
+def _hits(store: CorpusStore, query: str, **kwargs) -> list[int]:
+    return [h.article.wp_id for h in store.search_articles(query, **kwargs)]
+
+
+def test_fts_query_quotes_every_word() -> None:
+    assert fts_query('Цены "на" память*') == '"цены" AND "на" AND "память"'
+    assert fts_query("a AND b OR NOT c NEAR(d e)") == (
+        '"a" AND "and" AND "b" AND "or" AND "not" AND "c" AND "near" AND "d" AND "e"'
+    )
+    assert fts_query("память память цены") == '"память" AND "цены"'
+    assert fts_query("") == ""
+    assert fts_query(" \"' ( ) * -") == ""
+
+
+def test_fts_query_any_word() -> None:
+    assert fts_query("на память и цены память", match_all=False) == '"память" OR "цены"'
+    text = " ".join(f"w{i:03d}" for i in range(100))
+    assert fts_query(text, match_all=False, max_terms=5).count(" OR ") == 4
+
+
+@pytest.mark.parametrize(
+    "text", ['"', "AND", "OR OR", "NEAR(", "^*", "col:value", "-x", "'", "\\"]
+)
+def test_search_accepts_any_text(store: CorpusStore, text: str) -> None:
+    assert _hits(store, fts_query(text)) == []
+    assert _hits(store, fts_query(text, match_all=False)) == []
+
+
+def test_search_ranks_title_matches_first(store: CorpusStore) -> None:
+    assert _hits(store, fts_query("видеокарты")) == [1, 2]
+    assert _hits(store, fts_query("память цены")) == [4, 1]
+    assert _hits(store, fts_query("память")) == [4, 1, 2]
+    assert _hits(store, fts_query("память"), limit=1) == [4]
+    assert _hits(store, fts_query("пирога сахар")) == [3]
+    assert _hits(store, "") == []
+
+    hit = store.search_articles(fts_query("мука"))[0]
+    assert f"{HIGHLIGHT_START}мука{HIGHLIGHT_END}" in hit.snippet
+    assert hit.score > 0
+
+
+def test_search_follows_updates_and_deletes(store: CorpusStore) -> None:
+    store.upsert_articles_batch(
+        [_article(3, "Рецепт торта", "шоколад и сливки"), _article(4, "Память", "x")],
+        prune=True,
+    )
+    assert _hits(store, fts_query("пирога")) == []
+    assert _hits(store, fts_query("мука")) == []
+    assert _hits(store, fts_query("шоколад")) == [3]
+    assert _hits(store, fts_query("видеокарты")) == []
+    assert _hits(store, fts_query("память")) == [4]
+
+    ids = {a.wp_id: a.id for a in store.iter_articles()}
+    store.set_duplicates({ids[4]: ids[3]})
+    assert _hits(store, fts_query("память"), canonical_only=True) == []
+    assert _hits(store, fts_query("память")) == [4]
+
+
+def test_find_similar_bm25(tmp_path: Path, store: CorpusStore) -> None:
+    selector = ExampleSelector(Settings(data_dir=tmp_path), store)
+    similar = selector.find_similar_bm25("Почему видеокарты и память снова дорожают?", n=2)
+    assert [a.wp_id for a in similar] == [1, 2]
+    assert similar[0].content.startswith("цены на память")
+
+    # No shared word: the selected examples
+    ids = {a.wp_id: a.id for a in store.iter_articles()}
+    store.save_examples([FewShotExample(article_id=ids[3], cluster_id=0)])
+    assert [a.wp_id for a in selector.find_similar_bm25("quantum chromodynamics")] == [3]
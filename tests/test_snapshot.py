@@ -0,0 +1,106 @@
+"""CorpusSnapshot: the columnar copy reads like the store it was taken from."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from rewriter.corpus.models import Article
+from rewriter.corpus.snapshot import CorpusSnapshot, load_snapshot
+from rewriter.corpus.store import CorpusStore
+
+
+def _article(wp_id: int, title: str, content: str, **fields) -> Article:
+    article = Article(wp_id=wp_id, title=title, content=content, **fields)
+    article.compute_word_count()
+    article.compute_content_hash()
+    return article
+
+
+def _articles() -> list[Article]:
+    return [
+        _article(
+            1, "Память дорожает 📈", "Цены на DDR5 выросли — снова.\n\n> «Цитата»",
+            published_at=datetime(2023, 3, 1, 12, 30), categories=["Новости", "Железо"],
+        ),
+        _article(2, "", "Без заголовка и без даты", categories=["Железо"]),
+        _article(3, "Ñandú", "", published_at=datetime(2021, 1, 1), categories=[]),
+        _article(
+            4, "Same day", "tie on the date\x00with a NUL",
+            published_at=datetime(2023, 3, 1, 12, 30), categories=["日本語", "Новости"],
+        ),
+    ]
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[CorpusStore]:
+    with CorpusStore(tmp_path / "corpus.db") as store:
+        yield store
+
+
+def test_round_trip(tmp_path: Path, store: CorpusStore) -> None:
+    store.upsert_articles_batch(_articles())
+    ids = {a.wp_id: a.id for a in store.iter_articles()}
+    store.set_duplicates({ids[4]: ids[1]})
+
+    written = CorpusSnapshot.write(store, tmp_path / "snapshot")
+    snapshot = CorpusSnapshot.open(tmp_path / "snapshot")
+    assert len(snapshot) == len(written) == 4
+    for canonical_only in (False, True):
+        assert list(snapshot.iter_article_texts(canonical_only=canonical_only)) == list(
+            store.iter_article_texts(canonical_only=canonical_only)
+        )
+        assert snapshot.get_article_summaries(
+            canonical_only=canonical_only
+        ) == store.get_article_summaries(canonical_only=canonical_only)
+    assert snapshot.get_sampling_frame() == store.get_sampling_frame()
+    assert sorted(snapshot.categories) == ["Железо", "Новости", "日本語"]
+
+
+def test_empty_corpus(tmp_path: Path, store: CorpusStore) -> None:
+    CorpusSnapshot.write(store, tmp_path / "snapshot")
+    snapshot = CorpusSnapshot.open_fresh(tmp_path / "snapshot", store)
+    assert snapshot is not None
+    assert len(snapshot) == 0
+    assert list(snapshot.iter_article_texts()) == []
+    assert snapshot.get_article_summaries() == []
+    assert snapshot.get_sampling_frame() == []
+
+
+def test_stale_after_any_write(tmp_path: Path, store: CorpusStore) -> None:
+    path = tmp_path / "snapshot"
+    articles = _articles()
+    store.upsert_articles_batch(articles)
+
+    writes = [
+        lambda: store.upsert_articles_batch([_article(5, "New", "new post")]),
+        lambda: store.upsert_articles_batch([_article(1, "Edited", "edited text")]),
+        lambda: store.set_duplicates({store.get_canonical_article_ids()[-1]: 1}),
+        lambda: store.upsert_articles_batch(articles[:2], prune=True),
+        lambda: store.clear_articles(),
+    ]
+    for write in writes:
+        CorpusSnapshot.write(store, path)
+        assert CorpusSnapshot.open_fresh(path, store) is not None
+        assert isinstance(load_snapshot(path, store), CorpusSnapshot)
+        write()
+        assert CorpusSnapshot.open_fresh(path, store) is None
+        assert load_snapshot(path, store) is store
+
+    # Unchanged re-import: the snapshot stays fresh
+    store.upsert_articles_batch(articles)
+    CorpusSnapshot.write(store, path)
+    store.upsert_articles_batch(articles)
+    assert CorpusSnapshot.open_fresh(path, store) is not None
+
+
+def test_missing_or_unsupported(tmp_path: Path, store: CorpusStore) -> None:
+    path = tmp_path / "snapshot"
+    assert CorpusSnapshot.open_fresh(path, store) is None
+    CorpusSnapshot.write(store, path)
+    manifest = path / "manifest.json"
+    manifest.write_text(manifest.read_text().replace('"version": 1', '"version": 99'))
+    assert CorpusSnapshot.open_fresh(path, store) is None
@@ -0,0 +1,81 @@
+"""Compressed and split exports, and how the import command reports problems."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from rewriter.cli import cli
+from rewriter.importer.sources import SourceError, expand_sources
+from rewriter.importer.wordpress import iter_raw_items
+from tests.helpers import post, write_wxr
+
+_FORMATS = ["gz", "xz", "bz2"]
+
+
+@pytest.mark.parametrize("compress", _FORMATS)
+def test_compressed_export(tmp_path: Path, compress: str) -> None:
+    # The extension is misleading on purpose: formats are detected by content
+    path = write_wxr(tmp_path / "export.xml", [post(i) for i in range(1, 6)], compress=compress)
+    assert [raw.wp_id for raw in iter_raw_items(path)] == [1, 2, 3, 4, 5]
+
+
+def test_split_export_in_order(tmp_path: Path) -> None:
+    for part in (2, 1, 3):
+        write_wxr(tmp_path / f"export-00{part}.xml.gz", [post(part)], compress="gz")
+    paths = expand_sources(
+        [str(tmp_path / "export-*.xml.gz"), str(tmp_path / "export-001.xml.gz")]
+    )
+    assert [p.name for p in paths] == [
+        "export-001.xml.gz", "export-002.xml.gz", "export-003.xml.gz",
+    ]
+
+
+def _truncated(tmp_path: Path, compress: str) -> Path:
+    path = write_wxr(
+        tmp_path / f"export.xml.{compress}", [post(i) for i in range(1, 300)], compress=compress
+    )
+    data = path.read_bytes()
+    path.write_bytes(data[: len(data) // 2])
+    return path
+
+
+def _corrupt(tmp_path: Path, compress: str) -> Path:
+    path = write_wxr(
+        tmp_path / f"export.xml.{compress}", [post(i) for i in range(1, 300)], compress=compress
+    )
+    data = path.read_bytes()
+    path.write_bytes(data[:20] + b"\0" * 64 + data[84:])
+    return path
+
+
+@pytest.mark.parametrize("damage", [_truncated, _corrupt])
+@pytest.mark.parametrize("compress", _FORMATS)
+def test_unreadable_export_names_the_file(tmp_path: Path, compress: str, damage) -> None:
+    path = damage(tmp_path, compress)
+    with pytest.raises(SourceError, match=str(path)):
+        list(iter_raw_items(path))
+
+
+def test_cli_reports_unreadable_export(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("REWRITER_DATA_DIR", str(tmp_path / "data"))
+    path = _truncated(tmp_path, "xz")
+    result = CliRunner().invoke(cli, ["import", "--dry-run", str(path)])
+    assert result.exit_code == 1
+    assert "Aborted" not in result.output
+    assert f"Cannot read {path}" in result.output
+
+
+def test_cli_imports_without_tokenizer(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def offline() -> None:
+        raise ConnectionError("no network")
+
+    monkeypatch.setenv("REWRITER_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr("rewriter.llm.client._encoding", offline)
+    path = write_wxr(tmp_path / "export.xml.gz", [post(i) for i in range(1, 6)], compress="gz")
+    result = CliRunner().invoke(cli, ["import", str(path)])
+    assert result.exit_code == 0, result.output
+    assert "Tokenizer unavailable" in result.output
+    assert "Articles found" in result.output
@@ -0,0 +1,402 @@
+"""CorpusStore: incremental imports, the conversion cache and migrations."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from rewriter.corpus.models import Article, ArticleSummary
+from rewriter.corpus.store import CorpusStore
+
+
+def _article(wp_id: int, text: str = "") -> Article:
+    content = text or f"content of post {wp_id}"
+    article = Article(
+        wp_id=wp_id,
+        title=f"Post {wp_id}",
+        content=content,
+        raw_html=f"<p>{content}</p>",
+        categories=["News"],
+    )
+    article.compute_word_count()
+    article.compute_content_hash()
+    return article
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[CorpusStore]:
+    with CorpusStore(tmp_path / "corpus.db") as store:
+        yield store
+
+
+def test_upsert_counts(store: CorpusStore) -> None:
+    first = store.upsert_articles_batch([_article(1), _article(2), _article(3)])
+    assert (first.added, first.changed, first.unchanged, first.removed) == (3, 0, 0, 0)
+    ids = {a.wp_id: a.id for a in store.iter_articles()}
+
+    second = store.upsert_articles_batch(
+        [_article(1), _article(2, "edited text"), _article(4), _article(4)]
+    )
+    assert second.added == 1
+    assert second.changed == 1
+    assert second.unchanged == 1
+    assert second.duplicates == 1
+    assert second.removed == 1
+    assert not second.pruned
+
+    articles = {a.wp_id: a for a in store.iter_articles()}
+    assert set(articles) == {1, 2, 3, 4}
+    # Edited posts are updated in place
+    assert articles[2].id == ids[2]
+    assert articles[2].content == "edited text"
+    assert store.get_raw_html(ids[2]) == "<p>edited text</p>"
+
+
+def test_upsert_prune(store: CorpusStore) -> None:
+    store.upsert_articles_batch([_article(1), _article(2)])
+    result = store.upsert_articles_batch([_article(1)], prune=True)
+    assert (result.unchanged, result.removed, result.pruned) == (1, 1, True)
+    assert [a.wp_id for a in store.iter_articles()] == [1]
+    assert store.get_corpus_stats().total_articles == 1
+
+
+def test_reimport_unchanged_is_a_no_op(store: CorpusStore) -> None:
+    store.upsert_articles_batch([_article(i) for i in range(1, 6)])
+    generation = store.get_generation()
+    result = store.upsert_articles_batch([_article(i) for i in range(1, 6)], batch_size=2)
+    assert (result.added, result.changed, result.unchanged) == (0, 0, 5)
+    assert store.get_generation() == generation
+
+
+def test_cleaned_cache_is_keyed_by_backend(store: CorpusStore) -> None:
+    store.put_cleaned([("h1", "bs4 text", 2, None)], 3, backend="bs4")
+    assert store.get_cleaned(["h1"], 3, backend="bs4") == {"h1": ("bs4 text", 2, None)}
+    assert store.get_cleaned(["h1"], 3, backend="lxml") == {}
+    assert store.get_cleaned(["h1"], 4, backend="bs4") == {}
+
+
+def test_cleaned_cache_fills_in_token_counts(store: CorpusStore) -> None:
+    store.put_cleaned([("h1", "text", 1, None), ("h2", "more", 1, 5)], 3, backend="bs4")
+    store.put_cleaned([("h1", "text", 1, 4), ("h2", "more", 1, None)], 3, backend="bs4")
+    assert store.get_cleaned(["h1", "h2"], 3, backend="bs4") == {
+        "h1": ("text", 1, 4), "h2": ("more", 1, 5),
+    }
+
+
+def test_prune_cleaned(store: CorpusStore) -> None:
+    store.put_cleaned([("h1", "old", 1, None)], 2, backend="bs4")
+    store.put_cleaned([("h2", "text", 1, None), ("h3", "text", 1, None)], 3, backend="bs4")
+    with store.writing() as conn:
+        conn.execute("UPDATE cleaned_cache SET used_at = NULL WHERE raw_hash = 'h2'")
+        conn.execute("UPDATE cleaned_cache SET used_at = 0 WHERE raw_hash = 'h3'")
+    assert store.prune_cleaned(3) == 1
+    assert store.prune_cleaned(3, unused_for=3600) == 1
+    assert set(store.get_cleaned(["h1", "h2", "h3"], 3, backend="bs4")) == {"h2"}
+
+
+def test_repeated_wp_id_replaces_earlier_article(store: CorpusStore) -> None:
+    store.upsert_articles_batch([_article(1), _article(2)])
+    result = store.upsert_articles_batch([
+        _article(1, "edited"), _article(1),  # back to the stored version
+        _article(3, "first"), _article(3, "second"),
+        _article(2), _article(2, "edited"),
+    ])
+    assert (result.added, result.changed, result.unchanged) == (1, 1, 1)
+    assert result.duplicates == 3
+
+    articles = {a.wp_id: a for a in store.iter_articles()}
+    assert articles[1].content == "content of post 1"
+    assert store.get_raw_html(articles[1].id) == "<p>content of post 1</p>"
+    assert articles[2].content == "edited"
+    assert articles[3].content == "second"
+    assert store.get_corpus_stats().total_articles == 3
+
+
+def test_bulk_load_repeated_wp_id_replaces_earlier_article(store: CorpusStore) -> None:
+    second = _article(1, "second version")
+    second.categories = ["Other"]
+    result = store.bulk_load([_article(1), _article(2), second], batch_size=2)
+    assert (result.added, result.duplicates) == (2, 1)
+
+    articles = {a.wp_id: a for a in store.iter_articles(category="Other")}
+    assert articles[1].content == "second version"
+    assert store.get_raw_html(articles[1].id) == "<p>second version</p>"
+    assert store.get_categories_distribution() == {"News": 1, "Other": 1}
+    assert [h.article.wp_id for h in store.search_articles('"second"')] == [1]
+
+
+def _schema(store: CorpusStore) -> list[tuple[str, str, str]]:
+    return [
+        tuple(row)
+        for row in store.conn.execute(
+            "SELECT type, name, sql FROM sqlite_master WHERE sql IS NOT NULL ORDER BY name"
+        )
+    ]
+
+
+def test_bulk_load_restores_schema_and_counts(tmp_path: Path, store: CorpusStore) -> None:
+    with CorpusStore(tmp_path / "fresh.db") as fresh:
+        expected = _schema(fresh)
+    assert any(kind == "trigger" for kind, _, _ in expected)
+    assert any(kind == "index" for kind, _, _ in expected)
+
+    articles = [_article(i) for i in range(1, 8)]
+    articles[2].raw_html = ""
+    emptied = _article(5)
+    emptied.raw_html = ""
+    result = store.bulk_load([*articles, _article(2, "again"), emptied], batch_size=3)
+    assert (result.added, result.changed, result.unchanged, result.duplicates) == (7, 0, 0, 2)
+    assert _schema(store) == expected
+
+    ids = {a.wp_id: a.id for a in store.iter_articles()}
+    assert sorted(ids) == list(range(1, 8))
+    assert store.get_raw_html(ids[2]) == "<p>again</p>"
+    assert store.get_raw_html(ids[3]) is None
+    assert store.get_raw_html(ids[5]) is None
+    assert store.conn.execute("SELECT count(*) FROM article_html").fetchone()[0] == 5
+    assert store.get_corpus_stats().total_articles == 7
+
+    # The restored triggers keep the derived tables in step again
+    store.upsert_articles_batch([_article(8, "later post")])
+    assert [h.article.wp_id for h in store.search_articles('"later"')] == [8]
+    assert store.get_categories_distribution() == {"News": 8}
+
+
+def test_bulk_load_failure_leaves_corpus_empty(store: CorpusStore) -> None:
+    def articles() -> Iterator[Article]:
+        yield from (_article(i) for i in range(1, 5))
+        raise ValueError("bad export")
+
+    expected = _schema(store)
+    with pytest.raises(ValueError):
+        store.bulk_load(articles(), batch_size=2)
+    assert store.count_articles() == 0
+    assert _schema(store) == expected
+    result = store.bulk_load([_article(1)])
+    assert result.added == 1
+    assert store.get_raw_html(next(store.iter_articles()).id) == "<p>content of post 1</p>"
+
+
+def _add_raw_html_column(path: Path) -> None:
+    """Turn a corpus into one written before HTML moved to article_html."""
+    with CorpusStore(path) as store:
+        store.upsert_articles_batch([_article(1), _article(2)], store_html=False)
+        with store.writing() as conn:
+            conn.execute("ALTER TABLE articles ADD COLUMN raw_html TEXT NOT NULL DEFAULT ''")
+            conn.execute("UPDATE articles SET raw_html = '<p>' || content || '</p>'")
+
+
+def _columns(store: CorpusStore) -> set[str]:
+    return {r["name"] for r in store.conn.execute("PRAGMA table_info(articles)")}
+
+
+def test_migrate_raw_html(tmp_path: Path) -> None:
+    _add_raw_html_column(tmp_path / "corpus.db")
+    with CorpusStore(tmp_path / "corpus.db") as store:
+        assert "raw_html" not in _columns(store)
+        article = store.get_article(1, with_html=True)
+        assert article.raw_html == "<p>content of post 1</p>"
+
+
+def test_migrate_raw_html_without_drop_column(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(sqlite3, "sqlite_version_info", (3, 31, 1))
+    _add_raw_html_column(tmp_path / "corpus.db")
+    for _ in range(2):
+        with CorpusStore(tmp_path / "corpus.db") as store:
+            assert "raw_html" in _columns(store)
+            assert store.get_raw_html(2) == "<p>content of post 2</p>"
+            assert not store.conn.execute(
+                "SELECT COUNT(*) FROM articles WHERE raw_html != ''"
+            ).fetchone()[0]
+            generation = store.get_generation()
+    # Once emptied, the column is left alone
+    with CorpusStore(tmp_path / "corpus.db") as store:
+        assert store.get_generation() == generation
+        store.upsert_articles_batch([_article(3)])
+        assert store.get_raw_html(3) == "<p>content of post 3</p>"
+
+
+def test_rows_decode_to_validated_models(store: CorpusStore) -> None:
+    source = _article(1)
+    source.published_at = datetime(2024, 5, 1, 8, 30)
+    source.tags = ["ram", "prices"]
+    source.token_count = 42
+    store.upsert_articles_batch([source, _article(2)])
+    read = store.get_article(1)
+    assert read == source.model_copy(update={"id": read.id, "raw_html": ""})
+
+    # Decoded category lists are cached, but each article gets its own
+    first, second = store.get_all_articles()
+    first.categories.append("Other")
+    assert second.categories == ["News"]
+    summaries = {s.wp_id: s for s in store.get_article_summaries()}
+    assert summaries[2].categories == ["News"]
+    assert summaries[1] == ArticleSummary.model_validate(
+        {k: v for k, v in read.model_dump().items() if k in ArticleSummary.model_fields}
+    )
+
+
+def _totals(store: CorpusStore) -> tuple:
+    totals = store.conn.execute("SELECT articles, words FROM corpus_totals").fetchall()
+    counts = store.conn.execute(
+        "SELECT category, articles FROM category_counts ORDER BY category"
+    ).fetchall()
+    return [tuple(r) for r in totals], [tuple(r) for r in counts]
+
+
+def test_trigger_totals_match_recompute(store: CorpusStore) -> None:
+    def check() -> None:
+        maintained = _totals(store)
+        with store.writing():
+            store._rebuild_totals()
+        assert _totals(store) == maintained
+        assert store.get_corpus_stats().total_articles == store.count_articles()
+
+    bulk = [_article(i, f"text of post {i} " * i) for i in range(1, 21)]
+    for a in bulk[::3]:
+        a.categories = ["Reviews", "News"]
+    bulk[1].categories = []
+    bulk[2].categories = ["Guides", "Guides"]
+    store.bulk_load(bulk, batch_size=7)
+    check()
+
+    # Category changes, edited text and new posts
+    changed = _article(4, "new text for post four")
+    changed.categories = ["Guides"]
+    moved = _article(7)
+    moved.categories = []
+    store.upsert_articles_batch([changed, moved, _article(30), _article(31, "x y z")])
+    check()
+
+    store.insert_article(_article(40))
+    store.upsert_articles_batch([_article(i) for i in range(1, 11)], prune=True)
+    check()
+    assert store.count_articles() == 10
+
+    store.clear_articles()
+    check()
+    assert _totals(store) == ([(0, 0)], [])
+
+
+# The articles table as the first release created it, before the junction
+# tables, triggers and later columns
+_BASELINE_ARTICLES = """
+CREATE TABLE articles (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    wp_id       INTEGER UNIQUE,
+    title       TEXT NOT NULL DEFAULT '',
+    slug        TEXT NOT NULL DEFAULT '',
+    content     TEXT NOT NULL DEFAULT '',
+    raw_html    TEXT NOT NULL DEFAULT '',
+    excerpt     TEXT NOT NULL DEFAULT '',
+    published_at TEXT,
+    categories  TEXT NOT NULL DEFAULT '[]',
+    tags        TEXT NOT NULL DEFAULT '[]',
+    word_count  INTEGER NOT NULL DEFAULT 0,
+    status      TEXT NOT NULL DEFAULT 'publish'
+);
+"""
+
+
+def _wp_ids(store: CorpusStore, **filters: str) -> list[int]:
+    return sorted(a.wp_id for a in store.iter_articles(**filters))
+
+
+def test_migrate_baseline_junction_tables(tmp_path: Path) -> None:
+    path = tmp_path / "corpus.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(_BASELINE_ARTICLES)
+    conn.executemany(
+        """INSERT INTO articles (wp_id, title, content, categories, tags, word_count)
+           VALUES (?, ?, ?, ?, ?, 3)""",
+        [
+            (1, "Post 1", "память снова дорожает", '["Новости", "Железо"]', '["ram"]'),
+            (2, "Post 2", "обзор видеокарты", '["Железо"]', '["gpu", "ram"]'),
+            (3, "Post 3", "без категорий", "[]", "[]"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    with CorpusStore(path) as store:
+        assert _wp_ids(store, category="Железо") == [1, 2]
+        assert _wp_ids(store, category="Новости") == [1]
+        assert _wp_ids(store, tag="ram") == [1, 2]
+        summaries = store.get_article_summaries(category="Железо")
+        assert sorted(s.wp_id for s in summaries) == [1, 2]
+        assert store.get_categories_distribution() == {"Новости": 1, "Железо": 2}
+        assert [h.article.wp_id for h in store.search_articles('"видеокарты"')] == [2]
+
+        # The update trigger follows category and tag changes
+        moved = _article(1, "память снова дорожает")
+        moved.categories = ["Новости"]
+        moved.tags = ["prices"]
+        uncategorized = _article(3, "без категорий")
+        uncategorized.categories = ["Железо"]
+        store.upsert_articles_batch([moved, uncategorized])
+        assert _wp_ids(store, category="Железо") == [2, 3]
+        assert _wp_ids(store, category="Новости") == [1]
+        assert _wp_ids(store, tag="ram") == [2]
+        assert _wp_ids(store, tag="prices") == [1]
+        assert store.get_categories_distribution() == {"Новости": 1, "Железо": 2}
+
+    # Reopening does not backfill twice
+    with CorpusStore(path) as store:
+        assert _wp_ids(store, category="Железо") == [2, 3]
+        rows = store.conn.execute("SELECT COUNT(*) FROM article_categories").fetchone()[0]
+        assert rows == 3
+
+
+def test_concurrent_readers_and_writer(store: CorpusStore) -> None:
+    batches, per_batch = 40, 25
+    done = threading.Event()
+    errors: list[BaseException] = []
+    seen: list[list[int]] = [[] for _ in range(4)]
+
+    def write() -> None:
+        try:
+            for b in range(batches):
+                ids = range(b * per_batch + 1, (b + 1) * per_batch + 1)
+                store.upsert_articles_batch([_article(i) for i in ids], batch_size=per_batch)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    def read(n: int) -> None:
+        try:
+            while True:
+                finished = done.is_set()
+                count = store.count_articles()
+                seen[n].append(count)
+                # Reads made while writing, through the same store
+                assert store.get_corpus_stats().total_articles >= count
+                list(store.iter_articles(batch_size=50))
+                store.search_articles('"content"', limit=5)
+                if finished:
+                    break
+        except BaseException as e:
+            errors.append(e)
+
+    # Readers first, so they overlap the whole write
+    threads = [threading.Thread(target=read, args=(n,)) for n in range(4)]
+    threads.append(threading.Thread(target=write))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, errors
+    for counts in seen:
+        # Whole transactions only, never going back, and the last one seen
+        assert all(c % per_batch == 0 for c in counts)
+        assert counts == sorted(counts)
+        assert counts[-1] == batches * per_batch
+    assert len({c for counts in seen for c in counts}) > 2
@@ -0,0 +1,173 @@
+"""Token estimators and the calibration file they learn from."""
+
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from scipy.optimize import nnls
+
+from rewriter.llm.batch import BatchProcessor
+from rewriter.llm.tokens import (
+    FEATURES,
+    MAX_SAMPLES,
+    MIN_SAMPLES,
+    CalibratedEstimator,
+    TokenEstimator,
+    load_samples,
+    record_usage,
+    text_features,
+)
+
+
+def _row(i: int) -> list[int]:
+    features = text_features(f"sample {i} текст")
+    return [*features, i]
+
+
+def test_estimator_must_count() -> None:
+    class Partial(TokenEstimator):
+        pass
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_concurrent_recording(tmp_path: Path) -> None:
+    path = tmp_path / "calibration.json"
+
+    def record(worker: int) -> None:
+        for i in range(200):
+            record_usage(path, [_row(worker * 1000 + i)])
+
+    threads = [threading.Thread(target=record, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    samples = load_samples(path)
+    assert len(samples) == 800
+    assert sorted(row[-1] for row in samples) == sorted(
+        w * 1000 + i for w in range(4) for i in range(200)
+    )
+    assert [p.name for p in tmp_path.iterdir()] == ["calibration.json"]
+
+
+@pytest.mark.parametrize("text", ["", "{\"features\": [", "[1, 2]", '{"features": 3}', "\xff"])
+def test_unreadable_calibration_file(tmp_path: Path, text: str) -> None:
+    path = tmp_path / "calibration.json"
+    path.write_text(text, encoding="latin-1")
+    assert load_samples(path) == []
+    record_usage(path, [_row(1)])
+    assert load_samples(path) == [_row(1)]
+
+
+def test_recording_appends_lines(tmp_path: Path) -> None:
+    path = tmp_path / "calibration.json"
+    record_usage(path, [_row(1)])
+    before = path.read_text(encoding="utf-8")
+    record_usage(path, [_row(2), _row(3)])
+    text = path.read_text(encoding="utf-8")
+    assert text.startswith(before)
+    assert text[len(before) :] == f"{json.dumps(_row(2))}\n{json.dumps(_row(3))}\n"
+    # A torn last line, as a crash mid-write leaves it, is skipped
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("[1, 2,")
+    assert load_samples(path) == [_row(1), _row(2), _row(3)]
+    record_usage(path, [_row(4)])
+    assert load_samples(path) == [_row(1), _row(2), _row(3), _row(4)]
+
+
+def test_load_compacts(tmp_path: Path) -> None:
+    path = tmp_path / "calibration.json"
+    # The whole-document format of earlier versions is read and rewritten as lines
+    path.write_text(
+        json.dumps({"features": FEATURES, "samples": [_row(i) for i in range(3)]}),
+        encoding="utf-8",
+    )
+    record_usage(path, [_row(3)])
+    assert load_samples(path) == [_row(i) for i in range(4)]
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 5
+
+    record_usage(path, [_row(i) for i in range(4, 2 * MAX_SAMPLES + 1)])
+    samples = load_samples(path)
+    assert samples == [_row(i) for i in range(MAX_SAMPLES + 1, 2 * MAX_SAMPLES + 1)]
+    assert len(path.read_text(encoding="utf-8").splitlines()) == MAX_SAMPLES + 1
+    assert load_samples(path) == samples
+
+
+def test_recording_failure_is_not_raised(tmp_path: Path) -> None:
+    # The parent "directory" is a file, so nothing can be written
+    blocker = tmp_path / "data"
+    blocker.write_text("")
+    record_usage(blocker / "calibration.json", [_row(1)])
+    assert load_samples(blocker / "calibration.json") == []
+
+
+def test_fit_recovers_coefficients() -> None:
+    truth = (0.3, 0.25, 0.5, 0.6, 0.1)
+    texts = [
+        f"Пример {i} text, with {i * 7} words!" * (1 + i % 9) for i in range(4 * MIN_SAMPLES)
+    ]
+    samples = []
+    for text in texts:
+        features = text_features(text)
+        samples.append([*features, round(sum(c * f for c, f in zip(truth, features)) + 12)])
+    estimator = CalibratedEstimator.fit(samples)
+    assert estimator.samples == len(samples)
+    assert len(estimator.coefficients) == len(FEATURES)
+    assert estimator.error_bound < 0.05
+    for text in texts[:5]:
+        expected = sum(c * f for c, f in zip(truth, text_features(text)))
+        assert estimator.count(text) == pytest.approx(expected, rel=0.05, abs=2)
+
+
+def test_error_bound_is_held_out() -> None:
+    # Few samples with noise: the fit follows the noise, so its error on the
+    # samples it was fitted to understates the error on new requests
+    rng = np.random.default_rng(0)
+    samples = []
+    for i in range(MIN_SAMPLES):
+        features = text_features(f"Пример {i} text" * (1 + i % 7))
+        samples.append([*features, round(sum(features) * rng.uniform(0.7, 1.3))])
+    data = np.asarray(samples, dtype=float)
+    x = np.column_stack([data[:, :-1], np.ones(len(data))])
+    solution, _ = nnls(x, data[:, -1])
+    in_sample = np.quantile(np.abs(x @ solution - data[:, -1]) / data[:, -1], 0.95)
+    estimator = CalibratedEstimator.fit(samples)
+    assert estimator.error_bound > in_sample
+
+
+def test_batch_results_record_usage_as_they_arrive(tmp_path: Path) -> None:
+    path = tmp_path / "calibration.json"
+
+    def event(i: int) -> SimpleNamespace:
+        usage = SimpleNamespace(
+            input_tokens=100 + i, cache_read_input_tokens=None, cache_creation_input_tokens=0
+        )
+        message = SimpleNamespace(
+            content=[SimpleNamespace(type="text", text=f"result {i}")], usage=usage
+        )
+        return SimpleNamespace(
+            custom_id=f"chunk_{i}", result=SimpleNamespace(type="succeeded", message=message)
+        )
+
+    def results(batch_id: str):
+        yield event(0)
+        yield event(1)
+        raise ConnectionError("download interrupted")
+
+    processor = BatchProcessor.__new__(BatchProcessor)
+    processor.settings = SimpleNamespace(token_calibration_path=path)
+    processor.client = SimpleNamespace(
+        messages=SimpleNamespace(batches=SimpleNamespace(results=results))
+    )
+    features = {f"chunk_{i}": text_features(f"request {i}") for i in range(3)}
+    with pytest.raises(ConnectionError):
+        processor._collect_results("batch", features)
+    assert [row[-1] for row in load_samples(path)] == [100, 101]
@@ -0,0 +1,45 @@
+"""WXR parsing: serial and process-pool runs build the same articles."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from rewriter.importer.wordpress import parse_wxr
+from tests.helpers import post, write_wxr
+
+_HTML = (
+    "<h2>Section {i}</h2><p>Text with <strong>bold</strong> and <em>emphasis</em> "
+    "[caption id=x]shortcode[/caption] in post {i}.</p>"
+    "<ul><li>first {i}</li><li>second</li></ul>"
+    "<table><tr><td>a{i}</td><td>b</td></tr></table>"
+    "<blockquote><p>quoted {i}</p></blockquote><pre>code {i}\n  indented</pre>"
+)
+
+
+@pytest.fixture
+def export(tmp_path: Path) -> Path:
+    posts = [post(i, html=_HTML.format(i=i) * (1 + i % 5)) for i in range(1, 150)]
+    posts += [
+        post(500, post_type="page"),
+        post(501, status="draft"),
+        post(502, html="   "),
+        post(503, words=3),
+    ]
+    return write_wxr(tmp_path / "export.xml", posts)
+
+
+@pytest.mark.parametrize("cleaner", ["bs4", "lxml"])
+def test_workers_match_serial(export: Path, cleaner: str) -> None:
+    serial = [a.model_dump() for a in parse_wxr(export, min_words=5, cleaner=cleaner)]
+    parallel = [
+        a.model_dump() for a in parse_wxr(export, min_words=5, workers=3, cleaner=cleaner)
+    ]
+    assert len(serial) == 149
+    assert parallel == serial
+
+
+def test_skips_pages_drafts_and_short_posts(export: Path) -> None:
+    ids = {a.wp_id for a in parse_wxr(export, min_words=5)}
+    assert ids == set(range(1, 150))